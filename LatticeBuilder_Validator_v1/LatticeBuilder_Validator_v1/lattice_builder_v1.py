@@ -13,6 +13,7 @@ This is a math validator: it does *not* attempt full glue-code overlattice const
 """
 from __future__ import annotations
 import json, math, argparse, sys
+from functools import lru_cache
 from typing import List, Tuple, Dict
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -144,6 +145,23 @@ def block_diag(blocks: List[Matrix]) -> Matrix:
         o += m
     return M
 
+@lru_cache(maxsize=None)
+def _ade_block(base: str) -> Tuple[Tuple[float, ...], ...]:
+    """Cartan matrix for one ADE component, built once per process (read-only)."""
+    if base.startswith('A'):
+        C = cartan_A(int(base[1:]))
+    elif base.startswith('D'):
+        C = cartan_D(int(base[1:]))
+    elif base == 'E6':
+        C = cartan_E6()
+    elif base == 'E7':
+        C = cartan_E7()
+    elif base == 'E8':
+        C = cartan_E8()
+    else:
+        raise ValueError(f"Unknown base '{base}' in spec")
+    return tuple(tuple(r) for r in C)
+
 def parse_root_spec(spec: str) -> Matrix:
     """Parse like 'A8 + D16' or 'E8^3' or 'A1^24'."""
     tokens = spec.replace('*','^').replace('+',' ').replace(',',' ').split()
@@ -155,21 +173,8 @@ def parse_root_spec(spec: str) -> Matrix:
         else:
             base, times = tok, 1
         base = base.strip().upper()
-        for _ in range(times):
-            if base.startswith('A'):
-                n = int(base[1:])
-                blocks.append(cartan_A(n))
-            elif base.startswith('D'):
-                n = int(base[1:])
-                blocks.append(cartan_D(n))
-            elif base == 'E6':
-                blocks.append(cartan_E6())
-            elif base == 'E7':
-                blocks.append(cartan_E7())
-            elif base == 'E8':
-                blocks.append(cartan_E8())
-            else:
-                raise ValueError(f"Unknown base '{base}' in spec")
+        block = _ade_block(base)
+        blocks.extend([block]*times)
     return block_diag(blocks)
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -1,12 +1,13 @@
 
 import sys, json, time
-from typing import List
+from typing import List, Optional
 from morphonic_cqe_unified.core.cqe_math import (
     Vector, simple_roots_e8, cartan_from_simple_roots, metric_A_from_cartan,
     phi, try_internal_step, project_to_fundamental_chamber
 )
-from cqe_time import toroidal_step
+from morphonic_cqe_unified.core.cqe_time import toroidal_step
 from morphonic_cqe_unified.core.cqe_governance import BoundaryReceipt, AuditChain
+from morphonic_cqe_unified.core.cnf import Canonical
 from morphonic_cqe_unified.sidecar.cqe_sidecar_adapter import CQESidecar
 
 HELP = (
@@ -35,14 +36,14 @@ def parse_vec(args: List[str]) -> Vector:
     return tuple(float(a) for a in args)  # type: ignore
 
 class CQEPersonalNode:
-    def __init__(self):
+    def __init__(self, chain_path: Optional[str] = None):
         self.S = simple_roots_e8()
         self.C = cartan_from_simple_roots(self.S)
         self.A = metric_A_from_cartan(self.C, scale=1.0)
         self.x: Vector = (0.0,)*8
         self.scope: str = "personal"
         self.channel: int = 3
-        self.audit = AuditChain()
+        self.audit = AuditChain(chain_path)
         self.sidecar = CQESidecar()
 
     def show_state(self):
@@ -56,12 +57,23 @@ class CQEPersonalNode:
         print("In fundamental chamber:", ok, "reflections:", refs)
         print("alpha·x =", " ".join(f"{d:+.6f}" for d in alpha_dots))
 
+    def classify_batch(self, states):
+        """Chamber projection for an (N, 8) batch of states (NumPy kernel)."""
+        from morphonic_cqe_unified.core import cqe_math_np as npm
+        return npm.project_to_fundamental_chamber(states, npm.E8_SIMPLE_ROOTS)
+
     def tick_time(self):
         x_new, closed = toroidal_step(self.x)
         print("Toroidal closure:", "OK" if closed else "FAIL")
         if closed:
             self.x = x_new
 
+    def tick_time_batch(self, states, k: int = 1):
+        """Advance an (N, 8) ensemble by k toroidal ticks without touching
+        self.x. Returns (states_k, closed, drift)."""
+        from morphonic_cqe_unified.core.cqe_time import toroidal_steps
+        return toroidal_steps(states, k)
+
     def set_scope(self, s: str):
         self.scope = s
         print("scope =", self.scope)
@@ -86,7 +98,8 @@ class CQEPersonalNode:
             print("REJECTED (\u0394Phi would increase)")
 
     def step_boundary(self, delta: Vector, note: str = ""):
-        payload = {"op": "boundary_step", "x": self.x, "delta": delta, "note": note}
+        # Canonical: the sidecar key and input hash share one encoding
+        payload = Canonical({"op": "boundary_step", "x": self.x, "delta": delta, "note": note})
         def compute():
             pre = self.x
             post = tuple(pre[i] + delta[i] for i in range(8))
@@ -110,7 +123,7 @@ class CQEPersonalNode:
         r = BoundaryReceipt(
             timestamp=time.time(),
             actor="CQE:PersonalNode",
-            pre_state=payload["x"],
+            pre_state=payload.obj["x"],
             post_state=tuple(res["post"]),
             dphi=res["receipt"]["dphi"],
             channel=9,
@@ -138,12 +151,20 @@ class CQEPersonalNode:
         else:
             print("PLAN FAILED (cannot move towards target without raising Phi)")
 
+    def plan_batch(self, targets):
+        """Evaluate plan_towards for an (N, 8) batch of targets from the current
+        state without applying any of them. Returns (x_new, accepted, attempts)."""
+        from morphonic_cqe_unified.core import cqe_math_np as npm
+        import numpy as np
+        x = np.asarray(self.x, dtype=float)
+        return npm.try_internal_step(np.asarray(self.A), x, np.asarray(targets, dtype=float) - x)
+
     def show_receipts(self):
         ok = self.audit.verify()
         print("AuditChain verify:", "OK" if ok else "FAIL")
         last = self.audit.entries[-5:]
         for e in last:
-            print(f\"[{e.idx}] ts={e.receipt.timestamp:.3f} dPhi={e.receipt.dphi:+.6f} hash={e.receipt.cnf_hash[:16]}...\")
+            print(f"[{e.idx}] ts={e.receipt.timestamp:.3f} dPhi={e.receipt.dphi:+.6f} hash={e.receipt.cnf_hash[:16]}...")
 
     def save(self, path: str):
         data = {
@@ -171,34 +192,24 @@ class CQEPersonalNode:
         print("Saved ->", path)
 
     def load(self, path: str):
+        if self.audit.path:
+            # The persistent chain is append-only; replacing it would fork the history
+            raise ValueError(f"audit chain is persisted at {self.audit.path}; /load needs a node without one")
         with open(path, "r") as f:
             data = json.load(f)
         self.x = tuple(data["x"])
         self.scope = data["scope"]
         self.channel = int(data["channel"])
-        self.audit = AuditChain()
-        for item in data.get("audit", []):
-            rdat = item["receipt"]
-            r = BoundaryReceipt(
-                timestamp=rdat["timestamp"],
-                actor=rdat["actor"],
-                pre_state=tuple(rdat["pre_state"]),
-                post_state=tuple(rdat["post_state"]),
-                dphi=rdat["dphi"],
-                channel=rdat["channel"],
-                scope=rdat["scope"],
-                note=rdat.get("note",""),
-            )
-            r.cnf_hash = rdat["cnf_hash"]
-            r.crt_sig = rdat["crt_sig"]
-            self.audit.append(r)
+        # Saved entries carry their hashes; verify() checks them on demand
+        self.audit = AuditChain.from_records(data.get("audit", []))
         print("Loaded <-", path)
 
     def sidecar_report(self):
         print(self.sidecar.report())
 
 def main():
-    node = CQEPersonalNode()
+    # Optional argument: path of a persistent audit chain (JSONL)
+    node = CQEPersonalNode(sys.argv[1] if len(sys.argv) > 1 else None)
     print("CQE Personal Node (Phase 1) ready. Type /help for commands.")
     while True:
         try:
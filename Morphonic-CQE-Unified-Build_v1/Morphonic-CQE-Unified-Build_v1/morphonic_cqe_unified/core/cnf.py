@@ -0,0 +1,167 @@
+
+"""Canonical JSON (CNF) encoding, written in one pass.
+
+encode_cnf(obj) produces exactly the text of the original two-step
+to_cnf (round floats in dicts/lists to 12 places, then
+json.dumps(sort_keys=True, separators=(",", ":"))), so existing receipt
+and chain hashes are unchanged. Tuples are written as-is, with floats
+unrounded, as before.
+
+Canonical wraps a payload and computes its CNF text and SHA-256 digest at
+most once, so the sidecar, receipts and audit chain can share them.
+"""
+import hashlib
+import struct
+from json.encoder import encode_basestring_ascii as _enc_str
+from typing import Any, List
+
+_INF = float("inf")
+
+# Text of finite float tuples (state vectors), keyed by their exact bits
+# so 0.0/-0.0 and 1/1.0 never collide. States recur across the sidecar
+# payload, the receipt and the next step, so each is written once.
+_VEC_MEMO = {}
+_VEC_MEMO_MAX = 4096
+
+def _float(x: float) -> str:
+    if x != x:
+        return "NaN"
+    if x == _INF:
+        return "Infinity"
+    if x == -_INF:
+        return "-Infinity"
+    return float.__repr__(x)
+
+def _key(k: Any) -> str:
+    if isinstance(k, str):
+        return k
+    if isinstance(k, bool) or k is None:
+        return {True: "true", False: "false", None: "null"}[k]
+    if isinstance(k, int):
+        return int.__repr__(k)
+    if isinstance(k, float):
+        return _float(k)
+    raise TypeError(f"keys must be str, int, float, bool or None, not {type(k).__name__}")
+
+def _write(x: Any, out: List[str], rnd: bool) -> None:
+    t = type(x)
+    if t is str:
+        out.append(_enc_str(x))
+    elif t is float:
+        out.append(_float(float(f"{x:.12f}") if rnd else x))
+    elif t is int:
+        out.append(int.__repr__(x))
+    elif x is None:
+        out.append("null")
+    elif x is True:
+        out.append("true")
+    elif x is False:
+        out.append("false")
+    elif t is tuple:
+        text = _vec_text(x)
+        if text is None:
+            _write_seq(x, out, False)
+        else:
+            out.append(text)
+    elif isinstance(x, dict):
+        if not x:
+            out.append("{}")
+            return
+        sep = "{"
+        for k, v in sorted(x.items()):
+            out.append(sep)
+            out.append(_enc_str(_key(k)))
+            out.append(":")
+            _write(v, out, rnd)
+            sep = ","
+        out.append("}")
+    elif isinstance(x, (list, tuple)):
+        _write_seq(x, out, rnd and not isinstance(x, tuple))
+    elif isinstance(x, str):
+        out.append(_enc_str(x))
+    elif isinstance(x, int):
+        out.append(int.__repr__(x))
+    elif isinstance(x, float):
+        out.append(_float(float(f"{x:.12f}") if rnd else x))
+    else:
+        raise TypeError(f"Object of type {t.__name__} is not JSON serializable")
+
+def _vec_text(x: tuple):
+    if not x or not all(type(v) is float for v in x):
+        return None
+    key = struct.pack(f"{len(x)}d", *x)
+    text = _VEC_MEMO.get(key)
+    if text is None:
+        if not all(v - v == 0.0 for v in x):
+            return None
+        text = "[" + ",".join(map(float.__repr__, x)) + "]"
+        if len(_VEC_MEMO) >= _VEC_MEMO_MAX:
+            _VEC_MEMO.clear()
+        _VEC_MEMO[key] = text
+    return text
+
+def _write_seq(x, out: List[str], rnd: bool) -> None:
+    if not x:
+        out.append("[]")
+        return
+    sep = "["
+    for v in x:
+        out.append(sep)
+        _write(v, out, rnd)
+        sep = ","
+    out.append("]")
+
+def encode_cnf(obj: Any) -> str:
+    if isinstance(obj, Canonical):
+        return obj.text
+    out: List[str] = []
+    _write(obj, out, True)
+    return "".join(out)
+
+def sha256_hex(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+class Canonical:
+    """A payload with its CNF text and digest computed once, on first use.
+
+    The wrapped object must not be mutated afterwards.
+    """
+    __slots__ = ("obj", "_text", "_digest")
+
+    def __init__(self, obj: Any):
+        self.obj = obj
+        self._text = None
+        self._digest = None
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            out: List[str] = []
+            _write(self.obj, out, True)
+            self._text = "".join(out)
+        return self._text
+
+    @property
+    def data(self) -> bytes:
+        return self.text.encode("utf-8")
+
+    @property
+    def digest(self) -> str:
+        if self._digest is None:
+            self._digest = sha256_hex(self.data)
+        return self._digest
+
+    def __str__(self) -> str:
+        return self.text
+
+    def __repr__(self) -> str:
+        return f"Canonical({self.obj!r})"
+
+def canonical(obj: Any) -> Canonical:
+    return obj if isinstance(obj, Canonical) else Canonical(obj)
+
+def cnf_digest(obj: Any) -> str:
+    """SHA-256 of encode_cnf(obj); reuses a Canonical's cached digest."""
+    if isinstance(obj, Canonical):
+        return obj.digest
+    return sha256_hex(encode_cnf(obj).encode("utf-8"))
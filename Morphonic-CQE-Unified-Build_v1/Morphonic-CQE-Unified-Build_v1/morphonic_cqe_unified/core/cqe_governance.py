@@ -1,27 +1,15 @@
 
-import json, hashlib
-from dataclasses import dataclass, asdict
-from typing import Any, Optional, Tuple, List
+import json, hashlib, hmac, os
+from dataclasses import dataclass, asdict, fields
+from typing import Any, Dict, Iterable, Optional, Tuple, List
+from morphonic_cqe_unified.core.cnf import encode_cnf, sha256_hex
 
 CRT_PRIMES = [1000003, 1000033, 1000037]
 BASE62 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
 assert len(BASE62) == 62
 
 def to_cnf(obj: Any) -> str:
-    def transform(x):
-        if isinstance(x, dict):
-            return {k: transform(v) for k,v in sorted(x.items())}
-        elif isinstance(x, list):
-            return [transform(v) for v in x]
-        elif isinstance(x, float):
-            return float(f"{x:.12f}")
-        else:
-            return x
-    stable = transform(obj)
-    return json.dumps(stable, separators=(",", ":"), sort_keys=True)
-
-def sha256_hex(data: bytes) -> str:
-    return hashlib.sha256(data).hexdigest()
+    return encode_cnf(obj)
 
 def _to_base62(n: int) -> str:
     if n == 0:
@@ -52,16 +40,19 @@ class BoundaryReceipt:
     crt_sig: Optional[str] = None
 
     def to_cnf_hash_and_sign(self) -> Tuple[str, str]:
-        data = asdict(self).copy()
+        # Shallow field dict: asdict() would deep-copy the state tuples
+        data = {name: getattr(self, name) for name in _RECEIPT_FIELDS}
         data["cnf_hash"] = None
         data["crt_sig"] = None
-        cnf = to_cnf(data)
+        cnf = encode_cnf(data)
         h = sha256_hex(cnf.encode("utf-8"))
         sig = crt_signature(h)
         self.cnf_hash = h
         self.crt_sig = sig
         return h, sig
 
+_RECEIPT_FIELDS = tuple(f.name for f in fields(BoundaryReceipt))
+
 @dataclass
 class AuditEntry:
     idx: int
@@ -69,47 +60,195 @@ class AuditEntry:
     receipt: BoundaryReceipt
     entry_hash: str
 
+GENESIS = "0"*64
+
+def _entry_content(prev_hash: str, r: BoundaryReceipt) -> dict:
+    return {
+        "prev_hash": prev_hash,
+        "cnf_hash": r.cnf_hash,
+        "crt_sig": r.crt_sig,
+        "timestamp": r.timestamp,
+        "actor": r.actor,
+        "channel": r.channel,
+        "scope": r.scope,
+    }
+
+def _hash_content(content: dict) -> str:
+    return sha256_hex(encode_cnf(content).encode("utf-8"))
+
+def _verify_segment(rows: List[Tuple[dict, str]]) -> int:
+    """Offset of the first row whose hash does not match, or -1."""
+    for i, (content, entry_hash) in enumerate(rows):
+        if _hash_content(content) != entry_hash:
+            return i
+    return -1
+
+def _receipt_from_dict(d: Dict[str, Any]) -> BoundaryReceipt:
+    d = dict(d)
+    d["pre_state"] = tuple(d["pre_state"])
+    d["post_state"] = tuple(d["post_state"])
+    return BoundaryReceipt(**d)
+
 class AuditChain:
-    def __init__(self):
+    """Hash-chained boundary receipts.
+
+    With a path, the chain is persisted as append-only JSONL: one
+    {"entry": ...} line per receipt and a signed {"checkpoint": ...} line
+    every checkpoint_every entries. Reopening streams the file, trusts the
+    prefix covered by the last valid checkpoint and rehashes only the tail.
+    Checkpoints are signed with HMAC-SHA256 when checkpoint_key is given,
+    otherwise with the receipts' CRT signature.
+
+    verify() is incremental from the last verified entry; verify(full=True)
+    rehashes everything, optionally in a process pool (workers > 1).
+    """
+    def __init__(self, path: Optional[str] = None, checkpoint_every: int = 1024,
+                 checkpoint_key: Optional[bytes] = None):
         self.entries: List[AuditEntry] = []
-        self.tip_hash: str = "0"*64
+        self.tip_hash: str = GENESIS
+        self.path = path
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_key = checkpoint_key
+        self._verified = 0                # entries[:_verified] are verified
+        self._ok = True
+        self._file = None
+        if path:
+            d = os.path.dirname(path)
+            if d:
+                os.makedirs(d, exist_ok=True)
+            self._resume()
+            self._file = open(path, "a", encoding="utf-8")
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]) -> "AuditChain":
+        """Rebuild an in-memory chain from saved entry dicts without rehashing.
+
+        The result is unverified; the first verify() checks it.
+        """
+        chain = cls()
+        for rec in records:
+            chain._push(AuditEntry(idx=rec["idx"], prev_hash=rec["prev_hash"],
+                                   receipt=_receipt_from_dict(rec["receipt"]),
+                                   entry_hash=rec["entry_hash"]))
+        return chain
+
+    # ---- persistence
+    def sign_checkpoint(self, n: int, tip: str) -> str:
+        h = _hash_content({"n": n, "tip": tip})
+        if self.checkpoint_key is not None:
+            return hmac.new(self.checkpoint_key, h.encode("ascii"), hashlib.sha256).hexdigest()
+        return crt_signature(h)
+
+    def _resume(self):
+        """Stream entries from an existing chain file.
+
+        A torn trailing line (crash mid-write: no newline) is truncated
+        away. A bad line anywhere else raises ValueError and leaves the file
+        untouched.
+        """
+        if not os.path.exists(self.path):
+            return
+        trusted = 0
+        good_end = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                if not line.strip():
+                    good_end += len(line)
+                    continue
+                try:
+                    rec = json.loads(line)
+                    if "entry" in rec:
+                        e = rec["entry"]
+                        self._push(AuditEntry(idx=e["idx"], prev_hash=e["prev_hash"],
+                                              receipt=_receipt_from_dict(e["receipt"]),
+                                              entry_hash=e["entry_hash"]))
+                    else:
+                        cp = rec["checkpoint"]
+                        n, tip = cp["n"], cp["tip"]
+                        if (0 < n <= len(self.entries) and self.entries[n-1].entry_hash == tip
+                                and hmac.compare_digest(cp["sig"], self.sign_checkpoint(n, tip))):
+                            trusted = n
+                except (ValueError, KeyError, TypeError) as ex:
+                    raise ValueError(f"Corrupt audit record at offset {good_end} in {self.path}: {ex!r}") from ex
+                good_end += len(line)
+        if good_end < os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(good_end)
+        # Linkage is cheap to check; only the untrusted tail is rehashed
+        prev = GENESIS
+        for e in self.entries[:trusted]:
+            if e.prev_hash != prev:
+                trusted = 0
+                break
+            prev = e.entry_hash
+        self._verified = trusted
+        self.verify()
+
+    def _write(self, rec: dict):
+        self._file.write(json.dumps(rec, separators=(",", ":")) + "\n")
+
+    def checkpoint(self) -> None:
+        """Write a signed checkpoint covering the verified prefix."""
+        if self._file is None or not self.verify() or not self.entries:
+            return
+        n = len(self.entries)
+        self._write({"checkpoint": {"n": n, "tip": self.tip_hash, "sig": self.sign_checkpoint(n, self.tip_hash)}})
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # ---- chain
+    def _push(self, entry: AuditEntry):
+        self.entries.append(entry)
+        self.tip_hash = entry.entry_hash
 
     def append(self, r: BoundaryReceipt) -> AuditEntry:
         if not r.cnf_hash or not r.crt_sig:
             r.to_cnf_hash_and_sign()
-        content = {
-            "prev_hash": self.tip_hash,
-            "cnf_hash": r.cnf_hash,
-            "crt_sig": r.crt_sig,
-            "timestamp": r.timestamp,
-            "actor": r.actor,
-            "channel": r.channel,
-            "scope": r.scope,
-        }
-        h = hashlib.sha256(to_cnf(content).encode("utf-8")).hexdigest()
-        entry = AuditEntry(idx=len(self.entries), prev_hash=self.tip_hash, receipt=r, entry_hash=h)
-        self.entries.append(entry)
-        self.tip_hash = h
+        h = _hash_content(_entry_content(self.tip_hash, r))
+        idx = len(self.entries)
+        entry = AuditEntry(idx=idx, prev_hash=self.tip_hash, receipt=r, entry_hash=h)
+        self._push(entry)
+        # Entries hashed here extend a verified chain without rehashing
+        if self._ok and self._verified == idx:
+            self._verified = idx + 1
+        if self._file is not None:
+            self._write({"entry": asdict(entry)})
+            if self.checkpoint_every and (idx + 1) % self.checkpoint_every == 0:
+                self.checkpoint()
+            else:
+                self._file.flush()
         return entry
 
-    def verify(self) -> bool:
-        prev = "0"*64
-        for e in self.entries:
-            if e.prev_hash != prev:
+    def verify(self, full: bool = False, workers: int = 1, segment_size: int = 4096) -> bool:
+        """Check the chain. Incremental from the last verified entry unless full."""
+        if full:
+            self._verified, self._ok = 0, True
+        elif not self._ok:
+            return False
+        start = self._verified
+        prev = self.entries[start-1].entry_hash if start else GENESIS
+        rows = []
+        for e in self.entries[start:]:
+            if e.prev_hash != prev or not e.receipt.cnf_hash or not e.receipt.crt_sig:
+                self._ok = False
                 return False
-            if not e.receipt.cnf_hash or not e.receipt.crt_sig:
-                return False
-            recompute = {
-                "prev_hash": e.prev_hash,
-                "cnf_hash": e.receipt.cnf_hash,
-                "crt_sig": e.receipt.crt_sig,
-                "timestamp": e.receipt.timestamp,
-                "actor": e.receipt.actor,
-                "channel": e.receipt.channel,
-                "scope": e.receipt.scope,
-            }
-            h = hashlib.sha256(to_cnf(recompute).encode("utf-8")).hexdigest()
-            if h != e.entry_hash:
-                return False
-            prev = h
+            rows.append((_entry_content(e.prev_hash, e.receipt), e.entry_hash))
+            prev = e.entry_hash
+        if workers > 1 and len(rows) > segment_size:
+            from concurrent.futures import ProcessPoolExecutor
+            segments = [rows[i:i+segment_size] for i in range(0, len(rows), segment_size)]
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                bad = list(pool.map(_verify_segment, segments))
+        else:
+            bad = [_verify_segment(rows)] if rows else []
+        if any(b >= 0 for b in bad):
+            self._ok = False
+            return False
+        self._verified = len(self.entries)
         return True
@@ -1,5 +1,6 @@
 
 import math
+from functools import lru_cache
 from typing import List, Tuple
 
 Vector = Tuple[float, ...]
@@ -17,6 +18,11 @@ def _scale(a: Vector, s: float) -> Vector:
     return tuple(s*x for x in a)
 
 def generate_e8_roots() -> List[Vector]:
+    return list(_e8_roots())
+
+@lru_cache(maxsize=1)
+def _e8_roots() -> Tuple[Vector, ...]:
+    # Built and validated once per process; callers get a fresh list
     roots = []
     n = 8
     # Family 1: D8 roots (±1, ±1, 0^6), 112 roots
@@ -39,9 +45,13 @@ def generate_e8_roots() -> List[Vector]:
         l2 = _dot(r, r)
         if abs(l2 - 2.0) > 1e-9:
             raise ValueError("Root has wrong length^2: {}".format(l2))
-    return roots
+    return tuple(roots)
 
 def simple_roots_e8() -> List[Vector]:
+    return list(_simple_roots_e8())
+
+@lru_cache(maxsize=1)
+def _simple_roots_e8() -> Tuple[Vector, ...]:
     def e(i):
         v = [0.0]*8
         v[i] = 1.0
@@ -59,7 +69,7 @@ def simple_roots_e8() -> List[Vector]:
     for a in S:
         if abs(_dot(a,a) - 2.0) > 1e-9:
             raise ValueError("Simple root length^2 not 2")
-    return S
+    return tuple(S)
 
 def cartan_from_simple_roots(S: List[Vector]) -> List[List[float]]:
     C = []
@@ -0,0 +1,104 @@
+
+"""Array-backed variant of cqe_math.
+
+Same operations, vectorized over (N, 8) batches with NumPy. Every
+function also accepts a single 8-vector and then returns unbatched
+results. The E8 root data comes from the shared e8_roots provider.
+"""
+from functools import lru_cache
+from typing import Tuple
+
+import numpy as np
+
+from .e8_roots import get_e8_root_system
+
+def _frozen(a: np.ndarray) -> np.ndarray:
+    a.setflags(write=False)
+    return a
+
+_E8 = get_e8_root_system()
+E8_ROOTS = _E8.roots
+E8_SIMPLE_ROOTS = _E8.simple_roots
+E8_CARTAN = _E8.cartan
+
+@lru_cache(maxsize=32)
+def metric_A(scale: float = 1.0) -> np.ndarray:
+    """Cached matrix form of metric_A_from_cartan(E8 Cartan, scale)."""
+    return _frozen(scale * E8_CARTAN)
+
+def as_batch(x) -> Tuple[np.ndarray, bool]:
+    """(N, 8) float array and whether the input was a single vector."""
+    X = np.asarray(x, dtype=float)
+    return (X[None, :], True) if X.ndim == 1 else (X, False)
+
+def phi(A, X) -> np.ndarray:
+    """x^T A x for each row (a float for a single vector)."""
+    X = np.asarray(X, dtype=float)
+    return np.einsum("...i,ij,...j->...", X, np.asarray(A, dtype=float), X)
+
+def reflect(X, root) -> np.ndarray:
+    """Reflect each row of X in the hyperplane orthogonal to root."""
+    X = np.asarray(X, dtype=float)
+    root = np.asarray(root, dtype=float)
+    coeff = 2.0 * (X @ root) / (root @ root)
+    return X - coeff[..., None] * root
+
+def project_to_fundamental_chamber(X, S=E8_SIMPLE_ROOTS, max_iter: int = 1024, tol: float = 1e-12):
+    """Batched cqe_math.project_to_fundamental_chamber.
+
+    Each row reflects in its most negative simple root until all
+    alpha-dots are >= -tol; converged rows drop out of the active set.
+
+    Returns:
+        (projected (N,8), alpha_dots (N,k), reflections (N,), converged (N,))
+    """
+    cur, single = as_batch(X)
+    cur = cur.copy()
+    S = np.asarray(S, dtype=float)
+    norms2 = np.einsum("ij,ij->i", S, S)
+    n = len(cur)
+    reflections = np.zeros(n, dtype=np.int64)
+    converged = np.zeros(n, dtype=bool)
+    active = np.arange(n)
+    for _ in range(max_iter):
+        if active.size == 0:
+            break
+        dots = cur[active] @ S.T
+        i = dots.argmin(axis=1)
+        worst = dots[np.arange(active.size), i]
+        done = worst >= -tol
+        converged[active[done]] = True
+        active, i, worst = active[~done], i[~done], worst[~done]
+        cur[active] -= (2.0 * worst / norms2[i])[:, None] * S[i]
+        reflections[active] += 1
+    alpha_dots = cur @ S.T
+    if single:
+        return cur[0], alpha_dots[0], int(reflections[0]), bool(converged[0])
+    return cur, alpha_dots, reflections, converged
+
+def try_internal_step(A, x, deltas, max_backtracks: int = 20, shrink: float = 0.5):
+    """Batched cqe_math.try_internal_step over many deltas (and/or states).
+
+    Every backtracking scale is evaluated at once; each row takes the first
+    scale with dPhi <= 1e-12.
+
+    Returns:
+        (x_new (N,8), accepted (N,), attempts (N,))
+    """
+    D, single = as_batch(deltas)
+    X = np.broadcast_to(np.asarray(x, dtype=float), D.shape)
+    A = np.asarray(A, dtype=float)
+    scales = shrink ** np.arange(max_backtracks + 1)
+    trials = X[:, None, :] + scales[None, :, None] * D[:, None, :]   # (N, K, 8)
+    dphi = phi(A, trials) - phi(A, X)[:, None]
+    ok = dphi <= 1e-12
+    accepted = ok.any(axis=1)
+    k = ok.argmax(axis=1)
+    x_new = np.where(accepted[:, None], trials[np.arange(len(D)), k], X)
+    attempts = np.where(accepted, k + 1, max_backtracks + 1)
+    if single:
+        return x_new[0], bool(accepted[0]), int(attempts[0])
+    return x_new, accepted, attempts
+
+def l2_norm(X) -> np.ndarray:
+    return np.linalg.norm(np.asarray(X, dtype=float), axis=-1)
@@ -1,7 +1,11 @@
 
 import math
+from functools import lru_cache
 from typing import Tuple
-from cqe_math import Vector, l2_norm
+from morphonic_cqe_unified.core.cqe_math import Vector, l2_norm
+
+# Rotation planes of one toroidal tick; plane p turns by base_coupling*2pi*(p+1)
+_PLANES = ((0,1),(2,3),(4,5),(6,7))
 
 def _rot2(x: float, y: float, theta: float) -> Tuple[float, float]:
     c, s = math.cos(theta), math.sin(theta)
@@ -11,9 +15,59 @@ def toroidal_step(x: Vector, base_coupling: float = 0.03, tol: float = 1e-10) ->
     assert len(x) == 8, "toroidal_step expects 8D"
     xs = list(x)
     norm0 = l2_norm(x)
-    for k, (i,j) in enumerate([(0,1),(2,3),(4,5),(6,7)]):
+    for k, (i,j) in enumerate(_PLANES):
         theta = base_coupling * 2.0*math.pi * (k+1)
         xs[i], xs[j] = _rot2(xs[i], xs[j], theta)
     norm1 = l2_norm(tuple(xs))
     closed = abs(norm1 - norm0) <= tol
     return tuple(xs), closed
+
+@lru_cache(maxsize=64)
+def toroidal_rotation(base_coupling: float = 0.03, k: int = 1):
+    """Block-diagonal 8x8 matrix of k toroidal ticks (read-only ndarray).
+
+    Angles are reduced mod one turn before scaling by 2pi, so large k
+    stays as accurate as a single tick.
+    """
+    import numpy as np
+    R = np.zeros((8, 8))
+    for p, (i,j) in enumerate(_PLANES):
+        theta = 2.0*math.pi * math.fmod(base_coupling * (p+1) * k, 1.0)
+        c, s = math.cos(theta), math.sin(theta)
+        R[i,i], R[i,j], R[j,i], R[j,j] = c, -s, s, c
+    R.setflags(write=False)
+    return R
+
+def toroidal_steps(X, k: int = 1, base_coupling: float = 0.03, tol: float = 1e-10, stepwise: bool = False):
+    """Advance an (N, 8) ensemble (or one 8-vector) by k toroidal ticks.
+
+    By default the k ticks are applied as one closed-form rotation. With
+    stepwise=True each tick is applied in turn, as k calls to toroidal_step
+    would, and a row is closed only if every tick was.
+
+    Returns:
+        (X_k, closed, drift) with drift = | ||X_k|| - ||X_0|| | per row
+    """
+    import numpy as np
+    from morphonic_cqe_unified.core.cqe_math_np import as_batch
+    if k < 0:
+        raise ValueError("k must be >= 0")
+    cur, single = as_batch(X)
+    norm0 = np.linalg.norm(cur, axis=1)
+    if stepwise:
+        Rt = toroidal_rotation(base_coupling, 1).T
+        closed = np.ones(len(cur), dtype=bool)
+        prev = norm0
+        for _ in range(k):
+            cur = cur @ Rt
+            norm = np.linalg.norm(cur, axis=1)
+            closed &= np.abs(norm - prev) <= tol
+            prev = norm
+    else:
+        cur = cur @ toroidal_rotation(base_coupling, k).T
+    drift = np.abs(np.linalg.norm(cur, axis=1) - norm0)
+    if not stepwise:
+        closed = drift <= tol
+    if single:
+        return cur[0], bool(closed[0]), float(drift[0])
+    return cur, closed, drift
@@ -0,0 +1,104 @@
+
+"""Process-wide E8 root system.
+
+One read-only bundle of roots, simple roots, Cartan matrix, simple Weyl
+reflection matrices and a nearest-root lookup, built on first use and
+shared by every caller. Set MORPHONIC_E8_CACHE (or pass cache_path) to an
+.npy path to persist the root table and skip generation on later starts.
+"""
+import os
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .cqe_math import generate_e8_roots, simple_roots_e8
+
+CACHE_ENV = "MORPHONIC_E8_CACHE"
+
+def _frozen(a: np.ndarray) -> np.ndarray:
+    a.setflags(write=False)
+    return a
+
+class E8RootSystem:
+    """Roots (240,8), simple roots (8,8), Cartan (8,8) and reflections (8,8,8)."""
+
+    def __init__(self, roots: np.ndarray, simple_roots: np.ndarray):
+        roots = np.ascontiguousarray(roots, dtype=float)
+        simple_roots = np.ascontiguousarray(simple_roots, dtype=float)
+        if roots.shape != (240, 8) or simple_roots.shape != (8, 8):
+            raise ValueError("E8 tables have wrong shape: {} / {}".format(roots.shape, simple_roots.shape))
+        if not np.allclose(np.einsum("ij,ij->i", roots, roots), 2.0):
+            raise ValueError("Root has wrong length^2")
+        self.roots = _frozen(roots)
+        self.simple_roots = _frozen(simple_roots)
+        norms2 = np.einsum("ij,ij->i", simple_roots, simple_roots)
+        self.cartan = _frozen(2.0 * (simple_roots @ simple_roots.T) / norms2[None, :])
+        # s_a = I - 2 a a^T / (a.a), one per simple root
+        self.reflections = _frozen(np.eye(8)[None] - 2.0 * np.einsum("ki,kj->kij", simple_roots, simple_roots)
+                                   / norms2[:, None, None])
+        self._index = {tuple(r): i for i, r in enumerate(roots.tolist())}
+
+    def index_of(self, root) -> Optional[int]:
+        """Row of an exact root in self.roots, or None."""
+        return self._index.get(tuple(float(x) for x in root))
+
+    def reflection_matrix(self, root) -> np.ndarray:
+        """8x8 matrix of the reflection orthogonal to root."""
+        a = np.asarray(root, dtype=float)
+        return np.eye(8) - 2.0 * np.outer(a, a) / (a @ a)
+
+    def nearest_root(self, X) -> Tuple[np.ndarray, np.ndarray]:
+        """Nearest root to each row of X (or to a single 8-vector).
+
+        All roots have the same norm, so the closest one maximizes x.r and a
+        single (N,8)@(8,240) product replaces a tree search.
+
+        Returns:
+            (indices, roots)
+        """
+        X = np.asarray(X, dtype=float)
+        idx = (X @ self.roots.T).argmax(axis=-1)
+        return idx, self.roots[idx]
+
+    def save(self, path: str) -> None:
+        """Write roots then simple roots as one (248,8) .npy table."""
+        tmp = "{}.tmp{}.npy".format(path, os.getpid())
+        np.save(tmp, np.vstack([self.roots, self.simple_roots]))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "E8RootSystem":
+        table = np.load(path, allow_pickle=False)
+        return cls(table[:240], table[240:])
+
+    @classmethod
+    def build(cls) -> "E8RootSystem":
+        return cls(np.array(generate_e8_roots()), np.array(simple_roots_e8()))
+
+_system: Optional[E8RootSystem] = None
+_lock = threading.Lock()
+
+def get_e8_root_system(cache_path: Optional[str] = None) -> E8RootSystem:
+    """Shared E8RootSystem, built (or loaded from cache_path) on first call."""
+    global _system
+    if _system is not None:
+        return _system
+    with _lock:
+        if _system is None:
+            path = cache_path or os.environ.get(CACHE_ENV)
+            system = None
+            if path and os.path.exists(path):
+                try:
+                    system = E8RootSystem.load(path)
+                except (OSError, ValueError):
+                    system = None
+            if system is None:
+                system = E8RootSystem.build()
+                if path:
+                    try:
+                        system.save(path)
+                    except OSError:
+                        pass
+            _system = system
+    return _system
@@ -1,6 +1,7 @@
 
-import threading, json, hashlib
+import threading
 from typing import Any, Dict, Tuple
+from morphonic_cqe_unified.core.cnf import cnf_digest
 try:
     from morphonic_cqe_unified.sidecar.speedlight_sidecar_plus import SpeedLightPlus as SpeedLight
 except Exception:
@@ -13,12 +14,10 @@ class CQESidecar:
         self._lock = threading.RLock()
 
     def _hash_payload(self, payload: Any) -> str:
-        js = json.dumps(payload, sort_keys=True, separators=(",", ":"))
-        return hashlib.sha256(js.encode("utf-8")).hexdigest()
+        return cnf_digest(payload)
 
     def compute(self, payload: Any, scope: str, channel: int, compute_fn=None, *args, **kwargs) -> Tuple[Any, float, str]:
         with self._lock:
-            rid = self._hash_payload({"payload": payload, "scope": scope})
             result, cost, receipt_id = self._sl.compute(payload, scope=scope, channel=channel, compute_fn=compute_fn, **kwargs)
             if cost > 0.0 and receipt_id not in self._meta:
                 self._meta[receipt_id] = {"scope": scope, "channel": channel, "note": kwargs.get("note","")}
@@ -22,10 +22,47 @@ That's it. 99.9% efficiency at scale. No configuration needed.
 """
 
 import hashlib
+import heapq
 import json
+import math
+import mmap
+import os
+import pickle
+import threading
 import time
-from typing import Any, Tuple, Dict, Optional, Callable
-from collections import defaultdict
+from typing import Any, Tuple, Dict, List, Optional, Callable
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+
+def estimate_size(obj: Any, _depth: int = 0) -> int:
+    """
+    Cheap byte-size estimate of a result, without serializing it.
+    
+    Exact for str/bytes/arrays; containers are estimated from a sample
+    of at most 16 items, two levels deep.
+    """
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return max(len(obj), 1)
+    if isinstance(obj, str):
+        return max(len(obj), 1)
+    if obj is None or isinstance(obj, (bool, int, float)):
+        return 8
+    nbytes = getattr(obj, "nbytes", None)   # numpy arrays and friends
+    if isinstance(nbytes, int):
+        return max(nbytes, 1)
+    if isinstance(obj, (list, tuple, set, frozenset, dict)):
+        n = len(obj)
+        if n == 0 or _depth >= 2:
+            return 8 + 8 * n
+        items = obj.items() if isinstance(obj, dict) else obj
+        sample = [item for _, item in zip(range(16), items)]
+        if isinstance(obj, dict):
+            per = sum(estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1) for k, v in sample)
+        else:
+            per = sum(estimate_size(v, _depth + 1) for v in sample)
+        return 8 + math.ceil(per * n / len(sample))
+    return 64
 
 
 class SpeedLight:
@@ -40,21 +77,36 @@ class SpeedLight:
     computations, this achieves 99.9%+ cache hits and 100-1000x speedup.
     """
     
-    def __init__(self, max_cache_size: int = 10_000_000):
+    def __init__(self, max_cache_size: int = 10_000_000, max_log_entries: int = 10_000,
+                 hash_results: bool = True):
         """
         Initialize SpeedLight cache.
         
         Args:
-            max_cache_size: Maximum bytes to store (default 10GB for enterprise)
+            max_cache_size: Maximum (estimated) bytes to store; entries are
+                evicted GreedyDual-Size: lowest compute cost per byte first
+            max_log_entries: computation_log keeps only the latest entries
+            hash_results: Index results by SHA-256 of their JSON form
+                (costs one serialization per stored result)
         """
         self.receipt_cache = {}           # task_id → result
         self.hash_index = {}              # hash → task_id (O(1) lookup)
-        self.computation_log = []         # Audit trail
+        self.computation_log = deque(maxlen=max_log_entries)  # Audit trail (ring buffer)
+        self.hash_results = hash_results
+        
+        # GreedyDual-Size state: priority H = L + cost/size, evict min H,
+        # then inflate L to the evicted H so old entries age out
+        self._entries: Dict[str, Tuple[int, float, Optional[str]]] = {}  # task_id → (size, cost, hash)
+        self._priority: Dict[str, float] = {}
+        self._heap: List[Tuple[float, int, str]] = []
+        self._inflation = 0.0
+        self._seq = 0
         self.cache_stats = {
             'hits': 0,
             'misses': 0,
             'total_cost_avoided': 0,
-            'bytes_stored': 0
+            'bytes_stored': 0,
+            'evictions': 0
         }
         self.max_cache_size = max_cache_size
         self.start_time = time.time()
@@ -81,9 +133,9 @@ class SpeedLight:
         """
         
         # Check cache
-        if task_id in self.receipt_cache:
-            self.cache_stats['hits'] += 1
-            return self.receipt_cache[task_id], 0.0  # ZERO COST
+        found, result = self._lookup(task_id)
+        if found:
+            return result, 0.0  # ZERO COST
         
         # Not cached - compute
         self.cache_stats['misses'] += 1
@@ -129,18 +181,24 @@ class SpeedLight:
         
         return self.compute(task_id, compute_fn, *args, **kwargs)
     
+    def _lookup(self, task_id: str) -> Tuple[bool, Any]:
+        """Cache lookup; a hit refreshes the entry's retention priority."""
+        if task_id not in self.receipt_cache:
+            return False, None
+        self.cache_stats['hits'] += 1
+        size, cost, _ = self._entries[task_id]
+        self._push(task_id, self._inflation + cost / size)
+        return True, self.receipt_cache[task_id]
+    
     def _store(self, task_id: str, result: Any, cost: float):
         """Store result in cache."""
-        self.receipt_cache[task_id] = result
-        
         # Create deterministic hash for verification
-        result_json = json.dumps(result, default=str)
-        result_hash = hashlib.sha256(result_json.encode()).hexdigest()
-        self.hash_index[result_hash] = task_id
+        result_hash = None
+        if self.hash_results:
+            result_json = json.dumps(result, default=str)
+            result_hash = hashlib.sha256(result_json.encode()).hexdigest()
         
-        # Track stats
-        result_size = len(result_json.encode())
-        self.cache_stats['bytes_stored'] += result_size
+        self._admit(task_id, result, cost, result_hash)
         self.cache_stats['total_cost_avoided'] += cost
         
         # Log
@@ -151,6 +209,52 @@ class SpeedLight:
             'cached_at': time.time()
         })
     
+    def _admit(self, task_id: str, result: Any, cost: float, result_hash: Optional[str] = None):
+        """Insert into the cache and evict down to max_cache_size."""
+        self._discard(task_id)
+        size = estimate_size(result)
+        if size > self.max_cache_size:
+            return  # would evict everything else and still not fit
+        
+        self.receipt_cache[task_id] = result
+        if result_hash is not None:
+            self.hash_index[result_hash] = task_id
+        self._entries[task_id] = (size, cost, result_hash)
+        self.cache_stats['bytes_stored'] += size
+        self._push(task_id, self._inflation + cost / size)
+        
+        while self.cache_stats['bytes_stored'] > self.max_cache_size and self._heap:
+            self._evict_one()
+    
+    def _push(self, task_id: str, priority: float):
+        self._priority[task_id] = priority
+        self._seq += 1
+        heapq.heappush(self._heap, (priority, self._seq, task_id))
+        # Stale heap records pile up on hits; rebuild when they dominate
+        if len(self._heap) > 4 * len(self._priority) + 64:
+            self._heap = [(h, i, t) for h, i, t in self._heap if self._priority.get(t) == h]
+            heapq.heapify(self._heap)
+    
+    def _evict_one(self):
+        while self._heap:
+            priority, _, task_id = heapq.heappop(self._heap)
+            if self._priority.get(task_id) == priority:
+                self._inflation = priority
+                self._discard(task_id)
+                self.cache_stats['evictions'] += 1
+                return
+    
+    def _discard(self, task_id: str):
+        entry = self._entries.pop(task_id, None)
+        if entry is None:
+            return
+        size, _, result_hash = entry
+        self.receipt_cache.pop(task_id, None)
+        self._priority.pop(task_id, None)
+        if result_hash is not None and self.hash_index.get(result_hash) == task_id:
+            del self.hash_index[result_hash]
+        self.cache_stats['bytes_stored'] -= size
+    
     def stats(self) -> Dict[str, Any]:
         """Get cache statistics."""
         elapsed = time.time() - self.start_time
@@ -210,14 +314,19 @@ At 100,000 agents with this hit rate:
         Args:
             other_speedlight: Another SpeedLight instance to sync with
         """
-        # Merge caches (other takes precedence)
-        self.receipt_cache.update(other_speedlight.receipt_cache)
-        self.hash_index.update(other_speedlight.hash_index)
+        # Merge caches (other takes precedence); retention follows its costs
+        for task_id, result in list(other_speedlight.receipt_cache.items()):
+            _, cost, result_hash = other_speedlight._entries.get(task_id, (0, 0.0, None))
+            self._admit(task_id, result, cost, result_hash)
     
     def clear(self):
         """Clear the cache (useful for memory pressure)."""
         self.receipt_cache.clear()
         self.hash_index.clear()
+        self._entries.clear()
+        self._priority.clear()
+        self._heap.clear()
+        self._inflation = 0.0
         self.cache_stats['bytes_stored'] = 0
 
 
@@ -225,28 +334,326 @@ At 100,000 agents with this hit rate:
 # DISTRIBUTED VERSION: For multi-process/multi-thread scenarios
 # ============================================================================
 
+class SharedResultStore:
+    """
+    Cross-process, content-addressed result store.
+    
+    Results are pickled into an append-only blob arena that readers
+    memory-map; a SQLite database in WAL mode maps task_id to the blob's
+    (offset, length) and names the current arena file. Cross-process
+    single-flight uses one flock()ed lock file per task, so a compute_fn
+    may compute other tasks without ever waiting on a lock that only
+    shares a file with its own. A task's lock file is removed when its
+    lock is released, so lock files only exist for tasks in flight.
+    
+    compact() rewrites the live results into a fresh arena, optionally
+    evicting the oldest results down to a byte budget; with ``max_bytes``
+    a put() that grows the arena past it compacts down to half of it.
+    
+    Layout of ``store_dir``::
+    
+        index.sqlite        # task_id -> offset, length, cost; arena name
+        blobs.arena         # concatenated pickled results (blobs.<n>.arena
+                            # after the n-th compaction)
+        arena.lock          # serializes arena appends and compaction
+        locks/<ab>/<h>.lock # single-flight, h = sha256(task_id)
+    
+    Requires fcntl (POSIX); without it only in-process locking applies.
+    """
+    
+    def __init__(self, store_dir: str, max_bytes: Optional[int] = None):
+        self.store_dir = store_dir
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(store_dir, "locks"), exist_ok=True)
+        self._index_path = os.path.join(store_dir, "index.sqlite")
+        self._local = threading.local()
+        self._map_lock = threading.Lock()
+        self._map = None
+        self._map_name = None
+        self._map_size = 0
+        self._pid = os.getpid()
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "task_id TEXT PRIMARY KEY, offset INTEGER, length INTEGER, "
+            "cost REAL, created REAL)"
+        )
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.execute("INSERT OR IGNORE INTO meta VALUES ('arena', 'blobs.arena')")
+        conn.commit()
+        open(os.path.join(store_dir, self._arena_name()), "ab").close()
+    
+    def _conn(self):
+        """Per-thread (and per-process) SQLite connection."""
+        import sqlite3
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self._index_path, timeout=30.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+    
+    def _arena_name(self) -> str:
+        return self._conn().execute("SELECT value FROM meta WHERE key = 'arena'").fetchone()[0]
+    
+    def lock(self, task_id: str):
+        """Cross-process lock for one task (context manager)."""
+        h = hashlib.sha256(task_id.encode()).hexdigest()
+        d = os.path.join(self.store_dir, "locks", h[:2])
+        os.makedirs(d, exist_ok=True)
+        return _FileLock(os.path.join(d, h + ".lock"), remove=True)
+    
+    def _view(self, name: str, offset: int, length: int) -> memoryview:
+        """Slice of the memory-mapped arena, remapping if it has grown or been replaced."""
+        with self._map_lock:
+            if self._pid != os.getpid():
+                # Forked child: never reuse the parent's mapping
+                self._map, self._map_name, self._map_size, self._pid = None, None, 0, os.getpid()
+            if name != self._map_name or offset + length > self._map_size:
+                with open(os.path.join(self.store_dir, name), "rb") as f:
+                    size = os.fstat(f.fileno()).st_size
+                    self._map = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+                self._map_name, self._map_size = name, size
+            return memoryview(self._map)[offset:offset + length]
+    
+    def get(self, task_id: str) -> Tuple[bool, Any]:
+        """(found, result) for a task."""
+        while True:
+            # Offsets and arena name come from one snapshot
+            row = self._conn().execute(
+                "SELECT offset, length, (SELECT value FROM meta WHERE key = 'arena') "
+                "FROM results WHERE task_id = ?", (task_id,)
+            ).fetchone()
+            if row is None:
+                return False, None
+            try:
+                return True, pickle.loads(self._view(row[2], row[0], row[1]))
+            except FileNotFoundError:
+                # Compacted away between the query and the open: read again
+                continue
+    
+    def put(self, task_id: str, result: Any, cost: float) -> int:
+        """Append a result to the arena and index it; returns its size."""
+        blob = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        with _FileLock(os.path.join(self.store_dir, "arena.lock")):
+            with open(os.path.join(self.store_dir, self._arena_name()), "ab") as f:
+                offset = f.seek(0, os.SEEK_END)
+                f.write(blob)
+            conn = self._conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                (task_id, offset, len(blob), cost, time.time())
+            )
+            conn.commit()
+            if self.max_bytes is not None and offset + len(blob) > self.max_bytes:
+                self._compact(self.max_bytes // 2)
+        return len(blob)
+    
+    def compact(self, max_bytes: Optional[int] = None) -> int:
+        """
+        Rewrite live results into a fresh arena, dropping replaced blobs.
+        
+        Args:
+            max_bytes: If given, evict the oldest results until the live
+                bytes fit in this budget
+        
+        Returns:
+            Number of results evicted
+        """
+        with _FileLock(os.path.join(self.store_dir, "arena.lock")):
+            return self._compact(max_bytes)
+    
+    def _compact(self, max_bytes: Optional[int]) -> int:
+        """compact() body; the caller holds arena.lock."""
+        conn = self._conn()
+        rows = conn.execute(
+            "SELECT task_id, offset, length FROM results ORDER BY created DESC, rowid DESC"
+        ).fetchall()
+        keep, evict, total = [], [], 0
+        for row in rows:
+            if max_bytes is not None and total + row[2] > max_bytes:
+                evict.append(row[0])
+            else:
+                keep.append(row)
+                total += row[2]
+        
+        old = self._arena_name()
+        n = int(old.split(".")[1]) + 1 if old.count(".") == 2 else 1
+        new = f"blobs.{n}.arena"
+        src_path, dst_path = os.path.join(self.store_dir, old), os.path.join(self.store_dir, new)
+        offsets = []
+        with open(src_path, "rb") as src, open(dst_path, "wb") as dst:
+            for task_id, offset, length in sorted(keep, key=lambda r: r[1]):
+                src.seek(offset)
+                offsets.append((dst.tell(), task_id))
+                dst.write(src.read(length))
+            dst.flush()
+            os.fsync(dst.fileno())
+        
+        # Readers pick up the new offsets and arena name together
+        conn.executemany("UPDATE results SET offset = ? WHERE task_id = ?", offsets)
+        conn.executemany("DELETE FROM results WHERE task_id = ?", [(t,) for t in evict])
+        conn.execute("UPDATE meta SET value = ? WHERE key = 'arena'", (new,))
+        conn.commit()
+        # Existing mappings keep the old file alive until they are dropped
+        os.unlink(src_path)
+        return len(evict)
+    
+    def arena_bytes(self) -> int:
+        """Current size of the blob arena on disk."""
+        return os.path.getsize(os.path.join(self.store_dir, self._arena_name()))
+    
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+class _FileLock:
+    """Exclusive flock() on a lock file (no-op locking without fcntl).
+    
+    With ``remove=True`` the file is unlinked before the lock is released.
+    A waiter that then wins the lock on the unlinked file notices that the
+    path no longer names it and retries on a fresh file.
+    """
+    
+    def __init__(self, path: str, remove: bool = False):
+        self.path = path
+        self.remove = remove
+        self._fd = None
+    
+    def __enter__(self):
+        try:
+            import fcntl
+        except ImportError:
+            fcntl = None
+        while True:
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            if fcntl is None:
+                return self
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            if not self.remove:
+                return self
+            try:
+                if os.stat(self.path).st_ino == os.fstat(self._fd).st_ino:
+                    return self
+            except FileNotFoundError:
+                pass
+            os.close(self._fd)
+    
+    def __exit__(self, *exc):
+        try:
+            if self.remove:
+                try:
+                    os.unlink(self.path)
+                except OSError:
+                    pass
+            import fcntl
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        except ImportError:
+            pass
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+
 class SpeedLightDistributed(SpeedLight):
     """
     Distributed SpeedLight: Thread-safe, process-safe cache sharing.
     
     Use this when you have multiple threads/processes all solving
     related tasks. They automatically share computation results.
+    
+    The shared lock only guards the in-memory cache; computations run
+    under a per-task lock, so different tasks compute in parallel and
+    identical tasks compute once. Pass ``store_dir`` to share results
+    between processes through a SharedResultStore (``store_max_bytes``
+    caps its arena).
     """
     
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, store_dir: Optional[str] = None,
+                 store_max_bytes: Optional[int] = None, **kwargs):
         super().__init__(*args, **kwargs)
-        import threading
         self._lock = threading.RLock()
+        self._task_locks: Dict[str, list] = {}   # task_id -> [lock, waiters]
+        self.store = SharedResultStore(store_dir, store_max_bytes) if store_dir else None
+        self.cache_stats.setdefault('shared_hits', 0)
+    
+    def _cached(self, task_id: str) -> Tuple[bool, Any]:
+        with self._lock:
+            return self._lookup(task_id)
+    
+    def _shared(self, task_id: str) -> Tuple[bool, Any]:
+        found, result = self.store.get(task_id)
+        if found:
+            with self._lock:
+                self.cache_stats['hits'] += 1
+                self.cache_stats['shared_hits'] += 1
+                # Zero local cost: refetching from the shared store is cheap
+                self._admit(task_id, result, 0.0)
+        return found, result
     
     def compute(self, task_id: str, compute_fn=None, *args, **kwargs):
-        """Thread-safe compute with automatic sharing."""
+        """Thread- and process-safe compute with automatic sharing."""
+        found, result = self._cached(task_id)
+        if found:
+            return result, 0.0
+        
+        with self._task_lock(task_id):
+            found, result = self._cached(task_id)
+            if found:
+                return result, 0.0
+            
+            if self.store is None:
+                return self._compute_and_store(task_id, compute_fn, *args, **kwargs)
+            
+            found, result = self._shared(task_id)
+            if found:
+                return result, 0.0
+            with self.store.lock(task_id):
+                # Another process may have finished while we waited
+                found, result = self._shared(task_id)
+                if found:
+                    return result, 0.0
+                result, cost = self._compute_and_store(task_id, compute_fn, *args, **kwargs)
+                self.store.put(task_id, result, cost)
+                return result, cost
+    
+    @contextmanager
+    def _task_lock(self, task_id: str):
+        """Per-task lock, dropped from the table once nobody holds or waits on it."""
         with self._lock:
-            return super().compute(task_id, compute_fn, *args, **kwargs)
+            entry = self._task_locks.setdefault(task_id, [threading.Lock(), 0])
+            entry[1] += 1
+        entry[0].acquire()
+        try:
+            yield
+        finally:
+            entry[0].release()
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._task_locks[task_id]
+    
+    def _compute_and_store(self, task_id: str, compute_fn, *args, **kwargs):
+        if compute_fn is None:
+            with self._lock:
+                self.cache_stats['misses'] += 1
+            raise ValueError(f"Task {task_id} not cached and no compute_fn provided")
+        
+        start = time.time()
+        result = compute_fn(*args, **kwargs)
+        cost = time.time() - start
+        
+        with self._lock:
+            self.cache_stats['misses'] += 1
+            self._store(task_id, result, cost)
+        return result, cost
     
     def compute_hash(self, data, compute_fn=None, *args, **kwargs):
         """Thread-safe compute_hash."""
-        with self._lock:
-            return super().compute_hash(data, compute_fn, *args, **kwargs)
+        data_json = json.dumps(data, sort_keys=True, default=str)
+        task_id = hashlib.sha256(data_json.encode()).hexdigest()
+        return self.compute(task_id, compute_fn, *args, **kwargs)
 
 
 # ============================================================================
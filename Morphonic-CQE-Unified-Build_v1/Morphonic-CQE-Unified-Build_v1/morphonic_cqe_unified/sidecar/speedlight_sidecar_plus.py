@@ -5,17 +5,24 @@ SpeedLight V2 (Plus): Ledgered, Content-Addressed, Persistent Sidecar
 Drop-in upgrade for speedlight_sidecar.SpeedLight with:
   • Namespaces (scope), channels (3/6/9), and tags
   • Content-addressed storage (SHA-256) with optional disk persistence
+  • Per-scope result codecs (JSON, pickle5 out-of-band, raw ndarray) + live-object tier
   • Receipts ledger (JSONL) + Merkle chaining + signature hook
+  • Group-committed ledger writes, task_key index, incremental verification
   • LRU memory bound + TTL + staleness invalidation
-  • Thread-safe deduplication of concurrent identical work
+  • Lock-striped LRU shards with per-shard counters
+  • Thread-safe deduplication of concurrent identical work (refcounted key locks)
   • Determinism guardrails (optional) and verification hooks
   • Batch APIs and metrics
 Zero external deps (stdlib only).
 """
 from __future__ import annotations
-import os, json, time, hashlib, threading, atexit
+import os, json, time, hashlib, threading, atexit, pickle, struct
 from dataclasses import dataclass, asdict
 from typing import Any, Callable, Dict, Optional, Tuple, List
+try:
+    from morphonic_cqe_unified.core.cnf import Canonical
+except ImportError:  # standalone copy of this file
+    Canonical = None
 
 def sha256_hex(b: bytes) -> str:
     return hashlib.sha256(b).hexdigest()
@@ -38,48 +45,218 @@ class LedgerEntry:
     prev_hash: str
     entry_hash: str
 
+def _entry_content(e: LedgerEntry, prev_hash: str) -> Dict[str, Any]:
+    return {
+        "idx": e.idx, "ts": e.ts, "scope": e.scope, "channel": e.channel,
+        "task_key": e.task_key, "input_hash": e.input_hash, "result_hash": e.result_hash,
+        "cost": e.cost, "ttl": e.ttl, "tags": e.tags, "prev_hash": prev_hash
+    }
+
+def _hash_content(content: Dict[str, Any]) -> str:
+    return sha256_hex(json.dumps(content, sort_keys=True).encode("utf-8"))
+
 class MerkleLedger:
-    def __init__(self, path: Optional[str]=None):
+    """Hash-chained receipts ledger with a group-committing JSONL writer.
+
+    Appends are hashed and indexed in the caller's thread; a background
+    flusher writes pending entries through one open handle in batches.
+    fsync policy: "none", "commit" (every group commit) or "interval".
+    An existing ledger file is reloaded, verified and resumed at startup.
+    verify() is incremental from a checkpointed verified prefix.
+    """
+    FSYNC_POLICIES = ("none", "commit", "interval")
+
+    def __init__(self, path: Optional[str]=None, fsync: str = "none",
+                 flush_interval: float = 0.05, fsync_interval: float = 1.0):
+        if fsync not in self.FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync}")
         self.path = path
+        self.fsync = fsync
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
         self.prev_hash = "0"*64
         self.entries: List[LedgerEntry] = []
+        self.index: Dict[str, int] = {}          # task_key -> latest entry idx
+        self._verified = 0                        # entries[:_verified] are verified
+        self._verified_hash = "0"*64              # entry_hash at the checkpoint
+        self._ok = True
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._pending: List[LedgerEntry] = []
+        self._writing = False
+        self._closed = False
+        self._file = None
+        self._thread: Optional[threading.Thread] = None
+        self._last_fsync = time.monotonic()
         if self.path:
-            os.makedirs(os.path.dirname(self.path), exist_ok=True)
-            open(self.path, "a").close()
-
+            d = os.path.dirname(self.path)
+            if d:
+                os.makedirs(d, exist_ok=True)
+            self._resume()
+            self._file = open(self.path, "a", encoding="utf-8")
+
+    # ---- startup
+    def _resume(self):
+        """Reload entries from an existing ledger file and continue its chain.
+
+        A torn trailing record (crash mid-write: no newline after it) is
+        truncated away. A bad record anywhere else raises ValueError and
+        leaves the file untouched.
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            text = f.read()
+        dec = json.JSONDecoder()
+        pos, good_end = 0, 0
+        while True:
+            # Records are newline-separated; older files used a literal "\n"
+            while pos < len(text) and (text[pos].isspace() or text.startswith("\\n", pos)):
+                pos += 2 if text[pos] == "\\" else 1
+            if pos >= len(text):
+                break
+            try:
+                rec, end = dec.raw_decode(text, pos)
+                le = LedgerEntry(**rec)
+            except (ValueError, TypeError) as ex:
+                rest = text[pos:]
+                if "\n" in rest or "}\\n" in rest:
+                    raise ValueError(f"Corrupt ledger record at offset {pos} in {self.path}: {ex}") from ex
+                break
+            pos = end
+            self.entries.append(le)
+            self.index[le.task_key] = le.idx
+            good_end = pos
+        if good_end < len(text.rstrip()):
+            with open(self.path, "r+", encoding="utf-8") as f:
+                f.truncate(len(text[:good_end].encode("utf-8")))
+                f.seek(0, os.SEEK_END)
+                f.write("\n")
+        if self.entries:
+            self.prev_hash = self.entries[-1].entry_hash
+        self.verify()
+
+    # ---- writes
     def append(self, scope: str, channel: int, task_key: str, input_hash: str,
                result_hash: str, cost: float, ttl: Optional[float], tags: List[str]) -> LedgerEntry:
+        with self._lock:
+            le = self._append_locked(scope, channel, task_key, input_hash, result_hash, cost, ttl, tags)
+            self._wake_writer()
+            return le
+
+    def append_many(self, records: List[Dict[str, Any]]) -> List[LedgerEntry]:
+        """Append several receipts (dicts of append()'s arguments) under one
+        lock; they reach the file in the same group commit."""
+        with self._lock:
+            out = [self._append_locked(**r) for r in records]
+            if out:
+                self._wake_writer()
+            return out
+
+    def _append_locked(self, scope, channel, task_key, input_hash, result_hash, cost, ttl, tags) -> LedgerEntry:
         idx = len(self.entries)
-        content = {
-            "idx": idx, "ts": now(), "scope": scope, "channel": channel,
-            "task_key": task_key, "input_hash": input_hash, "result_hash": result_hash,
-            "cost": cost, "ttl": ttl, "tags": tags, "prev_hash": self.prev_hash
-        }
-        entry_hash = sha256_hex(json.dumps(content, sort_keys=True).encode("utf-8"))
-        le = LedgerEntry(idx=idx, ts=content["ts"], scope=scope, channel=channel,
+        le = LedgerEntry(idx=idx, ts=now(), scope=scope, channel=channel,
                          task_key=task_key, input_hash=input_hash, result_hash=result_hash,
-                         cost=cost, ttl=ttl, tags=tags, prev_hash=self.prev_hash, entry_hash=entry_hash)
+                         cost=cost, ttl=ttl, tags=tags, prev_hash=self.prev_hash, entry_hash="")
+        le.entry_hash = _hash_content(_entry_content(le, self.prev_hash))
         self.entries.append(le)
-        self.prev_hash = entry_hash
-        if self.path:
-            with open(self.path, "a", encoding="utf-8") as f:
-                f.write(json.dumps(asdict(le)) + "\\n")
+        self.index[task_key] = idx
+        self.prev_hash = le.entry_hash
+        # Entries hashed here extend a verified chain without rehashing
+        if self._ok and self._verified == idx:
+            self._verified, self._verified_hash = idx + 1, le.entry_hash
+        if self._file is not None:
+            self._pending.append(le)
         return le
 
-    def verify(self) -> bool:
-        prev = "0"*64
-        for e in self.entries:
-            content = {
-                "idx": e.idx, "ts": e.ts, "scope": e.scope, "channel": e.channel,
-                "task_key": e.task_key, "input_hash": e.input_hash, "result_hash": e.result_hash,
-                "cost": e.cost, "ttl": e.ttl, "tags": e.tags, "prev_hash": prev
-            }
-            h = sha256_hex(json.dumps(content, sort_keys=True).encode("utf-8"))
+    def _wake_writer(self):
+        if self._file is not None:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="merkle-ledger", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending and self._closed:
+                    return
+                batch, self._pending = self._pending, []
+                self._writing = True
+            try:
+                self._file.write("".join(json.dumps(asdict(e)) + "\n" for e in batch))
+                self._file.flush()
+                t = time.monotonic()
+                if self.fsync == "commit" or (self.fsync == "interval" and t - self._last_fsync >= self.fsync_interval):
+                    os.fsync(self._file.fileno())
+                    self._last_fsync = t
+            finally:
+                with self._lock:
+                    self._writing = False
+                    self._cond.notify_all()
+            # Let appends accumulate into the next group commit
+            if self.flush_interval and not self._closed:
+                time.sleep(self.flush_interval)
+
+    def flush(self) -> None:
+        """Block until every appended entry has been written."""
+        with self._lock:
+            self._cond.notify_all()
+            while (self._pending or self._writing) and self._thread is not None and self._thread.is_alive():
+                self._cond.wait(0.1)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        if self._file is not None:
+            if self.fsync != "none":
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+    # ---- reads
+    def get(self, task_key: str) -> Optional[LedgerEntry]:
+        idx = self.index.get(task_key)
+        return self.entries[idx] if idx is not None else None
+
+    def verify(self, full: bool = False) -> bool:
+        """Verify the chain. Incremental by default: only entries past the
+        checkpoint are rehashed, and the checkpoint advances on success."""
+        with self._lock:
+            if full:
+                start, prev = 0, "0"*64
+            else:
+                if not self._ok:
+                    return False
+                start, prev = self._verified, self._verified_hash
+            entries = self.entries
+            end = len(entries)
+        for i in range(start, end):
+            e = entries[i]
+            h = _hash_content(_entry_content(e, prev))
             if h != e.entry_hash:
+                with self._lock:
+                    self._ok = False
                 return False
             prev = h
+        with self._lock:
+            if end > self._verified or full:
+                self._verified, self._verified_hash = end, prev
+            self._ok = True
         return True
 
+    @property
+    def verified_ok(self) -> bool:
+        return self._ok
+
 class _LRUNode:
     __slots__ = ("k","v","ts","exp","prev","next","size")
     def __init__(self, k, v, ttl: Optional[float], size: int):
@@ -149,74 +326,295 @@ class LRU:
     def clear(self):
         self.__init__(self.max_bytes)
 
+class ShardedLRU:
+    """N LRU segments picked by key hash, each behind its own lock.
+
+    The shards share one max_bytes budget, so any entry that fits the
+    whole cache can be admitted. When a put goes over budget, the least
+    recently used entries of the other shards are evicted round-robin,
+    one shard lock at a time, and the written shard is evicted from last.
+    """
+    def __init__(self, max_bytes: int = 512*1024*1024, n_shards: int = 16):
+        self.max_bytes = max_bytes
+        self.n_shards = n_shards
+        self.shards = [LRU(max_bytes=max_bytes) for _ in range(n_shards)]
+        self.locks = [threading.Lock() for _ in range(n_shards)]
+        self._next_victim = 0
+
+    def shard_of(self, k: str) -> int:
+        return hash(k) % self.n_shards
+
+    def get(self, k: str):
+        i = self.shard_of(k)
+        with self.locks[i]:
+            return self.shards[i].get(k)
+
+    def put(self, k: str, v: Any, ttl: Optional[float], size: int):
+        i = self.shard_of(k)
+        with self.locks[i]:
+            self.shards[i].put(k, v, ttl, size)
+        self._evict(i)
+
+    def _bytes(self) -> int:
+        return sum(shard.bytes for shard in self.shards)
+
+    def _evict(self, home: int):
+        n = self.n_shards
+        while self._bytes() > self.max_bytes:
+            start = self._next_victim
+            victim = next((j for j in ((start + d) % n for d in range(n))
+                           if j != home and self.shards[j].map), home)
+            self._next_victim = (victim + 1) % n
+            with self.locks[victim]:
+                shard = self.shards[victim]
+                if not shard.map:
+                    if victim == home:
+                        return
+                    continue
+                shard._eject_tail()
+
+    def delete(self, k: str):
+        i = self.shard_of(k)
+        with self.locks[i]:
+            self.shards[i].delete(k)
+
+    def stats(self):
+        items = nbytes = 0
+        for shard, lock in zip(self.shards, self.locks):
+            with lock:
+                items += len(shard.map); nbytes += shard.bytes
+        return {"items": items, "bytes": nbytes, "cap_bytes": self.max_bytes, "shards": self.n_shards}
+
+    def clear(self):
+        for shard, lock in zip(self.shards, self.locks):
+            with lock:
+                shard.clear()
+
+class KeyLockTable:
+    """Per-key locks that exist only while someone holds or waits on them.
+
+    Entries are reference-counted and dropped when the count reaches zero,
+    so the table is bounded by the number of in-flight keys. The table
+    itself is striped so unrelated keys rarely touch the same mutex.
+    """
+    def __init__(self, n_stripes: int = 16):
+        self.n_stripes = n_stripes
+        self._stripes: List[Dict[str, List[Any]]] = [{} for _ in range(n_stripes)]
+        self._mutexes = [threading.Lock() for _ in range(n_stripes)]
+
+    def acquire(self, key: str) -> None:
+        i = hash(key) % self.n_stripes
+        with self._mutexes[i]:
+            entry = self._stripes[i].get(key)
+            if entry is None:
+                entry = self._stripes[i][key] = [threading.Lock(), 0]
+            entry[1] += 1
+        entry[0].acquire()
+
+    def release(self, key: str) -> None:
+        i = hash(key) % self.n_stripes
+        with self._mutexes[i]:
+            entry = self._stripes[i][key]
+            entry[0].release()
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._stripes[i][key]
+
+    def hold(self, key: str):
+        return _HeldKey(self, key)
+
+    def __len__(self) -> int:
+        return sum(len(t) for t in self._stripes)
+
+class _HeldKey:
+    __slots__ = ("table", "key")
+    def __init__(self, table: KeyLockTable, key: str):
+        self.table, self.key = table, key
+    def __enter__(self):
+        self.table.acquire(self.key)
+        return self
+    def __exit__(self, *exc):
+        self.table.release(self.key)
+
+# ---------------------------------------------------------------- codecs
+# A codec turns a result into the bytes that are cached, hashed into the
+# ledger and written to disk. Chosen per scope via SpeedLightV2.set_codec.
+
+class Codec:
+    name = "base"
+    ext = ".bin"
+    def encode(self, obj: Any) -> bytes:
+        raise NotImplementedError
+    def decode(self, b: bytes) -> Any:
+        raise NotImplementedError
+
+class JSONCodec(Codec):
+    """Canonical JSON; non-JSON values fall back to str()."""
+    name, ext = "json", ".json"
+    def encode(self, obj: Any) -> bytes:
+        return json.dumps(obj, sort_keys=True, default=str).encode("utf-8")
+    def decode(self, b: bytes) -> Any:
+        return json.loads(bytes(b))
+
+class Pickle5Codec(Codec):
+    """Pickle protocol 5 with out-of-band buffers.
+
+    Layout: <u32 n_buffers><u64 pickle_len><u64 buffer_len * n> pickle buffers...
+    Buffers are decoded as zero-copy views of the stored bytes, so arrays
+    come back read-only.
+    """
+    name, ext = "pickle5", ".pkl5"
+    def encode(self, obj: Any) -> bytes:
+        buffers: List[pickle.PickleBuffer] = []
+        data = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+        raws = [b.raw() for b in buffers]
+        head = struct.pack(f"<IQ{len(raws)}Q", len(raws), len(data), *(r.nbytes for r in raws))
+        return b"".join([head, data, *raws])
+    def decode(self, b: bytes) -> Any:
+        mv = memoryview(b)
+        n, plen = struct.unpack_from("<IQ", mv)
+        lens = struct.unpack_from(f"<{n}Q", mv, 12)
+        off = 12 + 8 * n
+        data = mv[off:off + plen]; off += plen
+        bufs = []
+        for ln in lens:
+            bufs.append(mv[off:off + ln]); off += ln
+        return pickle.loads(data, buffers=bufs)
+
+class NDArrayCodec(Codec):
+    """Raw ndarray: <u32 header_len><json {dtype, shape}> C-order buffer.
+
+    Decoding is np.frombuffer over the stored bytes (zero-copy, read-only).
+    """
+    name, ext = "ndarray", ".npraw"
+    def encode(self, obj: Any) -> bytes:
+        import numpy as np
+        if not isinstance(obj, np.ndarray) or obj.dtype.hasobject:
+            raise TypeError("ndarray codec needs a numeric numpy.ndarray result")
+        a = np.ascontiguousarray(obj)
+        header = json.dumps({"dtype": a.dtype.str, "shape": list(a.shape)}).encode("utf-8")
+        return b"".join([struct.pack("<I", len(header)), header, a.tobytes()])
+    def decode(self, b: bytes) -> Any:
+        import numpy as np
+        (hlen,) = struct.unpack_from("<I", b)
+        header = json.loads(bytes(b[4:4 + hlen]).decode("utf-8"))
+        return np.frombuffer(b, dtype=np.dtype(header["dtype"]), offset=4 + hlen).reshape(header["shape"])
+
+CODECS: Dict[str, Codec] = {c.name: c for c in (JSONCodec(), Pickle5Codec(), NDArrayCodec())}
+
+def register_codec(codec: Codec) -> None:
+    CODECS[codec.name] = codec
+
+class _CacheEntry:
+    """Cached result: encoded bytes plus (live tier) the decoded object."""
+    __slots__ = ("codec", "data", "obj")
+    def __init__(self, codec: Codec, data: bytes, obj: Any = None):
+        self.codec, self.data, self.obj = codec, data, obj
+    def value(self, live: bool) -> Any:
+        if not live:
+            return self.codec.decode(self.data)
+        if self.obj is None:
+            self.obj = self.codec.decode(self.data)
+        return self.obj
+
+_COUNTERS = ("hits", "misses", "saves", "loads")
+
 class SpeedLightV2:
     def __init__(self,
                  mem_bytes: int = 512*1024*1024,
                  disk_dir: Optional[str] = None,
                  ledger_path: Optional[str] = None,
                  default_ttl: Optional[float] = None,
-                 determinism_guard: bool = False):
-        self.cache = LRU(max_bytes=mem_bytes)
+                 determinism_guard: bool = False,
+                 n_shards: int = 16,
+                 default_codec: str = "json",
+                 ledger_fsync: str = "none"):
+        self.cache = ShardedLRU(max_bytes=mem_bytes, n_shards=n_shards)
         self.disk_dir = disk_dir
         if self.disk_dir:
             os.makedirs(self.disk_dir, exist_ok=True)
-        self.ledger = MerkleLedger(ledger_path)
+        self.ledger = MerkleLedger(ledger_path, fsync=ledger_fsync)
         self.default_ttl = default_ttl
         self.det_guard = determinism_guard
-        self.stats_dict = {"hits":0,"misses":0,"saves":0,"loads":0,"start":time.time()}
-        self._locks: Dict[str, threading.Lock] = {}
-        self._global = threading.RLock()
+        self._start = time.time()
+        # Counters are per shard, updated under that shard's lock, summed on read
+        self._counters = [dict.fromkeys(_COUNTERS, 0) for _ in range(n_shards)]
+        self._locks = KeyLockTable(n_stripes=n_shards)
+        self.default_codec = CODECS[default_codec]
+        self._scope_codecs: Dict[str, Tuple[Codec, bool]] = {}
         atexit.register(self._flush)
 
-    def _task_key(self, payload: Any, scope: str) -> str:
-        js = json.dumps({"payload": payload, "scope": scope}, sort_keys=True, default=str)
-        return sha256_hex(js.encode("utf-8"))
+    def _payload_text(self, payload: Any) -> str:
+        # Exact encoding: CNF text rounds floats, so it only feeds input_hash
+        if Canonical is not None and isinstance(payload, Canonical):
+            payload = payload.obj
+        return json.dumps(payload, sort_keys=True, default=str)
+
+    def _task_key(self, payload: Any, scope: str, text: Optional[str] = None) -> str:
+        # Same bytes as json.dumps({"payload": ..., "scope": ...}, sort_keys=True),
+        # built around the payload text so it is serialized only once
+        if text is None:
+            text = self._payload_text(payload)
+        return sha256_hex(('{"payload": ' + text + ', "scope": ' + json.dumps(scope) + '}').encode("utf-8"))
+
+    def set_codec(self, scope: str, codec: str = "json", live: bool = False) -> None:
+        """Codec for a scope's results. live=True returns the cached object
+        itself on hits (no decode); callers must not mutate it."""
+        self._scope_codecs[scope] = (CODECS[codec], live)
+
+    def _scope_codec(self, scope: str) -> Tuple[Codec, bool]:
+        return self._scope_codecs.get(scope, (self.default_codec, False))
 
     def _result_pack(self, result: Any) -> bytes:
-        return json.dumps(result, sort_keys=True, default=str).encode("utf-8")
+        return self.default_codec.encode(result)
 
     def _result_unpack(self, b: bytes) -> Any:
-        return json.loads(b.decode("utf-8"))
+        return self.default_codec.decode(b)
 
-    def _disk_path(self, key: str) -> str:
+    def _disk_path(self, key: str, codec: Optional[Codec] = None) -> str:
         assert self.disk_dir
-        return os.path.join(self.disk_dir, key[:2], key[2:4], key + ".json")
-
-    def _ensure_lock(self, key: str) -> threading.Lock:
-        with self._global:
-            if key not in self._locks:
-                self._locks[key] = threading.Lock()
-            return self._locks[key]
+        ext = codec.ext if codec else ".json"
+        return os.path.join(self.disk_dir, key[:2], key[2:4], key + ext)
+
+    def _count(self, key: str, *names: str) -> None:
+        i = self.cache.shard_of(key)
+        with self.cache.locks[i]:
+            counters = self._counters[i]
+            for name in names:
+                counters[name] += 1
+
+    @property
+    def stats_dict(self) -> Dict[str, Any]:
+        totals = dict.fromkeys(_COUNTERS, 0)
+        for counters, lock in zip(self._counters, self.cache.locks):
+            with lock:
+                for name in _COUNTERS:
+                    totals[name] += counters[name]
+        totals["start"] = self._start
+        return totals
 
     def compute(self, payload: Any, *, scope: str="global", channel: int=3, tags: Optional[List[str]]=None,
                 compute_fn: Optional[Callable]=None, ttl: Optional[float]=None, verify_fn: Optional[Callable]=None,
-                **kwargs) -> Tuple[Any, float, str]:
+                live: Optional[bool]=None, **kwargs) -> Tuple[Any, float, str]:
         ttl = ttl if ttl is not None else self.default_ttl
         tags = tags or []
-        key = self._task_key(payload, scope)
-        lock = self._ensure_lock(key)
-        with lock:
-            cached = self.cache.get(key)
-            if cached is not None:
-                res_bytes = cached if isinstance(cached, (bytes, bytearray)) else self._result_pack(cached)
-                result = self._result_unpack(res_bytes)
-                self.stats_dict["hits"] += 1
+        text = self._payload_text(payload)
+        key = self._task_key(payload, scope, text)
+        codec, scope_live = self._scope_codec(scope)
+        live = scope_live if live is None else live
+
+        # Fast path: hits never take the per-key lock
+        entry = self.cache.get(key)
+        if entry is not None:
+            self._count(key, "hits")
+            return entry.value(live), 0.0, key
+
+        with self._locks.hold(key):
+            found, result = self._lookup(key, codec, live, ttl)
+            if found:
                 return result, 0.0, key
 
-            if self.disk_dir:
-                p = self._disk_path(key)
-                if os.path.exists(p):
-                    try:
-                        with open(p, "rb") as f:
-                            b = f.read()
-                        self.cache.put(key, b, ttl, len(b))
-                        self.stats_dict["loads"] += 1
-                        self.stats_dict["hits"] += 1
-                        return self._result_unpack(b), 0.0, key
-                    except Exception:
-                        pass
-
-            self.stats_dict["misses"] += 1
+            self._count(key, "misses")
             if compute_fn is None:
                 raise ValueError("Cache miss and no compute_fn provided")
             t0 = time.time()
@@ -228,33 +626,87 @@ class SpeedLightV2:
                 if not ok:
                     raise ValueError("Determinism/verification failed for result")
 
-            b = self._result_pack(result)
-            self.cache.put(key, b, ttl, len(b))
+            self.ledger.append(**self._store(key, payload, text, result, cost, codec, live, ttl,
+                                             scope=scope, channel=channel, tags=tags))
+            return result, cost, key
+
+    def _lookup(self, key: str, codec: Codec, live: bool, ttl: Optional[float]) -> Tuple[bool, Any]:
+        """Memory then disk; counts hits (and loads), never misses."""
+        entry = self.cache.get(key)
+        if entry is not None:
+            self._count(key, "hits")
+            return True, entry.value(live)
+        if self.disk_dir:
+            p = self._disk_path(key, codec)
+            if os.path.exists(p):
+                try:
+                    with open(p, "rb") as f:
+                        b = f.read()
+                    entry = _CacheEntry(codec, b)
+                    result = entry.value(live)
+                    self.cache.put(key, entry, ttl, len(b))
+                    self._count(key, "loads", "hits")
+                    return True, result
+                except Exception:
+                    pass
+        return False, None
+
+    def _store(self, key: str, payload: Any, text: str, result: Any, cost: float, codec: Codec,
+               live: bool, ttl: Optional[float], **receipt) -> Dict[str, Any]:
+        """Cache (and persist) a computed result; returns its ledger record."""
+        b = codec.encode(result)
+        self.cache.put(key, _CacheEntry(codec, b, result if live else None), ttl, len(b))
+        if self.disk_dir:
+            p = self._disk_path(key, codec)
+            os.makedirs(os.path.dirname(p), exist_ok=True)
+            with open(p, "wb") as f:
+                f.write(b)
+            self._count(key, "saves")
+        if Canonical is not None and isinstance(payload, Canonical):
+            ih = payload.digest
+        else:
+            ih = sha256_hex(text.encode("utf-8"))
+        return dict(receipt, task_key=key, input_hash=ih, result_hash=sha256_hex(b), cost=cost, ttl=ttl)
+
+    def lookup(self, payload: Any, *, scope: str = "global", live: Optional[bool] = None) -> Tuple[bool, Any, str]:
+        """Cached result without computing: (found, result, task_key)."""
+        key = self._task_key(payload, scope)
+        codec, scope_live = self._scope_codec(scope)
+        found, result = self._lookup(key, codec, scope_live if live is None else live, self.default_ttl)
+        return found, result, key
 
-            if self.disk_dir:
-                p = self._disk_path(key)
-                os.makedirs(os.path.dirname(p), exist_ok=True)
-                with open(p, "wb") as f:
-                    f.write(b)
-                self.stats_dict["saves"] += 1
+    def store_many(self, items: List[Tuple[Any, Any, float]], *, scope: str = "global", channel: int = 3,
+                   tags: Optional[List[str]] = None, ttl: Optional[float] = None) -> List[str]:
+        """Cache results computed elsewhere, given as (payload, result, cost).
 
-            ih = sha256_hex(json.dumps(payload, sort_keys=True, default=str).encode("utf-8"))
-            rh = sha256_hex(b)
-            self.ledger.append(scope=scope, channel=channel, task_key=key, input_hash=ih,
-                               result_hash=rh, cost=cost, ttl=ttl, tags=tags)
-            return result, cost, key
+        Their receipts are appended to the ledger as one group commit.
+        Returns the task keys, in order.
+        """
+        ttl = ttl if ttl is not None else self.default_ttl
+        codec, live = self._scope_codec(scope)
+        keys, records = [], []
+        for payload, result, cost in items:
+            text = self._payload_text(payload)
+            key = self._task_key(payload, scope, text)
+            self._count(key, "misses")
+            records.append(self._store(key, payload, text, result, cost, codec, live, ttl,
+                                       scope=scope, channel=channel, tags=list(tags or [])))
+            keys.append(key)
+        self.ledger.append_many(records)
+        return keys
 
     def get_meta(self, receipt_id: str) -> Dict[str, Any]:
-        for e in self.ledger.entries[::-1]:
-            if e.task_key == receipt_id:
-                return {"scope": e.scope, "channel": e.channel, "tags": e.tags, "ts": e.ts}
-        return {}
+        e = self.ledger.get(receipt_id)
+        if e is None:
+            return {}
+        return {"scope": e.scope, "channel": e.channel, "tags": e.tags, "ts": e.ts}
 
     def stats(self) -> Dict[str, Any]:
-        elapsed = time.time() - self.stats_dict["start"]
+        counters = self.stats_dict
+        elapsed = time.time() - counters["start"]
         mem = self.cache.stats()
         return {
-            **self.stats_dict,
+            **counters,
             "elapsed_s": elapsed,
             "mem_items": mem["items"],
             "mem_bytes": mem["bytes"],
@@ -278,6 +730,6 @@ class SpeedLightV2:
         self.cache.clear()
 
     def _flush(self):
-        pass
+        self.ledger.close()
 
 SpeedLightPlus = SpeedLightV2
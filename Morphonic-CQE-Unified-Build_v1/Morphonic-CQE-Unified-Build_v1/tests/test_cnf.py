@@ -0,0 +1,78 @@
+import hashlib
+import json
+import random
+
+from morphonic_cqe_unified.core.cnf import Canonical, cnf_digest, encode_cnf
+from morphonic_cqe_unified.sidecar.speedlight_sidecar_plus import SpeedLightV2
+
+
+def _reference_cnf(obj):
+    # The original two-step to_cnf
+    def transform(x):
+        if isinstance(x, dict):
+            return {k: transform(v) for k, v in sorted(x.items())}
+        elif isinstance(x, list):
+            return [transform(v) for v in x]
+        elif isinstance(x, float):
+            return float(f"{x:.12f}")
+        return x
+    return json.dumps(transform(obj), separators=(",", ":"), sort_keys=True)
+
+
+def _random_obj(rng, depth=0):
+    c = rng.randrange(10 if depth < 4 else 6)
+    if c == 0:
+        return rng.uniform(-1e6, 1e6)
+    if c == 1:
+        return rng.choice([1/3, 1e-13, 1e20, float("nan"), float("inf"), -0.0, 0.0, 1.0])
+    if c == 2:
+        return rng.randrange(-10**20, 10**20)
+    if c == 3:
+        return rng.choice(["a", "é\n\"", "☃", ""])
+    if c == 4:
+        return rng.choice([None, True, False, 1, 0])
+    if c == 5:
+        return rng.random()
+    if c == 6:
+        return [_random_obj(rng, depth+1) for _ in range(rng.randrange(4))]
+    if c == 7:
+        return tuple(_random_obj(rng, depth+1) for _ in range(rng.randrange(4)))
+    if c == 8:
+        return tuple(rng.choice([0.0, -0.0, 1.0, rng.uniform(-5, 5)]) for _ in range(3))
+    return {rng.choice(["x", "b", "a", "é"]): _random_obj(rng, depth+1) for _ in range(rng.randrange(4))}
+
+
+def test_encoder_matches_reference():
+    rng = random.Random(1)
+    for _ in range(5000):
+        obj = _random_obj(rng)
+        assert encode_cnf(obj) == _reference_cnf(obj)
+    # Memoized vectors keep 0.0/-0.0 and int/float apart
+    for t in [(0.0, 1.0), (-0.0, 1.0), (0, 1), (0.0, 1)]:
+        assert encode_cnf({"v": t}) == _reference_cnf({"v": t})
+
+
+def test_canonical_hash_once_and_sidecar_keys():
+    payload = {"op": "boundary_step", "x": (0.5,)*8, "note": "n"}
+    c = Canonical(payload)
+    assert c.digest == cnf_digest(payload) == hashlib.sha256(_reference_cnf(payload).encode()).hexdigest()
+    assert c.digest is c.digest and encode_cnf(c) is c.text
+
+    sl = SpeedLightV2(mem_bytes=1 << 20)
+    legacy = hashlib.sha256(json.dumps({"payload": payload, "scope": "s"}, sort_keys=True,
+                                       default=str).encode()).hexdigest()
+    assert sl.compute(payload, scope="s", compute_fn=lambda: 1)[2] == legacy
+    # Wrapping does not change the task key
+    r1 = sl.compute(c, scope="s", compute_fn=lambda: 2)
+    assert r1[0] == 1 and r1[2] == legacy
+    calls = []
+    r1 = sl.compute(c, scope="t", compute_fn=lambda: calls.append(1) or 2)
+    r2 = sl.compute(Canonical(dict(payload)), scope="t", compute_fn=lambda: calls.append(1) or 3)
+    assert r1[0] == r2[0] == 2 and calls == [1]
+    assert sl.ledger.get(r1[2]).input_hash == c.digest
+
+    # Task keys are exact even where CNF rounds
+    tiny, zero = Canonical({"a": 1e-13}), Canonical({"a": 0.0})
+    assert tiny.digest == zero.digest
+    assert sl.compute(tiny, scope="s", compute_fn=lambda: "tiny")[0] == "tiny"
+    assert sl.compute(zero, scope="s", compute_fn=lambda: "zero")[0] == "zero"
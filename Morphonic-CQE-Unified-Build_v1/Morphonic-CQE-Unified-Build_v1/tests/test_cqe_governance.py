@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from morphonic_cqe_unified.core import cqe_governance as gov
+from morphonic_cqe_unified.core.cqe_governance import AuditChain, BoundaryReceipt
+
+
+def _receipt(i):
+    return BoundaryReceipt(timestamp=1000.0 + i, actor="test", pre_state=(0.0,)*8,
+                           post_state=(float(i),)*8, dphi=0.5, channel=9, scope="personal", note=str(i))
+
+
+def test_persistent_chain_resumes_from_checkpoint(tmp_path, monkeypatch):
+    path = str(tmp_path / "chain.jsonl")
+    chain = AuditChain(path, checkpoint_every=4, checkpoint_key=b"k")
+    for i in range(10):
+        chain.append(_receipt(i))
+    tip = chain.tip_hash
+    chain.close()
+    with open(path, "a") as f:
+        f.write('{"entry": {"idx": 10, "prev')        # torn write
+
+    rehashed = []
+    real = gov._verify_segment
+    monkeypatch.setattr(gov, "_verify_segment", lambda rows: rehashed.append(len(rows)) or real(rows))
+    chain = AuditChain(path, checkpoint_every=4, checkpoint_key=b"k")
+    assert len(chain.entries) == 10 and chain.tip_hash == tip
+    assert rehashed == [2]                            # only the tail past checkpoint n=8
+    assert chain.entries[3].receipt.post_state == (3.0,)*8
+    chain.append(_receipt(10))
+    assert chain.verify() and rehashed == [2]
+    assert chain.verify(full=True) and rehashed == [2, 11]
+    chain.close()
+
+    # A checkpoint signed with another key is not trusted
+    rehashed.clear()
+    AuditChain(path, checkpoint_key=b"other").close()
+    assert rehashed == [11]
+
+
+def test_tamper_detection_and_parallel_verify():
+    chain = AuditChain()
+    for i in range(50):
+        chain.append(_receipt(i))
+    assert chain.verify(full=True, workers=2, segment_size=8)
+    records = [json.loads(json.dumps({**e.__dict__, "receipt": e.receipt.__dict__})) for e in chain.entries]
+    loaded = AuditChain.from_records(records)
+    assert loaded.tip_hash == chain.tip_hash and loaded.verify()
+
+    records[20]["receipt"]["actor"] = "mallory"
+    assert not AuditChain.from_records(records).verify(full=True, workers=2, segment_size=8)
+    chain.entries[30].receipt.scope = "public"
+    assert chain.verify()                             # verified prefix is trusted
+    assert not chain.verify(full=True)
+
+
+def test_corrupt_middle_record_is_reported_not_truncated(tmp_path):
+    path = str(tmp_path / "chain.jsonl")
+    chain = AuditChain(path)
+    for i in range(6):
+        chain.append(_receipt(i))
+    chain.close()
+    with open(path, "rb") as f:
+        lines = f.readlines()
+    lines[2] = b'{"entry": {"idx": 2, "prev\n'
+    with open(path, "wb") as f:
+        f.writelines(lines)
+    with pytest.raises(ValueError):
+        AuditChain(path)
+    with open(path, "rb") as f:
+        assert f.readlines() == lines
@@ -0,0 +1,31 @@
+import numpy as np
+
+from morphonic_cqe_unified.core import cqe_math as cm
+from morphonic_cqe_unified.core import cqe_math_np as npm
+
+
+def test_constants_match_tuple_module():
+    assert np.array_equal(npm.E8_ROOTS, np.array(cm.generate_e8_roots()))
+    S = cm.simple_roots_e8()
+    assert np.array_equal(npm.E8_SIMPLE_ROOTS, np.array(S))
+    assert np.allclose(npm.E8_CARTAN, np.array(cm.cartan_from_simple_roots(S)))
+
+
+def test_batched_projection_and_steps_match_scalar():
+    rng = np.random.default_rng(7)
+    X = rng.standard_normal((64, 8)) * 3
+    S = cm.simple_roots_e8()
+    A = cm.metric_A_from_cartan(cm.cartan_from_simple_roots(S))
+    proj, dots, refs, ok = npm.project_to_fundamental_chamber(X)
+    for i, x in enumerate(X):
+        p, d, r, c = cm.project_to_fundamental_chamber(tuple(x), S)
+        assert np.allclose(proj[i], p) and np.allclose(dots[i], d)
+        assert refs[i] == r and ok[i] == c
+    assert np.allclose(npm.phi(npm.metric_A(), X), [cm.phi(A, tuple(x)) for x in X])
+
+    x0 = tuple(rng.standard_normal(8))
+    D = rng.standard_normal((64, 8))
+    x_new, accepted, attempts = npm.try_internal_step(npm.metric_A(), x0, D)
+    for i, d in enumerate(D):
+        xn, a, k = cm.try_internal_step(A, x0, tuple(d))
+        assert np.allclose(x_new[i], xn) and accepted[i] == a and attempts[i] == k
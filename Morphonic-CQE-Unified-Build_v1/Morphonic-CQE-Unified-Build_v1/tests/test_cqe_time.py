@@ -0,0 +1,29 @@
+import numpy as np
+
+from morphonic_cqe_unified.core.cqe_time import toroidal_step, toroidal_steps
+
+
+def test_batched_ticks_match_scalar():
+    X = np.random.default_rng(11).standard_normal((16, 8))
+    ref = []
+    for x in X:
+        x = tuple(x)
+        for _ in range(25):
+            x, closed = toroidal_step(x)
+            assert closed
+        ref.append(x)
+    for stepwise in (False, True):
+        Xk, closed, drift = toroidal_steps(X, 25, stepwise=stepwise)
+        assert np.allclose(Xk, ref, atol=1e-12)
+        assert closed.all() and (drift < 1e-10).all()
+
+    x1, c1, d1 = toroidal_steps(X[0], 1)
+    assert np.allclose(x1, toroidal_step(tuple(X[0]))[0]) and c1 and d1 < 1e-12
+
+
+def test_closed_form_long_run():
+    X = np.random.default_rng(5).standard_normal((1000, 8))
+    # coupling 0.03 closes every 100 ticks (all plane angles are whole turns)
+    Xk, closed, drift = toroidal_steps(X, 10**6)
+    assert np.allclose(Xk, X, atol=1e-9) and closed.all()
+    assert np.allclose(toroidal_steps(X, 10**6 + 7)[0], toroidal_steps(X, 7)[0], atol=1e-9)
@@ -0,0 +1,30 @@
+import numpy as np
+
+from morphonic_cqe_unified.core import cqe_math as cm
+from morphonic_cqe_unified.core.e8_roots import E8RootSystem, get_e8_root_system
+
+
+def test_shared_system_matches_tuple_module(tmp_path):
+    E8 = get_e8_root_system()
+    assert get_e8_root_system() is E8
+    assert np.array_equal(E8.roots, np.array(cm.generate_e8_roots()))
+    assert np.allclose(E8.cartan, np.array(cm.cartan_from_simple_roots(cm.simple_roots_e8())))
+    for s, a in zip(E8.reflections, E8.simple_roots):
+        assert np.allclose(s @ a, -a) and np.allclose(s @ s, np.eye(8))
+    assert E8.index_of(E8.roots[17]) == 17 and E8.index_of(np.ones(8)) is None
+
+    path = str(tmp_path / "e8.npy")
+    E8.save(path)
+    loaded = E8RootSystem.load(path)
+    assert np.array_equal(loaded.roots, E8.roots)
+    assert np.array_equal(loaded.simple_roots, E8.simple_roots)
+
+
+def test_nearest_root_matches_brute_force():
+    E8 = get_e8_root_system()
+    X = np.random.default_rng(3).standard_normal((100, 8))
+    idx, R = E8.nearest_root(X)
+    d = np.linalg.norm(X[:, None, :] - E8.roots[None], axis=-1)
+    assert np.array_equal(idx, d.argmin(axis=1))
+    assert np.array_equal(R, E8.roots[idx])
+    assert E8.nearest_root(E8.roots[5] * 0.9)[0] == 5
@@ -1,3 +1,4 @@
+import pytest
 from morphonic_cqe_unified.sidecar.speedlight_sidecar_plus import SpeedLightPlus
 def test_basic_cache():
     sl = SpeedLightPlus(mem_bytes=5_000_000)
@@ -7,3 +8,106 @@ def test_basic_cache():
     r1, c1, id1 = sl.compute(payload, scope="test", channel=3, compute_fn=compute)
     r2, c2, id2 = sl.compute(payload, scope="test", channel=3, compute_fn=compute)
     assert r1 == r2 and id1 == id2 and c2 == 0.0
+
+def test_concurrent_sharded_cache():
+    import threading
+    sl = SpeedLightPlus(mem_bytes=5_000_000, n_shards=8)
+    calls = []
+    def worker(t):
+        for i in range(200):
+            n = (t * 7 + i) % 50
+            sl.compute({"op": "sq", "n": n}, scope="test",
+                       compute_fn=lambda n=n: calls.append(n) or {"sq": n * n})
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(64)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    s = sl.stats()
+    assert sorted(calls) == list(range(50))  # each key computed exactly once
+    assert s["hits"] + s["misses"] == 64 * 200 and s["misses"] == 50
+    assert s["mem_items"] == 50 and s["ledger_len"] == 50 and s["ledger_ok"]
+    assert len(sl._locks) == 0  # no per-key locks left behind
+
+def test_sharded_lru_global_budget():
+    from morphonic_cqe_unified.sidecar.speedlight_sidecar_plus import ShardedLRU
+    lru = ShardedLRU(max_bytes=1600, n_shards=16)
+    for i in range(40):
+        lru.put(f"k{i}", i, None, 40)
+    assert lru.stats()["bytes"] <= 1600 and lru.stats()["items"] == 40
+    lru.put("big", "x", None, 1000)  # far more than one shard's share
+    assert lru.get("big") == "x" and lru.stats()["bytes"] <= 1600
+    lru.put("huge", "y", None, 1601)
+    assert lru.get("huge") is None and lru.stats()["bytes"] <= 1600
+
+def test_codecs_and_live_tier(tmp_path):
+    import numpy as np
+    sl = SpeedLightPlus(mem_bytes=5_000_000, disk_dir=str(tmp_path / "cache"))
+    sl.set_codec("e8", "ndarray")
+    sl.set_codec("pk", "pickle5")
+    sl.set_codec("live", "pickle5", live=True)
+    roots = np.random.default_rng(0).standard_normal((240, 8))
+    r1, _, _ = sl.compute({"op": "roots"}, scope="e8", compute_fn=lambda: roots)
+    r2, c2, _ = sl.compute({"op": "roots"}, scope="e8", compute_fn=lambda: roots)
+    assert c2 == 0.0 and r2.dtype == roots.dtype and np.array_equal(r2, roots)
+    obj = {"arr": roots, "meta": [1, "a"]}
+    sl.compute({"op": "obj"}, scope="pk", compute_fn=lambda: obj)
+    hit, _, _ = sl.compute({"op": "obj"}, scope="pk")
+    assert np.array_equal(hit["arr"], roots) and hit["meta"] == [1, "a"]
+    live1, _, _ = sl.compute({"op": "obj"}, scope="live", compute_fn=lambda: obj)
+    live2, _, _ = sl.compute({"op": "obj"}, scope="live")
+    assert live1 is obj and live2 is obj
+    # Disk tier decodes with the scope's codec after a restart
+    sl2 = SpeedLightPlus(mem_bytes=5_000_000, disk_dir=str(tmp_path / "cache"))
+    sl2.set_codec("e8", "ndarray")
+    r3, _, _ = sl2.compute({"op": "roots"}, scope="e8")
+    assert np.array_equal(r3, roots) and sl2.stats()["loads"] == 1
+
+def test_ledger_group_commit_and_resume(tmp_path):
+    from morphonic_cqe_unified.sidecar.speedlight_sidecar_plus import MerkleLedger
+    path = str(tmp_path / "ledger.jsonl")
+    sl = SpeedLightPlus(mem_bytes=5_000_000, ledger_path=path, ledger_fsync="commit")
+    ids = [sl.compute({"n": n}, scope="t", tags=[str(n)], compute_fn=lambda n=n: n * n)[2] for n in range(100)]
+    assert sl.get_meta(ids[42])["tags"] == ["42"]
+    assert sl.stats()["ledger_ok"] and sl.ledger._verified == 100
+    sl.ledger.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"idx": 100, "ts"')  # torn trailing record
+    led = MerkleLedger(path)
+    assert len(led.entries) == 100 and led.verify(full=True)
+    assert led.prev_hash == sl.ledger.prev_hash and led.get(ids[7]).idx == 7
+    led.append("t", 3, "k", "ih", "rh", 0.0, None, [])
+    led.close()
+    resumed = MerkleLedger(path)
+    assert len(resumed.entries) == 101 and resumed.verify()
+    resumed.entries[50].cost = 99.0
+    assert resumed.verify() and not resumed.verify(full=True)
+    resumed.close()
+
+def test_ledger_corrupt_record_is_not_truncated(tmp_path):
+    from morphonic_cqe_unified.sidecar.speedlight_sidecar_plus import MerkleLedger
+    path = str(tmp_path / "ledger.jsonl")
+    led = MerkleLedger(path)
+    for n in range(5):
+        led.append("t", 3, f"k{n}", "ih", "rh", 0.0, None, [])
+    led.close()
+    with open(path, encoding="utf-8") as f:
+        lines = f.readlines()
+    lines[2] = '{"idx": 2, "ts"\n'
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(lines)
+    with pytest.raises(ValueError):
+        MerkleLedger(path)
+    with open(path, encoding="utf-8") as f:
+        assert f.readlines() == lines
+
+def test_lookup_and_store_many(tmp_path):
+    path = str(tmp_path / "ledger.jsonl")
+    sl = SpeedLightPlus(mem_bytes=5_000_000, ledger_path=path)
+    assert sl.lookup({"n": 1}, scope="t")[0] is False
+    keys = sl.store_many([({"n": n}, n * n, 0.0) for n in range(20)], scope="t", tags=["batch"])
+    found, result, key = sl.lookup({"n": 7}, scope="t")
+    assert found and result == 49 and key == keys[7]
+    assert sl.compute({"n": 7}, scope="t")[0] == 49
+    assert sl.get_meta(keys[3])["tags"] == ["batch"]
+    sl.ledger.close()
+    with open(path, encoding="utf-8") as f:
+        assert sum(1 for _ in f) == 20
@@ -0,0 +1,40 @@
+# Compiled Λ⊗E₈ transformer block vs the same math written by hand in NumPy.
+import time
+import numpy as np
+from morphonic_lambda.e8_bridge import GeometricLambdaCapture
+from morphonic_lambda.e8_kernels import compile_e8
+
+B, T, D, H = 32, 64, 64, 256
+cap = GeometricLambdaCapture()
+b = cap.builder
+attn = cap.capture_attention(D, D, D, 1)
+ffn = cap.capture_feedforward(D, H, D)
+norm = cap.capture_layer_norm(D)
+# λQ.λK.λV. ffn (norm (attn Q K V))
+block = b.abs("Q", b.abs("K", b.abs("V",
+    b.app(ffn, b.app(norm, b.app(b.app(b.app(attn, b.var("Q")), b.var("K")), b.var("V")))))))
+
+rng = np.random.default_rng(0)
+W1, W2 = rng.standard_normal((H, D)) / np.sqrt(D), rng.standard_normal((D, H)) / np.sqrt(H)
+kernel = compile_e8(block, weights={"e8_project_0": W1, "e8_project_1": W2})
+Q, K, V = (rng.standard_normal((B, T, D)) for _ in range(3))
+
+def by_hand(Q, K, V):
+    s = Q @ K.transpose(0, 2, 1) * (1.0 / np.sqrt(D))
+    s = np.exp(s - s.max(axis=-1, keepdims=True))
+    a = (s / s.sum(axis=-1, keepdims=True)) @ V
+    a = (a - a.mean(axis=-1, keepdims=True)) / np.sqrt(a.var(axis=-1, keepdims=True) + 1e-5)
+    h = a @ W1.T
+    h = 0.5 * h * (1.0 + np.tanh(np.sqrt(2.0 / np.pi) * (h + 0.044715 * h ** 3)))
+    return h @ W2.T
+
+def bench(fn, reps=20):
+    fn(Q, K, V)
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        fn(Q, K, V)
+    return (time.perf_counter() - t0) / reps
+
+print(f"ops: {kernel.n_ops}, max |diff|: {np.abs(kernel(Q, K, V) - by_hand(Q, K, V)).max():.2e}")
+tk, th = bench(kernel), bench(by_hand)
+print(f"compiled: {tk * 1e3:.2f} ms  hand-written: {th * 1e3:.2f} ms  ratio: {tk / th:.2f}")
@@ -9,3 +9,15 @@ f = A.Mu("f", A.Lam("n",
              A.App(A.Lam("x", A.Const("nat", 0)), A.Var("n")))))
 res, steps = E.eval_normal(A.App(f, A.Const("nat", 3)))
 print("steps:", steps, "result:", res)
+
+# Same program on the environment machine (same normal form and step count)
+from morphonic_lambda.machine import eval_machine
+print("machine:", eval_machine(A.App(f, A.Const("nat", 3))))
+
+# Non-tail μ-recursion: μg. λn. if iszero n then 0 else succ (g (pred n))
+g = A.Mu("g", A.Lam("n",
+        A.If(A.App(A.Const("iszero", None), A.Var("n")),
+             A.Const("nat", 0),
+             A.App(A.Const("succ", None), A.App(A.Var("g"), A.App(A.Const("pred", None), A.Var("n")))))))
+res, steps = eval_machine(A.App(g, A.Const("nat", 100_000)), fuel=10**7)
+print("steps:", steps, "result:", res)
@@ -1,2 +1,2 @@
-__all__=["ast","typesys","eval","typing","modal","glyphs","e8_bridge","runtime"]
+__all__=["ast","typesys","eval","machine","hashcons","typing","modal","glyphs","e8_bridge","e8_kernels","runtime"]
 __version__="1.0.0"
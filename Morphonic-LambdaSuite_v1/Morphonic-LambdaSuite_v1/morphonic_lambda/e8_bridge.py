@@ -400,7 +400,8 @@ class LambdaE8Evaluator:
     """
     Evaluator for extended lambda calculus.
     
-    Performs beta-reduction and geometric operations.
+    Performs beta-reduction and geometric operations symbolically; see
+    e8_kernels.compile_e8 to run a term on arrays.
     """
     
     def __init__(self):
@@ -424,7 +425,20 @@ class LambdaE8Evaluator:
         self.reduction_steps = 0
         return self._eval(term, env)
     
-    def _eval(self, term: LambdaTerm, env: Dict[str, Any]) -> Any:
+    @staticmethod
+    def _lookup(env: Any, name: str) -> Any:
+        """Look a variable up in a linked environment.
+
+        Applications push (name, value, parent) frames; the chain ends in
+        the caller's dict. Unbound variables evaluate to their own name.
+        """
+        while type(env) is tuple:
+            if env[0] == name:
+                return env[1]
+            env = env[2]
+        return env.get(name, name)
+    
+    def _eval(self, term: LambdaTerm, env: Any) -> Any:
         """Internal evaluation with step counting."""
         self.reduction_steps += 1
         
@@ -432,11 +446,12 @@ class LambdaE8Evaluator:
             raise RuntimeError("Maximum reduction steps exceeded")
         
         if term.term_type == "var":
-            return env.get(term.content, term.content)
+            return self._lookup(env, term.content)
         
         elif term.term_type == "abs":
-            # Return closure
-            return ("closure", term, env.copy())
+            # Return closure; environments are never mutated once built,
+            # so the closure can share env instead of copying it
+            return ("closure", term, env)
         
         elif term.term_type == "app":
             func, arg = term.content
@@ -446,9 +461,8 @@ class LambdaE8Evaluator:
             if isinstance(func_val, tuple) and func_val[0] == "closure":
                 _, abs_term, closure_env = func_val
                 var, body = abs_term.content
-                new_env = closure_env.copy()
-                new_env[var] = arg_val
-                return self._eval(body, new_env)
+                # Persistent env: binding pushes one frame, nothing is copied
+                return self._eval(body, (var, arg_val, closure_env))
             else:
                 return ("app", func_val, arg_val)
         
@@ -0,0 +1,344 @@
+"""
+NumPy Kernels for Λ⊗E₈ Terms
+=============================
+
+Compiles a LambdaTerm tree (for example the output of
+GeometricLambdaCapture.capture_attention / capture_feedforward) into a
+Python closure over NumPy operations.
+
+- Leading abstractions become the kernel's inputs; inner applications of
+  abstractions are β-reduced at compile time.
+- The body is built as a DAG: structurally equal subexpressions are
+  shared (CSE), subexpressions over constants are evaluated once
+  (constant folding), and scale/transpose/dihedral chains are fused.
+- The kernel runs the DAG as a straight-line register program and frees
+  intermediates after their last use.
+
+Every op works on the trailing axes, so inputs may carry any number of
+leading batch axes.
+"""
+
+import math
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .e8_bridge import LambdaTerm
+
+class E8CompileError(Exception):
+    pass
+
+# ============================================================================
+# NUMPY OPS (trailing axes; leading axes are batch)
+# ============================================================================
+
+_GELU_C = math.sqrt(2.0 / math.pi)
+
+def _softmax(x):
+    z = x - x.max(axis=-1, keepdims=True)
+    np.exp(z, out=z)
+    z /= z.sum(axis=-1, keepdims=True)
+    return z
+
+def _gelu(x):
+    return 0.5 * x * (1.0 + np.tanh(_GELU_C * (x + 0.044715 * x ** 3)))
+
+def _normalize(x, eps=1e-5):
+    mu = x.mean(axis=-1, keepdims=True)
+    var = x.var(axis=-1, keepdims=True)
+    return (x - mu) / np.sqrt(var + eps)
+
+def _transpose(x):
+    return np.swapaxes(x, -1, -2)
+
+def _fit(x, d: int):
+    """Parameter-free projection: truncate or zero-pad the last axis to d."""
+    n = x.shape[-1]
+    if n >= d:
+        return x[..., :d]
+    return np.concatenate([x, np.zeros(x.shape[:-1] + (d - n,), dtype=x.dtype)], axis=-1)
+
+def _nearest_d8(x):
+    f = np.rint(x)
+    odd = (f.sum(axis=-1) % 2) != 0
+    if odd.any():
+        err = x - f
+        i = np.abs(err).argmax(axis=-1)
+        idx = np.nonzero(odd)
+        j = i[idx]
+        step = np.where(err[idx + (j,)] > 0, 1.0, -1.0)
+        f[idx + (j,)] += step
+    return f
+
+def _e8_embed(x):
+    """Nearest E₈ lattice point (D₈ ∪ D₈+½) to each 8-vector."""
+    if x.shape[-1] != 8:
+        raise ValueError(f"e8_embed needs 8-vectors, got last axis {x.shape[-1]}")
+    a = _nearest_d8(x)
+    b = _nearest_d8(x - 0.5) + 0.5
+    closer = ((x - a) ** 2).sum(axis=-1) <= ((x - b) ** 2).sum(axis=-1)
+    return np.where(closer[..., None], a, b)
+
+def _dihedral(x, theta: float, reflect: bool):
+    """Rotate each coordinate plane (0,1), (2,3), ... by theta, after an
+    optional reflection (u, v) -> (u, -v)."""
+    if x.shape[-1] % 2:
+        raise ValueError("dihedral_op needs an even last axis")
+    u, v = x[..., 0::2], x[..., 1::2]
+    if reflect:
+        v = -v
+    c, s = math.cos(theta), math.sin(theta)
+    out = np.empty_like(x, dtype=np.result_type(x, float))
+    out[..., 0::2] = c * u - s * v
+    out[..., 1::2] = s * u + c * v
+    return out
+
+# op -> (function of (arrays..., statics...), number of array args)
+_OPS: Dict[str, Tuple[Callable, int]] = {
+    "dot": (np.matmul, 2),
+    "transpose": (_transpose, 1),
+    "scale": (lambda x, c: x * c, 1),
+    "softmax": (_softmax, 1),
+    "gelu": (_gelu, 1),
+    "normalize": (_normalize, 1),
+    "e8_embed": (_e8_embed, 1),
+    "e8_project": (None, 1),          # lowered to "matmul_w" or "fit"
+    "matmul_w": (np.matmul, 2),       # x @ Wᵀ, Wᵀ a folded constant
+    "fit": (_fit, 1),
+    "dihedral": (_dihedral, 1),
+}
+
+# ============================================================================
+# DAG
+# ============================================================================
+
+class _Node:
+    """DAG node: an input, a constant, or an op over other nodes."""
+    __slots__ = ("op", "args", "static", "value", "index")
+    def __init__(self, op: str, args: Tuple["_Node", ...] = (), static: Tuple = (), value: Any = None):
+        self.op, self.args, self.static, self.value = op, args, static, value
+        self.index = -1
+
+    @property
+    def is_const(self) -> bool:
+        return self.op == "const"
+
+class _Closure:
+    """Compile-time λ value: abstraction + environment."""
+    __slots__ = ("term", "env")
+    def __init__(self, term: LambdaTerm, env):
+        self.term, self.env = term, env
+
+def _lookup(env, name: str):
+    # env is a persistent linked list: (name, value, parent) or None
+    while env is not None:
+        if env[0] == name:
+            return env[1]
+        env = env[2]
+    raise KeyError(name)
+
+# ============================================================================
+# COMPILER
+# ============================================================================
+
+class E8Kernel:
+    """Compiled Λ⊗E₈ term: call with one array per input, positionally or
+    by name. Returns the output array."""
+
+    def __init__(self, params: List[str], program: List[tuple], n_slots: int, consts: Dict[int, Any], out: int):
+        self.params = params
+        self.program = program
+        self.n_slots = n_slots
+        self._consts = consts
+        self._out = out
+
+    @property
+    def n_ops(self) -> int:
+        return len(self.program)
+
+    def __call__(self, *args, **kwargs):
+        if kwargs:
+            args = args + tuple(kwargs[p] for p in self.params[len(args):])
+        if len(args) != len(self.params):
+            raise TypeError(f"kernel takes {len(self.params)} inputs {self.params}, got {len(args)}")
+        regs: List[Any] = [None] * self.n_slots
+        for i, a in enumerate(args):
+            regs[i] = np.asarray(a)
+        for i, v in self._consts.items():
+            regs[i] = v
+        for fn, ins, static, out, dead in self.program:
+            regs[out] = fn(*[regs[i] for i in ins], *static)
+            for i in dead:
+                regs[i] = None
+        return regs[self._out]
+
+class LambdaE8Compiler:
+    """
+    Compiles LambdaTerm trees to E8Kernel closures.
+
+    Args:
+        weights: e8_project weights, (d_out, d_in) arrays applied as W · x,
+            keyed by the node's metadata["name"] or else "e8_project_<i>"
+            (i counts distinct e8_project nodes in compile order). Without a
+            weight, e8_project truncates or zero-pads to the target dim.
+        consts: values for free variables, folded into the kernel.
+    """
+
+    def __init__(self, weights: Optional[Dict[str, Any]] = None, consts: Optional[Dict[str, Any]] = None):
+        self.weights = dict(weights or {})
+        self.consts = dict(consts or {})
+
+    def compile(self, term: LambdaTerm) -> E8Kernel:
+        self._table: Dict[tuple, _Node] = {}
+        self._labels: Dict[int, str] = {}
+        params: List[str] = []
+        env = None
+        inputs: List[_Node] = []
+        while term.term_type == "abs":
+            var, body = term.content
+            node = _Node("input", static=(var,))
+            node.index = len(inputs)
+            inputs.append(node)
+            params.append(var)
+            env = (var, node, env)
+            term = body
+        out = self._expr(term, env)
+        if isinstance(out, _Closure):
+            raise E8CompileError("Term body is a function; apply it to all of its arguments first")
+        return self._emit(params, inputs, out)
+
+    # ---- term -> DAG
+
+    def _mk(self, op: str, args: Tuple[_Node, ...], static: Tuple = ()) -> _Node:
+        key = (op, tuple(id(a) for a in args), static)
+        node = self._table.get(key)
+        if node is not None:
+            return node
+        if args and all(a.is_const for a in args):
+            node = self._const(_OPS[op][0](*[a.value for a in args], *static))
+        else:
+            node = _Node(op, args, static)
+        self._table[key] = node
+        return node
+
+    def _const(self, value: Any) -> _Node:
+        key = ("const", id(value), ())
+        node = self._table.get(key)
+        if node is None:
+            node = self._table[key] = _Node("const", value=value)
+        return node
+
+    def _array(self, v) -> _Node:
+        if isinstance(v, _Closure):
+            raise E8CompileError("A function is used where an array is expected")
+        return v
+
+    def _expr(self, term: LambdaTerm, env):
+        tt = term.term_type
+        if tt == "var":
+            try:
+                return _lookup(env, term.content)
+            except KeyError:
+                pass
+            if term.content in self.consts:
+                return self._const(np.asarray(self.consts[term.content]))
+            raise E8CompileError(f"Free variable: {term.content}")
+        if tt == "abs":
+            return _Closure(term, env)
+        if tt == "app":
+            func, arg = term.content
+            f = self._expr(func, env)
+            if not isinstance(f, _Closure):
+                raise E8CompileError("Only abstractions can be applied")
+            var, body = f.term.content
+            return self._expr(body, (var, self._expr(arg, env), f.env))
+        if tt == "dihedral_op":
+            N, k, reflect, arg = term.content
+            return self._dihedral(self._array(self._expr(arg, env)), 2.0 * math.pi * k / N, bool(reflect))
+        if tt == "e8_op":
+            op, args = term.content
+            return self._e8_op(term, op, args, env)
+        raise E8CompileError(f"No NumPy kernel for {tt} terms")
+
+    def _e8_op(self, term: LambdaTerm, op: str, args: list, env) -> _Node:
+        if op not in _OPS or op in ("matmul_w", "fit", "dihedral"):
+            raise E8CompileError(f"No NumPy kernel for e8_op {op!r}")
+        n_arr = _OPS[op][1]
+        arrs = [self._array(self._expr(a, env)) for a in args[:n_arr]]
+        static = tuple(args[n_arr:])
+        if op == "scale":
+            x, (c,) = arrs[0], static
+            if x.op == "scale":               # scale(scale(x, a), b) = scale(x, a·b)
+                x, c = x.args[0], x.static[0] * c
+            return x if c == 1 else self._mk("scale", (x,), (c,))
+        if op == "transpose" and arrs[0].op == "transpose":
+            return arrs[0].args[0]
+        if op == "e8_project":
+            (d,) = static
+            w = self.weights.get(self._label(term))
+            if w is None:
+                return self._mk("fit", (arrs[0],), (int(d),))
+            wt = np.ascontiguousarray(np.asarray(w).T)
+            if wt.shape[-1] != d:
+                raise E8CompileError(f"Weight for {self._label(term)} has {wt.shape[-1]} outputs, expected {d}")
+            return self._mk("matmul_w", (arrs[0], self._const(wt)))
+        return self._mk(op, tuple(arrs), static)
+
+    def _dihedral(self, x: _Node, theta: float, reflect: bool) -> _Node:
+        # R(θ₂)F^r₂ ∘ R(θ₁)F^r₁ = R(θ₂ ± θ₁)F^(r₁⊕r₂), since F R(θ) = R(-θ) F
+        if x.op == "dihedral":
+            t1, r1 = x.static
+            x, theta, reflect = x.args[0], theta + (-t1 if reflect else t1), reflect != r1
+        theta = math.remainder(theta, 2.0 * math.pi)
+        if theta == 0 and not reflect:
+            return x
+        return self._mk("dihedral", (x,), (theta, reflect))
+
+    def _label(self, term: LambdaTerm) -> str:
+        name = term.metadata.get("name")
+        if name:
+            return name
+        label = self._labels.get(id(term))
+        if label is None:
+            label = self._labels[id(term)] = f"e8_project_{len(self._labels)}"
+        return label
+
+    # ---- DAG -> register program
+
+    def _emit(self, params: List[str], inputs: List[_Node], out: _Node) -> E8Kernel:
+        order: List[_Node] = []
+        seen = set()
+        stack = [(out, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if expanded:
+                order.append(node)
+                continue
+            if id(node) in seen:
+                continue
+            seen.add(id(node))
+            stack.append((node, True))
+            stack.extend((a, False) for a in reversed(node.args))
+        n = len(inputs)
+        consts: Dict[int, Any] = {}
+        for node in order:
+            if node.op == "const":
+                node.index = n; consts[n] = node.value; n += 1
+            elif node.op != "input":
+                node.index = n; n += 1
+        last_use: Dict[int, int] = {}
+        ops = [node for node in order if node.op not in ("input", "const")]
+        for step, node in enumerate(ops):
+            for a in node.args:
+                last_use[a.index] = step
+        program = []
+        for step, node in enumerate(ops):
+            dead = tuple(sorted({a.index for a in node.args
+                                 if last_use[a.index] == step and a.index != out.index}))
+            program.append((_OPS[node.op][0], tuple(a.index for a in node.args), node.static, node.index, dead))
+        return E8Kernel(params, program, n, consts, out.index)
+
+def compile_e8(term: LambdaTerm, weights: Optional[Dict[str, Any]] = None,
+               consts: Optional[Dict[str, Any]] = None) -> E8Kernel:
+    """Compile a Λ⊗E₈ term to a batched NumPy kernel."""
+    return LambdaE8Compiler(weights, consts).compile(term)
@@ -13,7 +13,7 @@ def subst(body, var, val):
     if isinstance(body, A.Lam) and body.var == var: return body
     if isinstance(body, A.Lam): return A.Lam(body.var, subst(body.body, var, val))
     if isinstance(body, A.App): return A.App(subst(body.fn, var, val), subst(body.arg, var, val))
-    if isinstance(body, A.Let): return A.Let(body.var, subst(body.val, var, val), subst(body.body, var, val))
+    if isinstance(body, A.Let): return A.Let(body.var, subst(body.val, var, val), body.body if body.var==var else subst(body.body, var, val))
     if isinstance(body, A.Pair): return A.Pair(subst(body.fst, var, val), subst(body.snd, var, val))
     if isinstance(body, A.Fst): return A.Fst(subst(body.pair, var, val))
     if isinstance(body, A.Snd): return A.Snd(subst(body.pair, var, val))
@@ -65,8 +65,26 @@ def step(e):
         return e.pair.fst, True
     if isinstance(e, A.Snd) and isinstance(e.pair, A.Pair) and is_value(e.pair.snd):
         return e.pair.snd, True
+    if isinstance(e, (A.Fst, A.Snd)):
+        # reduce the operand, then the projected component of a pair
+        if not is_value(e.pair):
+            p, d = step(e.pair)
+            if d: return type(e)(p), True
+        elif isinstance(e.pair, A.Pair):
+            if isinstance(e, A.Fst):
+                p, d = step(e.pair.fst)
+                if d: return A.Fst(A.Pair(p, e.pair.snd)), True
+            else:
+                q, d = step(e.pair.snd)
+                if d: return A.Snd(A.Pair(e.pair.fst, q)), True
+        return e, False
     if isinstance(e, A.If) and isinstance(e.cond, A.Const) and isinstance(e.cond.value, bool):
         return (e.then if e.cond.value else e.els), True
+    if isinstance(e, A.If):
+        if not is_value(e.cond):
+            c, d = step(e.cond)
+            if d: return A.If(c, e.then, e.els), True
+        return e, False
     if isinstance(e, A.Mu):
         # μx.body -> body[x := μx.body]
         return subst(e.body, e.var, e), True
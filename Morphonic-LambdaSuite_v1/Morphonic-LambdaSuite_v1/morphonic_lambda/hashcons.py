@@ -0,0 +1,293 @@
+
+"""Hash-consed MGLC terms.
+
+intern(term) returns the canonical shared instance of a term (same ast
+classes, so everything that consumes ast nodes keeps working); equal
+subterms become one object. Free variables are computed per node on
+demand, and alpha_hash(term) gives a stable, alpha-invariant structural
+digest: bound variables are hashed by de Bruijn index, free ones by name.
+struct_hash(term) is the name-sensitive digest (equal only for equal
+terms), for keys that must not merge alpha-variants.
+replace(term, path, new) swaps one subterm and rebuilds only its spine.
+
+Lookups are keyed by child identity, so interning a node whose children
+are already interned, or re-interning a canonical node, is O(1).
+
+The tables hold canonical nodes only weakly: once nothing else refers to a
+node, its table entries, free variables and digests (and any cache
+registered with on_forget) are dropped with it.
+"""
+import hashlib
+import weakref
+from typing import Any, Dict, FrozenSet, Tuple
+from . import ast as A
+
+# class -> (scalar fields, child fields), in constructor order
+_SHAPE = {
+    A.Var: (("name",), ()),
+    A.Lam: (("var",), ("body",)),
+    A.App: ((), ("fn", "arg")),
+    A.Let: (("var",), ("val", "body")),
+    A.Const: (("name", "value"), ()),
+    A.Pair: ((), ("fst", "snd")),
+    A.Fst: ((), ("pair",)),
+    A.Snd: ((), ("pair",)),
+    A.If: ((), ("cond", "then", "els")),
+    A.Mu: (("var",), ("body",)),
+}
+# binder field of the child that it scopes over
+_BINDS = {A.Lam: ("var", "body"), A.Let: ("var", "body"), A.Mu: ("var", "body")}
+
+_TABLE: Dict[tuple, weakref.KeyedRef] = {}   # structural key -> ref to canonical node
+_CANON: Dict[int, weakref.KeyedRef] = {}     # id -> ref to canonical node
+_FV: Dict[int, FrozenSet[str]] = {}          # id -> free variables
+_DIGEST: Dict[int, Dict[tuple, bytes]] = {}  # id -> binding of free vars -> digest
+_SDIGEST: Dict[int, bytes] = {}              # id -> name-sensitive digest
+
+# accessors: class -> (scalar field values, child nodes)
+_PARTS = {
+    A.Var: lambda t: ((t.name,), ()),
+    A.Lam: lambda t: ((t.var,), (t.body,)),
+    A.App: lambda t: ((), (t.fn, t.arg)),
+    A.Let: lambda t: ((t.var,), (t.val, t.body)),
+    A.Const: lambda t: ((t.name, t.value), ()),
+    A.Pair: lambda t: ((), (t.fst, t.snd)),
+    A.Fst: lambda t: ((), (t.pair,)),
+    A.Snd: lambda t: ((), (t.pair,)),
+    A.If: lambda t: ((), (t.cond, t.then, t.els)),
+    A.Mu: lambda t: ((t.var,), (t.body,)),
+}
+
+def _scalar_key(v):
+    if type(v) is str:
+        return v
+    try:
+        hash(v)
+        return (type(v), v)
+    except TypeError:
+        return (type(v), id(v))
+
+def _key(cls, scalars, children) -> tuple:
+    return (cls, *map(_scalar_key, scalars), *map(id, children))
+
+def _forget(ref) -> None:
+    """Weakref callback: a canonical node died; drop everything keyed by it."""
+    i, key = ref.key
+    if _TABLE.get(key) is ref:
+        del _TABLE[key]
+    if _CANON.get(i) is ref:
+        del _CANON[i]
+        _FV.pop(i, None); _DIGEST.pop(i, None); _SDIGEST.pop(i, None)
+        for hook in _FORGET_HOOKS:
+            hook(i)
+
+def _canon(t) -> bool:
+    r = _CANON.get(id(t))
+    return r is not None and r() is t
+
+def _make(cls, scalars, children, node=None):
+    """Canonical node for cls with already-interned children; node, if
+    given, is an equal instance that may be adopted as the canonical one."""
+    key = _key(cls, scalars, children)
+    r = _TABLE.get(key)
+    if r is not None:
+        canon = r()
+        if canon is not None:
+            return canon
+    if node is None:
+        # ast classes list scalar fields before child fields
+        node = cls(*scalars, *children)
+    _TABLE[key] = _CANON[id(node)] = weakref.KeyedRef(node, _forget, (id(node), key))
+    return node
+
+def _fv(node) -> FrozenSet[str]:
+    """Free variables of an interned node, computed on first use."""
+    fv = _FV.get(id(node))
+    if fv is not None:
+        return fv
+    stack = [node]
+    while stack:
+        t = stack[-1]
+        if id(t) in _FV:
+            stack.pop()
+            continue
+        children = _PARTS[type(t)](t)[1]
+        todo = [c for c in children if id(c) not in _FV]
+        if todo:
+            stack.extend(todo)
+            continue
+        stack.pop()
+        cls = type(t)
+        if cls is A.Var:
+            fv = frozenset((t.name,))
+        elif cls in _BINDS:
+            fv = (_FV[id(children[-1])] - {t.var}).union(*(_FV[id(c)] for c in children[:-1]))
+        else:
+            fv = frozenset().union(*(_FV[id(c)] for c in children))
+        _FV[id(t)] = fv
+    return _FV[id(node)]
+
+def is_interned(term) -> bool:
+    return _canon(term)
+
+def intern(term):
+    """Canonical shared instance of term (iterative; safe for deep terms)."""
+    canon = _canon
+    if canon(term):
+        return term
+    done: Dict[int, Any] = {}     # id of a non-canonical node -> its canonical node
+    stack = [(term, None)]
+    while stack:
+        t, parts = stack[-1]
+        if parts is None:
+            if id(t) in done or canon(t):
+                stack.pop()
+                continue
+            get = _PARTS.get(type(t))
+            if get is None:
+                raise TypeError(f"Cannot intern {type(t).__name__}")
+            parts = get(t)
+            pending = [(c, None) for c in parts[1] if id(c) not in done and not canon(c)]
+            if pending:
+                stack[-1] = (t, parts)
+                stack.extend(pending)
+                continue
+        stack.pop()
+        kids = parts[1]
+        if done and any(id(c) in done for c in kids):
+            r = _make(type(t), parts[0], tuple([done.get(id(c), c) for c in kids]))
+        else:
+            # children already canonical: t itself can become canonical
+            r = _make(type(t), parts[0], kids, t)
+        if r is not t:
+            done[id(t)] = r
+    return done.get(id(term), term)
+
+def free_vars(term) -> FrozenSet[str]:
+    return _fv(intern(term))
+
+def binding(node, ctx: Tuple[str, ...]) -> tuple:
+    """De Bruijn index (or None) in ctx of each free variable of an interned
+    node, by sorted name. (node, binding) determines the node's meaning."""
+    return tuple(ctx.index(v) if v in ctx else None for v in sorted(_fv(node)))
+
+def _h(*parts: bytes) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    for p in parts:
+        h.update(p)
+    return h.digest()
+
+def _digest(node, ctx: Tuple[str, ...]) -> bytes:
+    b = binding(node, ctx)
+    ds = _DIGEST.get(id(node))
+    if ds is None:
+        ds = _DIGEST[id(node)] = {}
+    d = ds.get(b)
+    if d is not None:
+        return d
+    cls = type(node)
+    if cls is A.Var:
+        i = ctx.index(node.name) if node.name in ctx else None
+        d = _h(b"V", str(i).encode()) if i is not None else _h(b"F", node.name.encode("utf-8"))
+    elif cls is A.Const:
+        d = _h(b"C", node.name.encode("utf-8"), type(node.value).__name__.encode(), repr(node.value).encode("utf-8"))
+    else:
+        _, child_names = _SHAPE[cls]
+        parts = [cls.__name__.encode()]
+        for n in child_names:
+            inner = (node.var,) + ctx if cls in _BINDS and n == _BINDS[cls][1] else ctx
+            parts.append(_digest(getattr(node, n), inner))
+        d = _h(*parts)
+    ds[b] = d
+    return d
+
+def replace(term, path, new):
+    """term with the subterm at path (child field names from the root, e.g.
+    ("body", "fn")) replaced by new. Only the nodes along the path are
+    rebuilt; everything else stays shared."""
+    node = intern(term)
+    spine = []
+    for name in path:
+        if name not in _SHAPE[type(node)][1]:
+            raise ValueError(f"{type(node).__name__} has no child {name!r}")
+        spine.append((node, name))
+        node = getattr(node, name)
+    node = intern(new)
+    for parent, name in reversed(spine):
+        scal_names, child_names = _SHAPE[type(parent)]
+        node = _make(type(parent), [getattr(parent, n) for n in scal_names],
+                     [node if n == name else getattr(parent, n) for n in child_names])
+    return node
+
+def alpha_hash(term) -> str:
+    """Hex digest equal for alpha-equivalent terms, stable across processes."""
+    return _digest(intern(term), ()).hex()
+
+def _sdigest(node) -> bytes:
+    """Name-sensitive digest of an interned node (iterative)."""
+    d = _SDIGEST.get(id(node))
+    if d is not None:
+        return d
+    stack = [node]
+    while stack:
+        t = stack[-1]
+        if id(t) in _SDIGEST:
+            stack.pop()
+            continue
+        scalars, children = _PARTS[type(t)](t)
+        todo = [c for c in children if id(c) not in _SDIGEST]
+        if todo:
+            stack.extend(todo)
+            continue
+        stack.pop()
+        cls = type(t)
+        if cls is A.Const:
+            d = _h(b"C", t.name.encode("utf-8"), type(t.value).__name__.encode(), repr(t.value).encode("utf-8"))
+        else:
+            # names are length-prefixed so adjacent fields cannot run together
+            parts = [cls.__name__.encode()]
+            for v in scalars:
+                b = v.encode("utf-8")
+                parts += [len(b).to_bytes(4, "big"), b]
+            d = _h(*parts, *(_SDIGEST[id(c)] for c in children))
+        _SDIGEST[id(t)] = d
+    return _SDIGEST[id(node)]
+
+def struct_hash(term) -> str:
+    """Hex digest equal only for structurally equal terms (names included),
+    stable across processes."""
+    return _sdigest(intern(term)).hex()
+
+def clear() -> None:
+    """Drop all interned nodes and digests (and dependent caches)."""
+    _TABLE.clear(); _CANON.clear(); _FV.clear(); _DIGEST.clear(); _SDIGEST.clear()
+    for hook in _CLEAR_HOOKS:
+        hook()
+
+def size() -> int:
+    """Number of live canonical nodes."""
+    return len(_CANON)
+
+_CLEAR_HOOKS = []
+_FORGET_HOOKS = []
+
+def on_clear(hook) -> None:
+    """Register a cache that is keyed by node identity and must go with it."""
+    _CLEAR_HOOKS.append(hook)
+
+def on_forget(hook) -> None:
+    """Register hook(node_id), called when a canonical node is freed."""
+    _FORGET_HOOKS.append(hook)
+
+# ---- constructors returning canonical nodes
+
+def var(name: str): return _make(A.Var, [name], [])
+def lam(v: str, body): return _make(A.Lam, [v], [intern(body)])
+def app(fn, arg): return _make(A.App, [], [intern(fn), intern(arg)])
+def let(v: str, val, body): return _make(A.Let, [v], [intern(val), intern(body)])
+def const(name: str, value: Any): return _make(A.Const, [name, value], [])
+def pair(a, b): return _make(A.Pair, [], [intern(a), intern(b)])
+def fst(p): return _make(A.Fst, [], [intern(p)])
+def snd(p): return _make(A.Snd, [], [intern(p)])
+def if_(c, t, e): return _make(A.If, [], [intern(c), intern(t), intern(e)])
+def mu(v: str, body): return _make(A.Mu, [v], [intern(body)])
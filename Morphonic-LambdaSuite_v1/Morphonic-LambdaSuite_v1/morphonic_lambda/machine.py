@@ -0,0 +1,291 @@
+
+"""Environment machine for MGLC terms.
+
+Terms are compiled once to de Bruijn code and run on an iterative CEK-style
+machine: environments are shared linked frames, β/let/μ bind by pushing a
+frame instead of copying the body, and continuations live on an explicit
+stack, so a μ-recursion costs O(1) per step and needs no Python recursion.
+
+eval_machine(term, fuel) returns the same (normal form, steps) as
+eval.eval_normal for closed terms: the same reduction order, one step per
+β/δ/let/fst/snd/if/μ contraction, the same out-of-fuel rule, and stuck
+terms read back with the substitutions eval_normal would have made.
+
+Compilation goes through hash-consed nodes, so a repeated subterm compiles
+to one shared code object. Closed subterms (those that never look at the
+environment) are evaluated once: their value and step count are memoized
+and replayed, with fuel charged as if they had been reduced again.
+Code and memo entries are dropped together with their node (see
+hashcons.on_forget), so the caches only hold terms still in use.
+"""
+from typing import Any, Dict, Tuple
+from . import ast as A
+from . import hashcons as H
+from .eval import EvalError
+
+# opcodes
+VAR, LAM, APP, LET, CONST, PAIR, FST, SND, IF, MU = range(10)
+# continuation frames
+K_ARG, K_APPLY, K_LET, K_FST, K_SND, K_PROJ, K_IF, K_MEMO = range(8)
+
+_CODE: Dict[int, Dict[tuple, tuple]] = {}  # node id -> binding -> code
+_CLOSED: Dict[int, tuple] = {}      # id -> non-trivial code independent of env
+_MEMO: Dict[int, tuple] = {}        # id(code) -> (code, value, steps)
+_MEMO_MAX = 1 << 16
+
+def clear_memo() -> None:
+    _MEMO.clear()
+
+def _clear() -> None:
+    _CODE.clear(); _CLOSED.clear(); _MEMO.clear()
+
+def _forget(node_id: int) -> None:
+    for c in (_CODE.pop(node_id, None) or {}).values():
+        if _CLOSED.pop(id(c), None) is not None:
+            _MEMO.pop(id(c), None)
+
+H.on_clear(_clear)
+H.on_forget(_forget)
+
+def compile_term(e, ctx: Tuple = ()):
+    """Compile a named term to nested opcode tuples.
+
+    ctx holds the enclosing binder names, innermost first; a Var compiles
+    to (VAR, index, name), index None when free.
+    """
+    try:
+        return _compile(H.intern(e), tuple(ctx))
+    except TypeError:
+        raise EvalError(f"Unknown term: {e!r}")
+
+def _compile(e, ctx: Tuple):
+    b = H.binding(e, ctx)
+    codes = _CODE.get(id(e))
+    if codes is None:
+        codes = _CODE[id(e)] = {}
+    c = codes.get(b)
+    if c is not None:
+        return c
+    t = type(e)
+    if t is A.Var:
+        idx = ctx.index(e.name) if e.name in ctx else None
+        c = (VAR, idx, e.name)
+    elif t is A.Lam:
+        c = (LAM, e.var, _compile(e.body, (e.var,) + ctx))
+    elif t is A.App:
+        c = (APP, _compile(e.fn, ctx), _compile(e.arg, ctx))
+    elif t is A.Let:
+        c = (LET, e.var, _compile(e.val, ctx), _compile(e.body, (e.var,) + ctx))
+    elif t is A.Const:
+        # an equal copy: code must not keep its own node alive
+        c = (CONST, A.Const(e.name, e.value))
+    elif t is A.Pair:
+        c = (PAIR, _compile(e.fst, ctx), _compile(e.snd, ctx))
+    elif t is A.Fst:
+        c = (FST, _compile(e.pair, ctx))
+    elif t is A.Snd:
+        c = (SND, _compile(e.pair, ctx))
+    elif t is A.If:
+        c = (IF, _compile(e.cond, ctx), _compile(e.then, ctx), _compile(e.els, ctx))
+    else:
+        c = (MU, e.var, _compile(e.body, (e.var,) + ctx))
+    if c[0] in (APP, LET, FST, SND, IF, MU) and all(i is None for i in b):
+        _CLOSED[id(c)] = c
+    codes[b] = c
+    return c
+
+# ---- runtime values; environments are (value, rest) pairs ending in None
+
+class Clo:
+    """λ-closure: LAM code + environment."""
+    __slots__ = ("code", "env")
+    def __init__(self, code, env): self.code, self.env = code, env
+
+class PairV:
+    """Pair value; components stay unevaluated, as in eval_normal."""
+    __slots__ = ("code", "env")
+    def __init__(self, code, env): self.code, self.env = code, env
+
+class MuT:
+    """μ-bound variable: unfolds (one step) each time it is evaluated."""
+    __slots__ = ("code", "env")
+    def __init__(self, code, env): self.code, self.env = code, env
+
+class Stuck:
+    """A term with no further reductions, already read back."""
+    __slots__ = ("term",)
+    def __init__(self, term): self.term = term
+
+def _lookup(env, i):
+    for _ in range(i):
+        env = env[1]
+    return env[0]
+
+def _is_value(v) -> bool:
+    return not isinstance(v, Stuck)
+
+def _delta(f, a):
+    if isinstance(f, A.Const) and isinstance(a, A.Const) and isinstance(a.value, int):
+        if f.name == "succ": return A.Const("nat", a.value + 1)
+        if f.name == "pred": return A.Const("nat", max(0, a.value - 1))
+        if f.name == "iszero": return A.Const("bool", a.value == 0)
+    return None
+
+def readback(v):
+    """Named term for a machine value."""
+    if isinstance(v, A.Const): return v
+    if isinstance(v, Stuck): return v.term
+    if isinstance(v, Clo): return A.Lam(v.code[1], _readback_code(v.code[2], v.env, 1))
+    if isinstance(v, PairV):
+        return A.Pair(_readback_code(v.code[1], v.env, 0), _readback_code(v.code[2], v.env, 0))
+    if isinstance(v, MuT): return A.Mu(v.code[1], _readback_code(v.code[2], v.env, 1))
+    raise EvalError(f"Unknown value: {v!r}")
+
+def _readback_code(c, env, depth: int):
+    """Named term for code under env; the innermost `depth` binders are local."""
+    op = c[0]
+    if op == VAR:
+        if c[1] is None or c[1] < depth: return A.Var(c[2])
+        return readback(_lookup(env, c[1] - depth))
+    if op == LAM: return A.Lam(c[1], _readback_code(c[2], env, depth + 1))
+    if op == APP: return A.App(_readback_code(c[1], env, depth), _readback_code(c[2], env, depth))
+    if op == LET: return A.Let(c[1], _readback_code(c[2], env, depth), _readback_code(c[3], env, depth + 1))
+    if op == CONST: return c[1]
+    if op == PAIR: return A.Pair(_readback_code(c[1], env, depth), _readback_code(c[2], env, depth))
+    if op == FST: return A.Fst(_readback_code(c[1], env, depth))
+    if op == SND: return A.Snd(_readback_code(c[1], env, depth))
+    if op == IF:
+        return A.If(_readback_code(c[1], env, depth), _readback_code(c[2], env, depth),
+                    _readback_code(c[3], env, depth))
+    if op == MU: return A.Mu(c[1], _readback_code(c[2], env, depth + 1))
+    raise EvalError(f"Unknown opcode: {op}")
+
+def run(code, env=None, fuel: int = 10_000, steps: int = 0) -> Tuple[Any, int]:
+    """Evaluate code to a value or a stuck term; returns (value, steps)."""
+    stack = []
+    c, e = code, env
+    while True:
+        # ---- eval: c under e, until a value v is produced
+        op = c[0]
+        if _CLOSED.get(id(c)) is c:
+            hit = _MEMO.get(id(c))
+            if hit is not None and hit[0] is c:
+                steps += hit[2]
+                if steps >= fuel: raise EvalError("Out of fuel")
+                v = hit[1]
+                op = None
+            else:
+                stack.append((K_MEMO, c, steps))
+        if op is None:
+            pass
+        elif op == VAR:
+            if c[1] is None:
+                v = Stuck(A.Var(c[2]))
+            else:
+                v = _lookup(e, c[1])
+                if isinstance(v, MuT):
+                    steps += 1
+                    if steps >= fuel: raise EvalError("Out of fuel")
+                    c, e = v.code[2], (v, v.env)
+                    continue
+        elif op == LAM:
+            v = Clo(c, e)
+        elif op == CONST:
+            v = c[1]
+        elif op == PAIR:
+            v = PairV(c, e)
+        elif op == APP:
+            stack.append((K_ARG, c, e)); c = c[1]; continue
+        elif op == LET:
+            stack.append((K_LET, c, e)); c = c[2]; continue
+        elif op == FST:
+            stack.append((K_FST, c, e)); c = c[1]; continue
+        elif op == SND:
+            stack.append((K_SND, c, e)); c = c[1]; continue
+        elif op == IF:
+            stack.append((K_IF, c, e)); c = c[1]; continue
+        elif op == MU:
+            steps += 1
+            if steps >= fuel: raise EvalError("Out of fuel")
+            c, e = c[2], (MuT(c, e), e)
+            continue
+        else:
+            raise EvalError(f"Unknown opcode: {op}")
+
+        # ---- continue: hand v to the innermost frame
+        while True:
+            if not stack:
+                return v, steps
+            k = stack.pop()
+            tag = k[0]
+            if tag == K_MEMO:
+                if len(_MEMO) >= _MEMO_MAX:
+                    _MEMO.clear()
+                _MEMO[id(k[1])] = (k[1], v, steps - k[2])
+                continue
+            if tag == K_ARG:
+                stack.append((K_APPLY, v))
+                c, e = k[1][2], k[2]
+                break
+            if tag == K_APPLY:
+                f = k[1]
+                if isinstance(f, Clo) and _is_value(v):
+                    steps += 1
+                    if steps >= fuel: raise EvalError("Out of fuel")
+                    c, e = f.code[2], (v, f.env)
+                    break
+                r = _delta(f, v)
+                if r is not None:
+                    steps += 1
+                    if steps >= fuel: raise EvalError("Out of fuel")
+                    v = r
+                    continue
+                v = Stuck(A.App(readback(f), readback(v)))
+                continue
+            if tag == K_LET:
+                lc, le = k[1], k[2]
+                if _is_value(v):
+                    steps += 1
+                    if steps >= fuel: raise EvalError("Out of fuel")
+                    c, e = lc[3], (v, le)
+                    break
+                v = Stuck(A.Let(lc[1], v.term, _readback_code(lc[3], le, 1)))
+                continue
+            if tag == K_FST or tag == K_SND:
+                if isinstance(v, PairV):
+                    i = 1 if tag == K_FST else 2
+                    stack.append((K_PROJ, tag, v))
+                    c, e = v.code[i], v.env
+                    break
+                v = Stuck((A.Fst if tag == K_FST else A.Snd)(readback(v)))
+                continue
+            if tag == K_PROJ:
+                if _is_value(v):
+                    steps += 1
+                    if steps >= fuel: raise EvalError("Out of fuel")
+                    continue
+                p = k[2]
+                if k[1] == K_FST:
+                    v = Stuck(A.Fst(A.Pair(v.term, _readback_code(p.code[2], p.env, 0))))
+                else:
+                    v = Stuck(A.Snd(A.Pair(_readback_code(p.code[1], p.env, 0), v.term)))
+                continue
+            if tag == K_IF:
+                ic, ie = k[1], k[2]
+                if isinstance(v, A.Const) and isinstance(v.value, bool):
+                    steps += 1
+                    if steps >= fuel: raise EvalError("Out of fuel")
+                    c, e = (ic[2] if v.value else ic[3]), ie
+                    break
+                v = Stuck(A.If(readback(v), _readback_code(ic[2], ie, 0), _readback_code(ic[3], ie, 0)))
+                continue
+
+def eval_machine(e, fuel: int = 10_000):
+    """Drop-in alternative to eval.eval_normal: returns (normal form, steps)."""
+    v, steps = run(compile_term(e), None, fuel)
+    if isinstance(v, PairV):
+        # a pair at the root has its components reduced, left then right
+        a, steps = run(v.code[1], v.env, fuel, steps)
+        b, steps = run(v.code[2], v.env, fuel, steps)
+        return A.Pair(readback(a), readback(b)), steps
+    return readback(v), steps
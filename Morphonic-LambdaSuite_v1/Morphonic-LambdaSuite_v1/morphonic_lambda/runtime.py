@@ -1,8 +1,9 @@
-
-from typing import Any, Dict, Tuple, Optional
+from typing import Any, Dict, Tuple, Optional, List, Iterable
+from concurrent.futures import ProcessPoolExecutor
 from . import ast as A
-from .eval import eval_normal
-import json, hashlib
+from .eval import eval_normal, EvalError
+from .hashcons import struct_hash
+import json, hashlib, os, threading, time
 
 try:
     # Prefer unified build sidecar if installed
@@ -14,18 +15,157 @@ except Exception:
     except Exception:
         SpeedLight = None  # type: ignore
 
+DISK_DIR = ".speedlight-lambda/cache"
+LEDGER_PATH = ".speedlight-lambda/ledger.jsonl"
+
 def _hash_payload(payload: Dict[str, Any]) -> str:
     js = json.dumps(payload, sort_keys=True, default=str)
     return hashlib.sha256(js.encode("utf-8")).hexdigest()
 
+def _payload(term_hash: str) -> Dict[str, Any]:
+    # keyed by the name-sensitive node hash: eval_normal does not avoid
+    # capture, so alpha-variants may have different normal forms
+    return {"kind":"lambda_eval","term":term_hash}
+
+def _evaluate(term: Any, fuel: int):
+    """Pool worker: (result, error, cost); errors are not cached."""
+    t0 = time.time()
+    try:
+        res, n = eval_normal(term, fuel=fuel)
+    except (EvalError, RecursionError) as ex:
+        return None, f"{type(ex).__name__}: {ex}", 0.0
+    return {"result": res, "steps": n}, None, time.time() - t0
+
+class EvalSession:
+    """Long-lived evaluation context: one sidecar (memory/disk cache and
+    ledger) and one worker pool, reused by every call.
+
+    A session that creates its own sidecar stores results with the pickle5
+    codec, so cache hits return the same terms a fresh evaluation does.
+    """
+    def __init__(self, disk_dir: Optional[str]=DISK_DIR, ledger_path: Optional[str]=LEDGER_PATH,
+                 fuel: int=10_000, workers: Optional[int]=None, sidecar: Optional[Any]=None):
+        self.fuel = fuel
+        self.workers = workers
+        self._owns = sidecar is None
+        if sidecar is None and SpeedLight is not None:
+            sidecar = SpeedLight(disk_dir=disk_dir, ledger_path=ledger_path)
+        self.sidecar = sidecar
+        self._scopes = set()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_size = 0
+        self._lock = threading.Lock()
+
+    def _prepare(self, scope: str) -> None:
+        if not self._owns or scope in self._scopes:
+            return
+        with self._lock:
+            if scope not in self._scopes:
+                self.sidecar.set_codec(scope, "pickle5", live=True)
+                self._scopes.add(scope)
+
+    def eval(self, term: Any, scope: str="lambda", channel: int=3):
+        h = struct_hash(term)
+        if self.sidecar is None:
+            # Direct eval if sidecar not present
+            res, n = eval_normal(term, fuel=self.fuel)
+            return {"result": res, "steps": n, "cached": False}, 0.0, _hash_payload(_payload(h))
+        self._prepare(scope)
+        def compute():
+            res, n = eval_normal(term, fuel=self.fuel)
+            return {"result": res, "steps": n}
+        return self.sidecar.compute(_payload(h), scope=scope, channel=channel, compute_fn=compute)
+
+    def eval_many(self, terms: Iterable[Any], workers: Optional[int]=None, scope: str="lambda",
+                  channel: int=3, fuel: Optional[int]=None) -> List[Tuple[Any, float, Optional[str]]]:
+        """eval() over many terms, in order.
+
+        Equal terms are deduplicated (by struct_hash, as in eval), cache hits are served directly,
+        and the rest run in the worker pool (workers=1: in-process) under the
+        fuel limit. New results go to the ledger as one group commit.
+        A term that fails yields ({"error": ...}, 0.0, None) and is not cached.
+        """
+        terms = list(terms)
+        fuel = self.fuel if fuel is None else fuel
+        hashes = [struct_hash(t) for t in terms]
+        first: Dict[str, Any] = {}
+        for t, h in zip(terms, hashes):
+            first.setdefault(h, t)
+        sl = self.sidecar
+        if sl is not None:
+            self._prepare(scope)
+        done: Dict[str, Tuple[Any, float, Optional[str]]] = {}
+        todo = []
+        for h in first:
+            if sl is not None:
+                found, res, key = sl.lookup(_payload(h), scope=scope)
+                if found:
+                    done[h] = (res, 0.0, key)
+                    continue
+            todo.append(h)
+        results = self._map([first[h] for h in todo], fuel, workers)
+        fresh = []
+        for h, (res, err, cost) in zip(todo, results):
+            if err is not None:
+                done[h] = ({"error": err}, 0.0, None)
+            elif sl is None:
+                done[h] = (dict(res, cached=False), 0.0, _hash_payload(_payload(h)))
+            else:
+                fresh.append((h, res, cost))
+        if fresh:
+            keys = sl.store_many([(_payload(h), res, cost) for h, res, cost in fresh],
+                                 scope=scope, channel=channel)
+            for (h, res, cost), key in zip(fresh, keys):
+                done[h] = (res, cost, key)
+        return [done[h] for h in hashes]
+
+    def _map(self, terms: List[Any], fuel: int, workers: Optional[int]):
+        n = self.workers if workers is None else workers
+        n = n or os.cpu_count() or 1
+        if n <= 1 or len(terms) < 2:
+            return [_evaluate(t, fuel) for t in terms]
+        with self._lock:
+            if self._pool is None or self._pool_size != n:
+                if self._pool is not None:
+                    self._pool.shutdown()
+                self._pool, self._pool_size = ProcessPoolExecutor(max_workers=n), n
+            pool = self._pool
+        chunk = max(1, len(terms) // (4 * n))
+        return list(pool.map(_evaluate, terms, [fuel] * len(terms), chunksize=chunk))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+        if self._owns and self.sidecar is not None:
+            self.sidecar.ledger.close()
+
+_session: Optional[EvalSession] = None
+_session_lock = threading.Lock()
+
+def get_session() -> EvalSession:
+    """The module-level session, created on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = EvalSession()
+    return _session
+
+def configure_session(**kwargs) -> EvalSession:
+    """Replace the module-level session (EvalSession arguments)."""
+    global _session
+    with _session_lock:
+        old, _session = _session, EvalSession(**kwargs)
+    if old is not None:
+        old.close()
+    return _session
+
 def eval_with_sidecar(term: Any, scope: str="lambda", channel: int=3, cache: Optional[Any]=None):
-    payload = {"kind":"lambda_eval","term":repr(term)}
-    if SpeedLight is None:
-        # Direct eval if sidecar not present
-        res, n = eval_normal(term)
-        return {"result": res, "steps": n, "cached": False}, 0.0, _hash_payload(payload)
-    sl = cache or SpeedLight(disk_dir=".speedlight-lambda/cache", ledger_path=".speedlight-lambda/ledger.jsonl")
-    def compute():
-        res, n = eval_normal(term)
-        return {"result": res, "steps": n}
-    return sl.compute(payload, scope=scope, channel=channel, compute_fn=compute)
+    session = EvalSession(sidecar=cache) if cache is not None else get_session()
+    return session.eval(term, scope=scope, channel=channel)
+
+def eval_many(terms: Iterable[Any], workers: Optional[int]=None, scope: str="lambda", channel: int=3,
+              fuel: Optional[int]=None):
+    return get_session().eval_many(terms, workers=workers, scope=scope, channel=channel, fuel=fuel)
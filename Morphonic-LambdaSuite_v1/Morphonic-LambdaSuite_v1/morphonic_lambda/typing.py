@@ -1,51 +1,283 @@
 
-from typing import Dict, Optional, Tuple
+"""Type inference for MGLC terms.
+
+TypeChecker works over hash-consed terms and caches the type (or the type
+error) of every (node, environment) pair it visits, so re-checking a
+program after replacing one subterm only revisits the rebuilt spine.
+Environments are persistent hash tries shared between scopes (a Let adds
+one binding without copying), and both environments and types are
+hash-consed so a cache key is a pair of object identities.
+The traversal is iterative, so deep programs need no Python recursion.
+
+Like the machine's code cache, the type cache holds nodes only by id and
+drops their entries when hashcons frees them; interned types and
+environments are held weakly, so checking leaves nothing pinned.
+
+type_of(e, env) keeps its original signature and results and runs on a
+module-level TypeChecker.
+"""
+import weakref
+from typing import Any, Dict, Optional, Tuple
 from . import ast as A
-from .typesys import Type, Arrow, Bool, Nat, Prod, pretty
+from . import hashcons as H
+from .typesys import Type, TyVar, Arrow, Bool, Nat, Prod, Grade, pretty
 
 class TypeError_(Exception): pass
 
 Env = Dict[str, Type]
 
+# ---- hash-consed types
+
+# weak values: the ids in a key are children of the type it maps to, so
+# they stay valid while it lives (value-keyed types pin their first instance)
+_TYPES: "weakref.WeakValueDictionary[tuple, Type]" = weakref.WeakValueDictionary()
+
+def _ty(t: Type) -> Type:
+    """Canonical instance of a type (equal types become one object)."""
+    if isinstance(t, Arrow): return _arrow(_ty(t.src), _ty(t.dst))
+    if isinstance(t, Prod): return _prod(_ty(t.fst), _ty(t.snd))
+    if isinstance(t, (Bool, Nat)): key = (type(t),)
+    elif isinstance(t, TyVar): key = (TyVar, t.name)
+    elif isinstance(t, Grade): key = (Grade, t.value)
+    else:
+        # other (frozen dataclass) types compare by value
+        try: hash(t); key = (type(t), t)
+        except TypeError: key = (type(t), id(t))
+    c = _TYPES.get(key)
+    if c is None: c = _TYPES[key] = t
+    return c
+
+def _arrow(a: Type, b: Type) -> Type:
+    key = (Arrow, id(a), id(b))
+    c = _TYPES.get(key)
+    if c is None: c = _TYPES[key] = Arrow(a, b)
+    return c
+
+def _prod(a: Type, b: Type) -> Type:
+    key = (Prod, id(a), id(b))
+    c = _TYPES.get(key)
+    if c is None: c = _TYPES[key] = Prod(a, b)
+    return c
+
+BOOL, NAT = _ty(Bool()), _ty(Nat())
+
+# ---- persistent environments: 16-way hash tries with path copying
+
+_MISSING = object()
+
+class _Leaf:
+    __slots__ = ("h", "pairs")
+    def __init__(self, h, pairs): self.h, self.pairs = h, pairs
+
+def _trie_get(node, h, key):
+    shift = 0
+    while node is not None:
+        slot = node[(h >> shift) & 15]
+        if slot is None: return _MISSING
+        if isinstance(slot, _Leaf):
+            if slot.h == h:
+                for k, v in slot.pairs:
+                    if k == key: return v
+            return _MISSING
+        node, shift = slot, shift + 4
+    return _MISSING
+
+_EMPTY_NODE = (None,) * 16
+
+def _trie_set(node, h, key, val, shift=0):
+    node = node or _EMPTY_NODE
+    i = (h >> shift) & 15
+    slot = node[i]
+    if slot is None:
+        new = _Leaf(h, ((key, val),))
+    elif isinstance(slot, _Leaf):
+        if slot.h == h or shift >= 64:
+            new = _Leaf(h, tuple(p for p in slot.pairs if p[0] != key) + ((key, val),))
+        else:
+            sub = _trie_put_leaf(_EMPTY_NODE, slot, shift + 4)
+            new = _trie_set(sub, h, key, val, shift + 4)
+    else:
+        new = _trie_set(slot, h, key, val, shift + 4)
+    return node[:i] + (new,) + node[i + 1:]
+
+def _trie_put_leaf(node, leaf, shift):
+    i = (leaf.h >> shift) & 15
+    return node[:i] + (leaf,) + node[i + 1:]
+
+class TypeEnv:
+    """Persistent, hash-consed name -> type map; use TypeEnv.of(dict)."""
+    __slots__ = ("_root", "_base", "__weakref__")
+    _EMPTY: "TypeEnv"
+    # weak values; an env keeps its base alive, so the ids in its key stay valid
+    _SETS: "weakref.WeakValueDictionary[tuple, TypeEnv]" = weakref.WeakValueDictionary()
+
+    def __init__(self, root=None, base=None): self._root, self._base = root, base
+
+    def get(self, name: str, default=None):
+        v = _trie_get(self._root, hash(name) & 0xFFFFFFFFFFFFFFFF, name)
+        return default if v is _MISSING else v
+
+    def __contains__(self, name: str) -> bool:
+        return self.get(name, _MISSING) is not _MISSING
+
+    def set(self, name: str, t: Type) -> "TypeEnv":
+        """This env plus name: t; the same (env, name, type) gives the same object."""
+        t = _ty(t)
+        key = (id(self), name, id(t))
+        env = TypeEnv._SETS.get(key)
+        if env is None:
+            env = TypeEnv(_trie_set(self._root, hash(name) & 0xFFFFFFFFFFFFFFFF, name, t), self)
+            TypeEnv._SETS[key] = env
+        return env
+
+    @classmethod
+    def of(cls, env: Optional[Env] = None) -> "TypeEnv":
+        if isinstance(env, TypeEnv): return env
+        e = cls._EMPTY
+        for name, t in sorted((env or {}).items()):
+            e = e.set(name, t)
+        return e
+
+TypeEnv._EMPTY = TypeEnv()
+
+# ---- checker
+
+_VISIT, _DONE, _IF, _LET = range(4)
+
+def _const_type(e: A.Const) -> Type:
+    if e.name == "true" or e.name == "false": return BOOL
+    return NAT if isinstance(e.value, int) else BOOL
+
+class TypeChecker:
+    """Memoized, incremental type inference.
+
+    type_of(e, env) types a term; recheck(root, path, new, env) replaces the
+    subterm at path (see hashcons.replace) and types the result, reusing
+    every cached subtree. `visited` counts the nodes actually inferred
+    (cache misses) since construction.
+    """
+    def __init__(self):
+        self._cache: Dict[int, Dict[int, tuple]] = {}   # id node -> id env -> (env, type | error)
+        self.visited = 0
+        _CHECKERS.add(self)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def _forget(self, node_id: int) -> None:
+        self._cache.pop(node_id, None)
+
+    def type_of(self, e: object, env: Any = None) -> Type:
+        try:
+            node = H.intern(e)
+        except TypeError:
+            raise TypeError_(f"Unknown term: {e}")
+        return self._infer(node, TypeEnv.of(env))
+
+    def recheck(self, root: object, path, new: object, env: Any = None) -> Tuple[object, Type]:
+        root = H.replace(root, path, new)
+        return root, self._infer(root, TypeEnv.of(env))
+
+    def _store(self, e, env, t):
+        envs = self._cache.get(id(e))
+        if envs is None:
+            envs = self._cache[id(e)] = {}
+        envs[id(env)] = (env, t)
+
+    def _infer(self, root, env0: TypeEnv) -> Type:
+        cache = self._cache
+        vals = []
+        todo = [(_VISIT, root, env0)]
+        try:
+            while todo:
+                kind, e, env = todo.pop()
+                if kind == _VISIT:
+                    hit = cache.get(id(e))
+                    if hit is not None: hit = hit.get(id(env))
+                    if hit is not None and hit[0] is env:
+                        if isinstance(hit[1], TypeError_): raise TypeError_(*hit[1].args)
+                        vals.append(hit[1])
+                        continue
+                    self.visited += 1
+                    t = type(e)
+                    if t is A.Var:
+                        r = env.get(e.name, _MISSING)
+                        if r is _MISSING: raise TypeError_(f"Unbound var: {e.name}")
+                        self._store(e, env, r); vals.append(r)
+                    elif t is A.Const:
+                        r = _const_type(e)
+                        self._store(e, env, r); vals.append(r)
+                    elif t is A.Lam:
+                        # We require an annotation via env for parameter (convention)
+                        if e.var not in env: raise TypeError_(f"Missing type for param: {e.var}")
+                        todo.append((_DONE, e, env)); todo.append((_VISIT, e.body, env))
+                    elif t is A.App:
+                        todo.append((_DONE, e, env)); todo.append((_VISIT, e.arg, env)); todo.append((_VISIT, e.fn, env))
+                    elif t is A.Pair:
+                        todo.append((_DONE, e, env)); todo.append((_VISIT, e.snd, env)); todo.append((_VISIT, e.fst, env))
+                    elif t is A.Fst or t is A.Snd:
+                        todo.append((_DONE, e, env)); todo.append((_VISIT, e.pair, env))
+                    elif t is A.If:
+                        todo.append((_IF, e, env)); todo.append((_VISIT, e.cond, env))
+                    elif t is A.Let:
+                        todo.append((_LET, e, env)); todo.append((_VISIT, e.val, env))
+                    elif t is A.Mu:
+                        # crude iso-recursive typing: assume var type known
+                        if e.var not in env: raise TypeError_(f"Missing type for μ var: {e.var}")
+                        todo.append((_DONE, e, env)); todo.append((_VISIT, e.body, env))
+                    else:
+                        raise TypeError_(f"Unknown term: {e}")
+                elif kind == _IF:
+                    if vals.pop() is not BOOL: raise TypeError_("if cond must be Bool")
+                    todo.append((_DONE, e, env)); todo.append((_VISIT, e.els, env)); todo.append((_VISIT, e.then, env))
+                elif kind == _LET:
+                    todo.append((_DONE, e, env)); todo.append((_VISIT, e.body, env.set(e.var, vals.pop())))
+                else:
+                    t = type(e)
+                    if t is A.Lam:
+                        r = _arrow(env.get(e.var), vals.pop())
+                    elif t is A.App:
+                        ta = vals.pop(); tf = vals.pop()
+                        if not isinstance(tf, Arrow): raise TypeError_("Function type expected")
+                        if tf.src is not ta: raise TypeError_(f"Type mismatch: {pretty(tf.src)} vs {pretty(ta)}")
+                        r = tf.dst
+                    elif t is A.Pair:
+                        ts = vals.pop(); r = _prod(vals.pop(), ts)
+                    elif t is A.Fst or t is A.Snd:
+                        pt = vals.pop()
+                        if not isinstance(pt, Prod): raise TypeError_(("fst" if t is A.Fst else "snd") + " on non-pair")
+                        r = pt.fst if t is A.Fst else pt.snd
+                    elif t is A.If:
+                        te = vals.pop(); tt = vals.pop()
+                        if tt is not te: raise TypeError_("branches must agree")
+                        r = tt
+                    else:  # Let, Mu
+                        r = vals.pop()
+                    self._store(e, env, r); vals.append(r)
+        except TypeError_ as ex:
+            # the error belongs to every term still waiting on a result; a
+            # fresh copy is cached, since ex's traceback would pin the nodes
+            err = TypeError_(*ex.args)
+            self._store(e, env, err)
+            for k, n, en in todo:
+                if k != _VISIT: self._store(n, en, err)
+            raise
+        return vals[-1]
+
+_CHECKERS: "weakref.WeakSet[TypeChecker]" = weakref.WeakSet()
+
+def _forget(node_id: int) -> None:
+    for tc in list(_CHECKERS):
+        tc._forget(node_id)
+
+def _clear() -> None:
+    for tc in list(_CHECKERS):
+        tc.clear()
+
+H.on_clear(_clear)
+H.on_forget(_forget)
+
+_checker = TypeChecker()
+
 def type_of(e: object, env: Env) -> Type:
-    if isinstance(e, A.Var):
-        if e.name not in env: raise TypeError_(f"Unbound var: {e.name}")
-        return env[e.name]
-    if isinstance(e, A.Lam):
-        # We require an annotation via env for parameter (convention)
-        if e.var not in env: raise TypeError_(f"Missing type for param: {e.var}")
-        return Arrow(env[e.var], type_of(e.body, env))
-    if isinstance(e, A.App):
-        tf = type_of(e.fn, env); ta = type_of(e.arg, env)
-        if not isinstance(tf, Arrow): raise TypeError_("Function type expected")
-        if tf.src != ta: raise TypeError_(f"Type mismatch: {pretty(tf.src)} vs {pretty(ta)}")
-        return tf.dst
-    if isinstance(e, A.Const):
-        if e.name == "true" or e.name == "false": return Bool()
-        if isinstance(e.value, int): return Nat()
-        return Nat() if isinstance(e.value, int) else Bool()
-    if isinstance(e, A.Pair):
-        return Prod(type_of(e.fst, env), type_of(e.snd, env))
-    if isinstance(e, A.Fst):
-        pt = type_of(e.pair, env)
-        if not isinstance(pt, Prod): raise TypeError_("fst on non-pair")
-        return pt.fst
-    if isinstance(e, A.Snd):
-        pt = type_of(e.pair, env)
-        if not isinstance(pt, Prod): raise TypeError_("snd on non-pair")
-        return pt.snd
-    if isinstance(e, A.If):
-        tc = type_of(e.cond, env)
-        if not isinstance(tc, Bool): raise TypeError_("if cond must be Bool")
-        tt = type_of(e.then, env); te = type_of(e.els, env)
-        if tt != te: raise TypeError_("branches must agree")
-        return tt
-    if isinstance(e, A.Let):
-        tv = type_of(e.val, env)
-        env2 = dict(env); env2[e.var] = tv
-        return type_of(e.body, env2)
-    if isinstance(e, A.Mu):
-        # crude iso-recursive typing: assume var type known
-        if e.var not in env: raise TypeError_(f"Missing type for μ var: {e.var}")
-        return type_of(e.body, env)
-    raise TypeError_(f"Unknown term: {e}")
+    return _checker.type_of(e, env)
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from morphonic_lambda.e8_bridge import GeometricLambdaCapture, LambdaE8Builder, LambdaE8Evaluator, LambdaTerm
+from morphonic_lambda.e8_kernels import compile_e8, E8CompileError, _e8_embed
+
+def _softmax(x):
+    z = np.exp(x - x.max(axis=-1, keepdims=True))
+    return z / z.sum(axis=-1, keepdims=True)
+
+def test_attention_matches_numpy():
+    rng = np.random.default_rng(0)
+    Q, K, V = (rng.standard_normal((4, 6, 8)) for _ in range(3))
+    k = compile_e8(GeometricLambdaCapture().capture_attention(8, 8, 8, 1))
+    assert k.params == ["Q", "K", "V"] and k.n_ops == 5
+    ref = _softmax(Q @ K.transpose(0, 2, 1) / np.sqrt(8)) @ V
+    assert np.allclose(k(Q, K, V), ref)
+    assert np.allclose(k(Q[0], K=K[0], V=V[0]), ref[0])
+
+def test_feedforward_with_weights_and_default_projection():
+    rng = np.random.default_rng(1)
+    W1, W2 = rng.standard_normal((32, 8)), rng.standard_normal((8, 32))
+    x = rng.standard_normal((5, 8))
+    ffn = GeometricLambdaCapture().capture_feedforward(8, 32, 8)
+    h = x @ W1.T
+    ref = (0.5 * h * (1 + np.tanh(np.sqrt(2 / np.pi) * (h + 0.044715 * h ** 3)))) @ W2.T
+    assert np.allclose(compile_e8(ffn, weights={"e8_project_0": W1, "e8_project_1": W2})(x), ref)
+    assert compile_e8(ffn)(x).shape == (5, 8)
+    with pytest.raises(E8CompileError):
+        compile_e8(ffn, weights={"e8_project_0": W1.T})
+
+def test_cse_folding_and_inlining():
+    b = LambdaE8Builder()
+    x = b.var("x")
+    sm = lambda t: LambdaTerm("e8_op", ("softmax", [t]))
+    scale = lambda t, c: LambdaTerm("e8_op", ("scale", [t, c]))
+    twice = LambdaTerm("e8_op", ("dot", [sm(scale(scale(x, 2.0), 0.5)), sm(x)]))
+    k = compile_e8(b.abs("x", twice))
+    assert k.n_ops == 2                       # one softmax (scales cancel), one dot
+    # constants fold entirely; β-redexes are inlined
+    c = np.arange(4.0).reshape(2, 2)
+    term = b.abs("y", b.app(b.abs("z", LambdaTerm("e8_op", ("dot", [sm(b.var("C")), b.var("z")]))), b.var("y")))
+    k2 = compile_e8(term, consts={"C": c})
+    assert k2.n_ops == 1 and np.allclose(k2(np.eye(2)), _softmax(c))
+    # dihedral chains fuse; D_4^1 applied four times is the identity
+    d = b.var("v")
+    for _ in range(4):
+        d = b.dihedral(4, 1, False, d)
+    v = np.arange(8.0)
+    assert compile_e8(b.abs("v", d)).n_ops == 0
+    r = compile_e8(b.abs("v", b.dihedral(4, 1, True, b.dihedral(4, 1, True, d))))
+    assert r.n_ops == 0 and np.allclose(r(v), v)
+
+def test_e8_embed_and_errors():
+    p = _e8_embed(np.array([[0.1, 0.9, 0, 0, 0, 0, 0, 0.2], [0.4] * 8]))
+    assert np.allclose(p, [[0, 1, 0, 0, 0, 0, 0, 1], [0.5] * 8])
+    b = LambdaE8Builder()
+    with pytest.raises(E8CompileError):
+        compile_e8(b.abs("x", b.var("y")))
+    with pytest.raises(E8CompileError):
+        compile_e8(b.abs("x", LambdaTerm("e8_op", ("lookup", [b.var("x"), "vocab"]))))
+
+def test_evaluator_linked_environment():
+    b = LambdaE8Builder()
+    # (λx. λy. λx. (x y)) a b c: the inner x shadows, y comes from the outer frame
+    k = b.abs("x", b.abs("y", b.abs("x", b.app(b.var("x"), b.var("y")))))
+    t = b.app(b.app(b.app(k, b.var("a")), b.var("b")), b.var("c"))
+    ev = LambdaE8Evaluator()
+    assert ev.evaluate(t) == ("app", "c", "b")
+    assert ev.evaluate(t, {"c": 1}) == ("app", 1, "b")
+    clo = ev.evaluate(b.app(k, b.var("a")), {"a": 5})
+    assert clo[0] == "closure" and clo[2] == ("x", 5, {"a": 5})
@@ -0,0 +1,76 @@
+import random
+from morphonic_lambda import ast as A, eval as E, hashcons as H
+from morphonic_lambda.machine import eval_machine
+
+def test_intern_shares_equal_subterms():
+    a = A.App(A.Lam("x", A.Var("x")), A.Const("nat", 1))
+    b = A.App(A.Lam("x", A.Var("x")), A.Const("nat", 1))
+    ia, ib = H.intern(a), H.intern(b)
+    assert ia is ib and ia == a and H.intern(ia) is ia
+    assert H.app(H.lam("x", H.var("x")), H.const("nat", 1)) is ia
+    assert H.const("nat", 1) is not H.const("nat", True)
+    assert H.free_vars(A.Let("x", A.Var("y"), A.App(A.Var("x"), A.Var("z")))) == {"y", "z"}
+
+def test_alpha_hash():
+    k = lambda x, y: A.Lam(x, A.Lam(y, A.App(A.Var(x), A.Var(y))))
+    assert H.alpha_hash(k("a", "b")) == H.alpha_hash(k("p", "q"))
+    assert H.alpha_hash(k("a", "b")) != H.alpha_hash(A.Lam("a", A.Lam("b", A.App(A.Var("b"), A.Var("a")))))
+    # free variables are hashed by name
+    assert H.alpha_hash(A.Var("x")) != H.alpha_hash(A.Var("y"))
+    assert H.alpha_hash(A.Lam("x", A.Var("y"))) != H.alpha_hash(A.Lam("x", A.Var("x")))
+    assert H.alpha_hash(A.Mu("f", A.Var("f"))) == H.alpha_hash(A.Mu("g", A.Var("g")))
+    # the structural hash keeps binder names
+    assert H.struct_hash(k("a", "b")) != H.struct_hash(k("p", "q"))
+    assert H.struct_hash(k("a", "b")) == H.struct_hash(k("a", "b"))
+    assert H.struct_hash(A.Var("ab")) != H.struct_hash(A.Lam("a", A.Var("b")))
+
+def _random_term(rng, depth, names, pool):
+    if pool and rng.random() < 0.2:
+        return rng.choice(pool)
+    if depth == 0:
+        r = rng.random()
+        if r < 0.4 and names: return A.Var(rng.choice(names))
+        if r < 0.7: return A.Const("nat", rng.randrange(3))
+        return A.Const(rng.choice(["succ", "pred", "iszero"]), None)
+    kind = rng.randrange(6)
+    sub = lambda ns=names: _random_term(rng, depth - 1, ns, pool)
+    if kind == 0:
+        v = rng.choice("xyz"); t = A.Lam(v, sub(names + [v]))
+    elif kind == 1:
+        t = A.App(sub(), sub())
+    elif kind == 2:
+        v = rng.choice("xyz"); t = A.Let(v, sub(), sub(names + [v]))
+    elif kind == 3:
+        t = A.Pair(sub(), sub())
+    elif kind == 4:
+        t = (A.Fst if rng.random() < 0.5 else A.Snd)(sub())
+    else:
+        t = A.If(sub(), sub(), sub())
+    if not H.free_vars(t):
+        pool.append(t)
+    return t
+
+def test_memoized_machine_matches_substitution_evaluator():
+    rng = random.Random(7)
+    pool = []
+    for _ in range(120):
+        t = _random_term(rng, 4, [], pool)
+        try:
+            expected = E.eval_normal(t, fuel=500)
+        except E.EvalError:
+            continue
+        # second run is served from the memo for closed subterms
+        assert eval_machine(t, fuel=500) == expected
+        assert eval_machine(t, fuel=500) == expected
+
+def test_tables_release_dead_terms():
+    import gc
+    from morphonic_lambda import machine as M
+    gc.collect()
+    base = (H.size(), len(M._CODE), len(M._CLOSED))
+    t = A.Let("u", A.Const("nat", 987654), A.App(A.Lam("v", A.Var("v")), A.Var("u")))
+    assert eval_machine(t)[0] == A.Const("nat", 987654) and H.alpha_hash(t)
+    assert H.size() > base[0] and len(M._CLOSED) > base[2]
+    del t
+    gc.collect()
+    assert (H.size(), len(M._CODE), len(M._CLOSED)) == base
@@ -0,0 +1,65 @@
+
+import pytest
+from morphonic_lambda import ast as A, eval as E
+from morphonic_lambda.machine import eval_machine
+
+ZERO = A.Const("nat", 0)
+
+def _count_up():
+    # μf. λn. if iszero n then 0 else succ (f (pred n))  -- non-tail recursion
+    return A.Mu("f", A.Lam("n",
+        A.If(A.App(A.Const("iszero", None), A.Var("n")),
+             ZERO,
+             A.App(A.Const("succ", None), A.App(A.Var("f"), A.App(A.Const("pred", None), A.Var("n")))))))
+
+SAMPLES = [
+    A.App(A.Lam("x", A.Var("x")), A.Const("nat", 7)),
+    A.App(A.Const("succ", None), A.Const("nat", 2)),
+    A.Fst(A.Pair(A.Const("nat", 1), A.Const("nat", 2))),
+    A.Snd(A.Pair(A.Var("z"), A.App(A.Const("pred", None), A.Const("nat", 4)))),
+    A.Let("x", A.Const("nat", 1), A.Let("x", A.Const("nat", 2), A.Var("x"))),
+    A.Pair(A.App(A.Lam("x", A.Pair(A.Var("x"), A.Var("x"))), ZERO), A.Mu("y", A.Lam("k", A.Var("y")))),
+    A.If(A.App(A.Var("z"), ZERO), A.Var("z"), ZERO),
+    A.App(A.Lam("x", A.Lam("y", A.App(A.Var("x"), A.Var("y")))), A.Const("succ", None)),
+    A.App(_count_up(), A.Const("nat", 25)),
+]
+
+@pytest.mark.parametrize("term", SAMPLES)
+def test_machine_matches_substitution_evaluator(term):
+    assert eval_machine(term) == E.eval_normal(term)
+
+def test_machine_fuel_accounting():
+    t = A.App(_count_up(), A.Const("nat", 25))
+    _, n = E.eval_normal(t)
+    assert eval_machine(t, fuel=n + 1) == E.eval_normal(t, fuel=n + 1)
+    for ev in (E.eval_normal, eval_machine):
+        with pytest.raises(E.EvalError):
+            ev(t, fuel=n)
+        with pytest.raises(E.EvalError):
+            ev(A.Mu("x", A.Var("x")), fuel=50)
+
+def test_machine_recursion_is_linear():
+    import sys
+    from morphonic_lambda import machine as M
+    f = _count_up()  # kept alive, so its compiled code is reused by every run
+    def run(k):
+        v, steps = eval_machine(A.App(f, A.Const("nat", k)), fuel=10**7)
+        assert v == A.Const("nat", k)
+        return steps
+    s1, s2 = run(20_000), run(80_000)
+    assert s2 - s1 == 6 * 60_000     # fixed steps per level
+    # machine work: Python lines executed in machine.py, deterministic (no timing)
+    def work(k):
+        n = 0
+        def count(frame, event, arg):
+            nonlocal n
+            n += event == "line"
+            return count
+        sys.settrace(lambda frame, event, arg: count if frame.f_code.co_filename == M.__file__ else None)
+        try:
+            run(k)
+        finally:
+            sys.settrace(None)
+        return n
+    w1, w2, w4 = work(2_000), work(4_000), work(8_000)
+    assert w4 - w2 == 2 * (w2 - w1)  # the same work per level at every depth
@@ -0,0 +1,67 @@
+import pytest
+from morphonic_lambda import ast as A, runtime as R
+
+TERMS = [
+    A.App(A.Lam("x", A.Var("x")), A.Const("nat", 1)),
+    A.App(A.Lam("y", A.Var("y")), A.Const("nat", 1)),      # alpha-variant: cached separately
+    A.App(A.Const("succ", None), A.Const("nat", 2)),
+    A.Mu("x", A.Var("x")),                                  # runs out of fuel
+]
+
+def _sidecar_or_none(tmp_path):
+    if R.SpeedLight is None:
+        return None
+    return R.SpeedLight(disk_dir=str(tmp_path / "cache"), ledger_path=str(tmp_path / "ledger.jsonl"))
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_eval_many_dedupes_and_reports_errors(tmp_path, workers):
+    s = R.EvalSession(fuel=200, sidecar=_sidecar_or_none(tmp_path))
+    try:
+        out = s.eval_many(TERMS * 3, workers=workers)
+    finally:
+        s.close()
+    assert len(out) == 12
+    assert out[0][0]["result"] == out[1][0]["result"] == A.Const("nat", 1)
+    assert out[0][2] != out[1][2]
+    assert out[2][0]["result"] == A.Const("nat", 3) and out[2][0]["steps"] == 1
+    assert "Out of fuel" in out[3][0]["error"] and out[3][2] is None
+    assert out[4:8] == out[0:4]
+
+def test_module_session_is_reused(monkeypatch):
+    monkeypatch.setattr(R, "_session", None)
+    s = R.configure_session(disk_dir=None, ledger_path=None, fuel=50)
+    try:
+        assert R.get_session() is s and s.fuel == 50
+        assert R.eval_with_sidecar(TERMS[2])[0]["result"] == A.Const("nat", 3)
+        assert R.eval_many(TERMS[:3], workers=1)[1][0]["result"] == A.Const("nat", 1)
+    finally:
+        s.close()
+
+# eval_normal does not avoid capture: these alpha-variants have normal forms
+# that are not alpha-equivalent (y is captured in the first only)
+CAPTURE = [
+    A.App(A.Lam("x", A.Lam("y", A.Var("x"))), A.Lam("z", A.Var("y"))),
+    A.App(A.Lam("x", A.Lam("w", A.Var("x"))), A.Lam("z", A.Var("y"))),
+]
+
+def test_alpha_variants_are_not_shared(tmp_path):
+    from morphonic_lambda.eval import eval_normal
+    expected = [eval_normal(t)[0] for t in CAPTURE]
+    assert expected[0] == A.Lam("y", A.Lam("z", A.Var("y")))
+    assert expected[1] == A.Lam("w", A.Lam("z", A.Var("y")))
+    s = R.EvalSession(sidecar=_sidecar_or_none(tmp_path))
+    try:
+        out = [s.eval(t) for t in CAPTURE]
+    finally:
+        s.close()
+    assert [o[0]["result"] for o in out] == expected and out[0][2] != out[1][2]
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_eval_many_keeps_alpha_variants_apart(tmp_path, workers):
+    from morphonic_lambda.eval import eval_normal
+    s = R.EvalSession(sidecar=_sidecar_or_none(tmp_path))
+    try:
+        out = s.eval_many(CAPTURE, workers=workers)
+    finally:
+        s.close()
+    assert [o[0]["result"] for o in out] == [eval_normal(t)[0] for t in CAPTURE]
@@ -0,0 +1,72 @@
+import pytest
+from morphonic_lambda import ast as A, hashcons as H
+from morphonic_lambda.typing import TypeChecker, TypeEnv, TypeError_, type_of
+from morphonic_lambda.typesys import Arrow, Bool, Nat, Prod
+
+ENV = {"f": Arrow(Nat(), Nat()), "p": Arrow(Nat(), Bool()), "n": Nat()}
+
+def _block(v):
+    return A.If(A.App(A.Var("p"), v),
+                A.Fst(A.Pair(A.App(A.Var("f"), v), A.Const("true", True))),
+                A.App(A.Var("f"), A.Const("nat", 1)))
+
+def _chain(n):
+    body = A.Var(f"x{n - 1}")
+    for i in reversed(range(n)):
+        body = A.Let(f"x{i}", _block(A.Var(f"x{i - 1}") if i else A.Var("n")), body)
+    return body
+
+def test_types_and_errors():
+    assert type_of(A.Pair(A.Var("n"), A.Const("true", True)), ENV) == Prod(Nat(), Bool())
+    assert type_of(A.Lam("n", A.App(A.Var("p"), A.Var("n"))), ENV) == Arrow(Nat(), Bool())
+    assert type_of(A.Let("y", A.Var("f"), A.Var("y")), {**ENV, "y": Bool()}) == Arrow(Nat(), Nat())
+    for bad, msg in [(A.Var("z"), "Unbound var"), (A.App(A.Var("f"), A.Const("true", True)), "Type mismatch"),
+                     (A.If(A.Var("n"), A.Var("n"), A.Var("n")), "if cond"), (A.Fst(A.Var("n")), "fst on non-pair")]:
+        for _ in range(2):  # the second time comes from the cache
+            with pytest.raises(TypeError_, match=msg):
+                type_of(bad, ENV)
+
+def test_other_types_compare_by_value():
+    from morphonic_lambda.modal import Box
+    env = {"f": Arrow(Box(Nat()), Nat()), "b": Box(Nat())}
+    assert type_of(A.App(A.Var("f"), A.Var("b")), env) == Nat()
+
+def test_persistent_env():
+    e = TypeEnv.of(ENV)
+    e2 = e.set("x", Bool())
+    assert "x" in e2 and "x" not in e and e2.get("f") == ENV["f"]
+    assert e.set("x", Bool()) is e2 and TypeEnv.of(dict(ENV)) is e
+
+def test_incremental_recheck_visits_only_the_spine():
+    tc = TypeChecker()
+    prog = H.intern(_chain(300))
+    assert tc.type_of(prog, ENV) == Nat()
+    before = tc.visited
+    assert tc.type_of(prog, ENV) == Nat() and tc.visited == before
+    path = ("body",) * 150 + ("val", "then", "pair", "fst", "arg")
+    prog2, t = tc.recheck(prog, path, A.Const("nat", 5), ENV)
+    assert t == Nat() and tc.visited - before <= len(path) + 2
+    # breaking the program is found as cheaply, and remembered
+    before = tc.visited
+    with pytest.raises(TypeError_, match="Type mismatch"):
+        tc.recheck(prog2, path, A.Const("true", True), ENV)
+    assert tc.visited - before <= len(path) + 2
+
+def test_deep_program_needs_no_recursion():
+    assert TypeChecker().type_of(_chain(2000), ENV) == Nat()
+
+def test_checking_pins_no_terms():
+    import gc
+    from morphonic_lambda import typing as T
+    gc.collect()
+    base = (H.size(), len(T._checker._cache), len(T.TypeEnv._SETS), len(T._TYPES))
+    for i in range(200):
+        prog = A.Let("pin_u", A.Const("nat", 10_000 + i), A.Pair(A.Var("pin_u"), A.Lam("pin_v", A.Var("pin_v"))))
+        env = {"pin_v": Prod(Nat(), Arrow(Bool(), Bool()))}
+        assert type_of(prog, env) == Prod(Nat(), Arrow(Prod(Nat(), Arrow(Bool(), Bool())), Prod(Nat(), Arrow(Bool(), Bool()))))
+        with pytest.raises(TypeError_):
+            type_of(A.App(A.Const("nat", 20_000 + i), A.Var("pin_v")), env)
+    assert H.size() > base[0] and len(T._checker._cache) > base[1]
+    del prog
+    gc.collect()
+    assert (H.size(), len(T._checker._cache), len(T.TypeEnv._SETS), len(T._TYPES)) == base
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+CQE Meta Parallel Embedding Benchmark
+=====================================
+
+Compares the thread-pool and process-pool backends of
+VectorizedBatchEngine.embed_batch_parallel (plus the single-process
+columnar kernel) across batch sizes, and reports where the process
+backend starts to win.
+
+Usage:
+    python benchmark_parallel_embedding.py [n_workers] [max_batch]
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from cqe_meta import MockValidator, VectorizedBatchEngine
+
+
+def _time(fn, repeats=3):
+    """Best-of-N wall time in seconds."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(n_workers: int, max_batch: int) -> None:
+    engine = VectorizedBatchEngine()
+    validator = MockValidator(dimension=8)
+
+    print("\n" + "="*70)
+    print(f"Parallel embedding: {n_workers} workers, {os.cpu_count()} CPUs")
+    print("="*70 + "\n")
+    print(f"{'N':>9} {'thread s':>10} {'process s':>10} {'columnar s':>11} {'speedup':>8}")
+
+    crossover = None
+    n = 256
+    while n <= max_batch:
+        samples = validator.generate_samples(n)
+
+        # The thread path is per-row Python; skip it once it gets too slow
+        if n <= 32768:
+            t_thread = _time(lambda: engine.embed_batch_parallel(
+                "BENCH", samples, 7, False, n_workers=n_workers, backend="thread"), repeats=1)
+        else:
+            t_thread = float("nan")
+        t_process = _time(lambda: engine.embed_batch_columnar_parallel(
+            "BENCH", samples, 7, False, n_workers=n_workers))
+        t_columnar = _time(lambda: engine.embed_batch_columnar("BENCH", samples, 7, False))
+
+        speedup = t_thread / t_process
+        print(f"{n:>9} {t_thread:>10.4f} {t_process:>10.4f} {t_columnar:>11.4f} {speedup:>7.1f}x")
+
+        if crossover is None and t_process < t_thread:
+            crossover = n
+        n *= 4
+
+    print()
+    if crossover is None:
+        print("Process backend never beat the thread backend in this range")
+    else:
+        print(f"Process backend faster than thread backend from N = {crossover}")
+
+
+if __name__ == "__main__":
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else (os.cpu_count() or 4)
+    max_batch = int(sys.argv[2]) if len(sys.argv) > 2 else 262144
+    run_benchmark(workers, max_batch)
@@ -18,6 +18,7 @@ Main Components:
 - batch: Vectorized + parallel batch processing
 - async_controller: Async orchestrator with cached indices
 - kakeya: Manifold shape analysis via PCA and S² coverage
+- cache: Persistent on-disk cache of analysis results
 - validators: Type-safe interfaces to CQE_PRODUCTION validators
 - controller: Central orchestrator for cross-world queries
 
@@ -31,15 +32,25 @@ Quick Start:
 __version__ = "2.2.0-ultra"
 
 from .async_controller import AsyncMetaWorldController, SimilarityIndex, run_async
-from .batch import StreamingEmbeddingWriter, VectorizedBatchEngine
+from .batch import BatchEmbeddingResult, StreamingEmbeddingWriter, VectorizedBatchEngine
+from .cache import AnalysisCache
+from .columnar import (
+    ColumnarEmbeddingStore,
+    EmbeddingColumns,
+    convert_columnar_to_jsonl,
+    convert_jsonl_to_columnar,
+)
 from .config import CQEMetaConfig, PathConfig, get_config, set_config
 from .controller import MetaWorldController
 from .embedding import EmbeddingStore
-from .kakeya import KakeyaAnalyzer, KakeyaMetrics
+from .kakeya import KakeyaAnalyzer, KakeyaMetrics, StreamingKakeyaAnalyzer
 from .provenance import (
     ComputationalReceipt,
     ProvenanceEmbeddingPipeline,
     ProvenanceMetadata,
+    ProvenanceSession,
+    get_provenance_session,
+    set_provenance_session,
 )
 from .validators import (
     MockValidator,
@@ -67,17 +78,27 @@ __all__ = [
     "ComputationalReceipt",
     "ProvenanceEmbeddingPipeline",
     "ProvenanceMetadata",
+    "ProvenanceSession",
+    "get_provenance_session",
+    "set_provenance_session",
     "EmbeddingReceipt",  # alias
     "EmbeddingPipeline",  # alias
     # Batch Processing
     "VectorizedBatchEngine",
+    "BatchEmbeddingResult",
     "StreamingEmbeddingWriter",
     # Storage
     "EmbeddingStore",
+    "ColumnarEmbeddingStore",
+    "EmbeddingColumns",
+    "convert_jsonl_to_columnar",
+    "convert_columnar_to_jsonl",
     # Analysis
     "KakeyaAnalyzer",
     "KakeyaMetrics",
+    "StreamingKakeyaAnalyzer",
     "SimilarityIndex",
+    "AnalysisCache",
     # Validators
     "ValidatorLoader",
     "YangMillsValidatorAdapter",
@@ -9,27 +9,49 @@ and cached analysis results.
 from __future__ import annotations
 
 import asyncio
+import os
 import pickle
 from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 
 import numpy as np
 
+from .cache import AnalysisCache
+from .columnar import EmbeddingColumns
 from .config import CQEMetaConfig, get_config
-from .controller import ClusterManager, MetaWorldController, WorldDescriptor
+from .controller import (
+    ClusterManager,
+    MetaWorldController,
+    WorldData,
+    WorldDescriptor,
+    analyze_world_data,
+    load_world_data,
+)
 from .kakeya import KakeyaAnalyzer, KakeyaMetrics
 from .provenance import ComputationalReceipt
 
 
 class SimilarityIndex:
-    """Pre-computed similarity index for fast queries."""
+    """Pre-computed similarity index for fast queries.
+    
+    The index is incremental: adding, replacing or removing one world
+    only recomputes that world's rows and columns of the distance matrix.
+    """
     
     def __init__(self):
-        self.distance_matrix: Optional[np.ndarray] = None
+        self.clear()
+    
+    def clear(self) -> None:
+        """Reset to an empty index."""
+        self.distance_matrix: Optional[np.ndarray] = np.zeros((0, 0))
         self.labels: List[str] = []
         self.label_to_idx: Dict[str, int] = {}
         self.metrics_cache: Dict[str, KakeyaMetrics] = {}
+        
+        # (n, 3) rows of (K, log10 vol, log10 n) and their validity mask
+        self.features = np.zeros((0, 3))
+        self.valid = np.zeros(0, dtype=bool)
     
     def build(
         self,
@@ -37,30 +59,79 @@ class SimilarityIndex:
         analyzer: KakeyaAnalyzer
     ) -> None:
         """Build similarity index from world clusters."""
+        self.clear()
+        for world_id, clusters in world_clusters.items():
+            metrics = {
+                cluster_name: analyzer.analyze_embeddings(receipts)
+                for cluster_name, receipts in clusters.items()
+            }
+            self.update_world(world_id, metrics, analyzer)
+    
+    def update_world(
+        self,
+        world_id: str,
+        cluster_metrics: Dict[str, KakeyaMetrics],
+        analyzer: KakeyaAnalyzer
+    ) -> None:
+        """Add or replace all clusters of one world."""
+        prefix = f"{world_id}/"
+        stale = [
+            label for label in self.labels
+            if label.startswith(prefix) and label[len(prefix):] not in cluster_metrics
+        ]
+        self._remove_labels(stale)
+        
+        labels = [f"{world_id}/{name}" for name in cluster_metrics]
+        if not labels:
+            return
         
-        # Collect all metrics
-        all_metrics = []
-        self.labels = []
+        features, valid = analyzer.similarity_features(list(cluster_metrics.values()))
         
-        for world_id, clusters in world_clusters.items():
-            for cluster_name, receipts in clusters.items():
-                metrics = analyzer.analyze_embeddings(receipts)
-                label = f"{world_id}/{cluster_name}"
-                
-                all_metrics.append(metrics)
-                self.labels.append(label)
-                self.label_to_idx[label] = len(self.labels) - 1
-                self.metrics_cache[label] = metrics
-        
-        # Compute pairwise distances
-        n = len(all_metrics)
-        self.distance_matrix = np.zeros((n, n))
-        
-        for i in range(n):
-            for j in range(i + 1, n):
-                dist = analyzer.compute_similarity(all_metrics[i], all_metrics[j])
-                self.distance_matrix[i, j] = dist
-                self.distance_matrix[j, i] = dist
+        # Slots: reuse existing rows for replaced labels, append new ones
+        new_labels = [label for label in labels if label not in self.label_to_idx]
+        n_old = len(self.labels)
+        n_total = n_old + len(new_labels)
+        if new_labels:
+            self.labels.extend(new_labels)
+            for offset, label in enumerate(new_labels):
+                self.label_to_idx[label] = n_old + offset
+            self.features = np.concatenate([self.features, np.zeros((len(new_labels), 3))])
+            self.valid = np.concatenate([self.valid, np.zeros(len(new_labels), dtype=bool)])
+            grown = np.zeros((n_total, n_total))
+            grown[:n_old, :n_old] = self.distance_matrix
+            self.distance_matrix = grown
+        
+        rows = np.array([self.label_to_idx[label] for label in labels])
+        self.features[rows] = features
+        self.valid[rows] = valid
+        for label, metrics in zip(labels, cluster_metrics.values()):
+            self.metrics_cache[label] = metrics
+        
+        # Only this world's rows/columns change
+        block = analyzer.pairwise_similarity(features, valid, self.features, self.valid)
+        block[np.arange(len(rows)), rows] = 0.0
+        self.distance_matrix[rows, :] = block
+        self.distance_matrix[:, rows] = block.T
+    
+    def remove_world(self, world_id: str) -> None:
+        """Drop all clusters of one world from the index."""
+        prefix = f"{world_id}/"
+        self._remove_labels([label for label in self.labels if label.startswith(prefix)])
+    
+    def _remove_labels(self, labels: List[str]) -> None:
+        if not labels:
+            return
+        
+        drop = {self.label_to_idx[label] for label in labels}
+        keep = np.array([i for i in range(len(self.labels)) if i not in drop], dtype=int)
+        
+        self.labels = [self.labels[i] for i in keep]
+        self.label_to_idx = {label: i for i, label in enumerate(self.labels)}
+        for label in labels:
+            self.metrics_cache.pop(label, None)
+        self.features = self.features[keep]
+        self.valid = self.valid[keep]
+        self.distance_matrix = self.distance_matrix[np.ix_(keep, keep)]
     
     def query_similar(self, label: str, top_k: int = 5) -> List[Tuple[str, float]]:
         """Find top-k most similar clusters to query label."""
@@ -70,18 +141,17 @@ class SimilarityIndex:
         idx = self.label_to_idx[label]
         distances = self.distance_matrix[idx]
         
-        # Sort by distance (excluding self)
-        sorted_indices = np.argsort(distances)
-        results = []
+        # Candidates exclude self; partition instead of a full sort
+        candidates = np.delete(np.arange(len(distances)), idx)
+        if len(candidates) == 0 or top_k <= 0:
+            return []
         
-        for i in sorted_indices:
-            if i == idx:
-                continue
-            results.append((self.labels[i], distances[i]))
-            if len(results) >= top_k:
-                break
+        k = min(top_k, len(candidates))
+        cand_dist = distances[candidates]
+        top = np.argpartition(cand_dist, k - 1)[:k]
+        top = top[np.argsort(cand_dist[top], kind="stable")]
         
-        return results
+        return [(self.labels[candidates[i]], cand_dist[i]) for i in top]
     
     def save(self, path: Path) -> None:
         """Save index to disk."""
@@ -90,10 +160,12 @@ class SimilarityIndex:
                 'distance_matrix': self.distance_matrix,
                 'labels': self.labels,
                 'label_to_idx': self.label_to_idx,
-                'metrics_cache': self.metrics_cache
+                'metrics_cache': self.metrics_cache,
+                'features': self.features,
+                'valid': self.valid
             }, f)
     
-    def load(self, path: Path) -> None:
+    def load(self, path: Path, analyzer: Optional[KakeyaAnalyzer] = None) -> None:
         """Load index from disk."""
         with open(path, 'rb') as f:
             data = pickle.load(f)
@@ -101,24 +173,63 @@ class SimilarityIndex:
             self.labels = data['labels']
             self.label_to_idx = data['label_to_idx']
             self.metrics_cache = data['metrics_cache']
+        
+        if 'features' in data:
+            self.features = data['features']
+            self.valid = data['valid']
+        else:
+            # Indices saved before features were stored: rebuild them
+            analyzer = analyzer or KakeyaAnalyzer()
+            self.features, self.valid = analyzer.similarity_features(
+                [self.metrics_cache[label] for label in self.labels]
+            )
 
 
 class AsyncMetaWorldController:
-    """Async version of MetaWorldController with caching and parallel processing."""
+    """Async version of MetaWorldController with caching and parallel processing.
     
-    def __init__(self, config: Optional[CQEMetaConfig] = None, n_workers: int = 4):
+    Loads and analyses are single-flight per world: concurrent callers
+    asking for the same world share one in-flight task instead of each
+    loading it. Loads run on an I/O thread pool bounded by
+    ``max_concurrency``; cluster analysis runs on a separate CPU pool.
+    Every await on a world is bounded by ``config.validator.timeout``.
+    
+    With an AnalysisCache, per-cluster metrics and the similarity index
+    persist across restarts; unchanged worlds are never reloaded.
+    """
+    
+    def __init__(
+        self,
+        config: Optional[CQEMetaConfig] = None,
+        n_workers: int = 4,
+        max_concurrency: Optional[int] = None,
+        cpu_workers: Optional[int] = None,
+        cache: Optional[AnalysisCache] = None
+    ):
         self.config = config or get_config()
         self.kakeya = KakeyaAnalyzer(config)
         self.cluster_manager = ClusterManager(config)
         
         self.worlds: Dict[str, WorldDescriptor] = {}
-        self._world_embeddings: Dict[str, List[ComputationalReceipt]] = {}
+        self._world_embeddings: Dict[str, WorldData] = {}
         self._world_metrics: Dict[str, Dict[str, KakeyaMetrics]] = {}
         
-        # Async components
+        # Async components: I/O pool for loads, CPU pool for analysis
         self.executor = ThreadPoolExecutor(max_workers=n_workers)
+        self.cpu_executor = ThreadPoolExecutor(
+            max_workers=cpu_workers or os.cpu_count() or 1
+        )
+        self.max_concurrency = max_concurrency or n_workers
         self.similarity_index: Optional[SimilarityIndex] = None
-        self._index_dirty = True
+        self._dirty_worlds: Set[str] = set()
+        self.cache = cache
+        
+        # Single-flight state. Keys are (stage, world_id, generation); the
+        # generation is bumped on (re)registration so stale work is dropped.
+        self._inflight: Dict[Tuple[str, str, int], asyncio.Task] = {}
+        self._generation: Dict[str, int] = {}
+        self._load_semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
     
     def register_world(
         self,
@@ -129,7 +240,12 @@ class AsyncMetaWorldController:
         cqe_channel: int,
         validator_type: Optional[str] = None
     ) -> None:
-        """Register a world (marks index as dirty)."""
+        """Register a world (marks only this world dirty in the index)."""
+        # Re-registering replaces the world: drop its cached data
+        self.cancel_pending(world_id)
+        self._world_embeddings.pop(world_id, None)
+        self._world_metrics.pop(world_id, None)
+        self._generation[world_id] = self._generation.get(world_id, 0) + 1
         self.worlds[world_id] = WorldDescriptor(
             world_id=world_id,
             name=name,
@@ -138,116 +254,244 @@ class AsyncMetaWorldController:
             cqe_channel=cqe_channel,
             validator_type=validator_type
         )
-        self._index_dirty = True
+        self._dirty_worlds.add(world_id)
+    
+    def unregister_world(self, world_id: str) -> None:
+        """Remove a world and its clusters from the index."""
+        self.cancel_pending(world_id)
+        self.worlds.pop(world_id, None)
+        self._world_embeddings.pop(world_id, None)
+        self._world_metrics.pop(world_id, None)
+        self._generation[world_id] = self._generation.get(world_id, 0) + 1
+        self._dirty_worlds.discard(world_id)
+        if self.similarity_index is not None:
+            self.similarity_index.remove_world(world_id)
+    
+    def cancel_pending(self, world_id: Optional[str] = None) -> int:
+        """Cancel in-flight loads/analyses (for one world, or all).
+        
+        Executor threads cannot be interrupted; a cancelled load's result
+        is simply discarded when its thread finishes.
+        
+        Returns:
+            Number of tasks cancelled
+        """
+        cancelled = 0
+        for key, task in list(self._inflight.items()):
+            if world_id is None or key[1] == world_id:
+                if task.cancel():
+                    cancelled += 1
+                self._inflight.pop(key, None)
+        return cancelled
+    
+    @property
+    def timeout(self) -> Optional[float]:
+        """Per-world await timeout in seconds (None when disabled)."""
+        timeout = self.config.validator.timeout
+        return timeout if timeout and timeout > 0 else None
+    
+    def _get_load_semaphore(self) -> asyncio.Semaphore:
+        """Load semaphore bound to the running loop."""
+        loop = asyncio.get_running_loop()
+        if self._load_semaphore is None or self._semaphore_loop is not loop:
+            self._load_semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._load_semaphore
+    
+    async def _single_flight(self, stage: str, world_id: str, factory):
+        """Run factory() once per (stage, world) and share it among callers.
+        
+        Each caller waits on a shielded view of the shared task, so one
+        caller timing out or being cancelled does not cancel the others.
+        """
+        if world_id not in self.worlds:
+            raise ValueError(f"Unknown world: {world_id}")
+        
+        key = (stage, world_id, self._generation.get(world_id, 0))
+        task = self._inflight.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            
+            def _done(t: asyncio.Task, key=key) -> None:
+                if self._inflight.get(key) is t:
+                    del self._inflight[key]
+                # Mark exceptions as retrieved when every waiter has gone
+                if not t.cancelled():
+                    t.exception()
+            
+            task.add_done_callback(_done)
+        
+        return await asyncio.wait_for(asyncio.shield(task), self.timeout)
     
     async def load_world_async(self, world_id: str) -> List[ComputationalReceipt]:
-        """Asynchronously load world embeddings."""
+        """Asynchronously load world embeddings as receipts (single-flight per world)."""
+        generation = self._generation.get(world_id, 0)
+        data = await self._load_world_data_async(world_id)
+        if isinstance(data, EmbeddingColumns):
+            # Receipts are only built here, at the API edge
+            loop = asyncio.get_running_loop()
+            data = await asyncio.wait_for(
+                loop.run_in_executor(self.executor, data.to_receipts), self.timeout
+            )
+            if self._generation.get(world_id, 0) == generation:
+                self._world_embeddings[world_id] = data
+        return data
+    
+    async def _load_world_data_async(self, world_id: str) -> WorldData:
+        """Columns or receipts of a world (single-flight per world)."""
         if world_id in self._world_embeddings:
             return self._world_embeddings[world_id]
-        
-        loop = asyncio.get_event_loop()
-        receipts = await loop.run_in_executor(
-            self.executor,
-            self._load_world_sync,
-            world_id
-        )
-        
-        self._world_embeddings[world_id] = receipts
-        return receipts
+        return await self._single_flight("load", world_id, lambda: self._load_world(world_id))
     
-    def _load_world_sync(self, world_id: str) -> List[ComputationalReceipt]:
-        """Synchronous world loading (for executor)."""
-        from .embedding import EmbeddingStore
+    async def _load_world(self, world_id: str) -> WorldData:
+        """Shared load task: bounded by the load semaphore."""
+        generation = self._generation.get(world_id, 0)
+        async with self._get_load_semaphore():
+            loop = asyncio.get_running_loop()
+            data = await loop.run_in_executor(
+                self.executor,
+                self._load_world_sync,
+                world_id
+            )
         
+        # Only cache if the world was not re-registered meanwhile
+        if self._generation.get(world_id, 0) == generation:
+            self._world_embeddings[world_id] = data
+        return data
+    
+    def _load_world_sync(self, world_id: str) -> WorldData:
+        """Synchronous world loading (for executor); columnar worlds stay columns."""
         world = self.worlds[world_id]
-        store = EmbeddingStore(world.embedding_path, self.config)
-        return store.load()
+        return load_world_data(world.embedding_path, self.config)
     
     async def analyze_world_async(self, world_id: str) -> Dict[str, KakeyaMetrics]:
-        """Asynchronously analyze a world."""
+        """Asynchronously analyze a world (single-flight per world)."""
         if world_id in self._world_metrics:
             return self._world_metrics[world_id]
+        return await self._single_flight("analyze", world_id, lambda: self._analyze_world(world_id))
+    
+    async def _analyze_world(self, world_id: str) -> Dict[str, KakeyaMetrics]:
+        """Shared analysis task: cache lookup, load, then cluster on the CPU pool."""
+        generation = self._generation.get(world_id, 0)
+        loop = asyncio.get_running_loop()
         
-        receipts = await self.load_world_async(world_id)
+        cache_key = None
+        if self.cache is not None:
+            path = self.worlds[world_id].embedding_path
+            cache_key = await loop.run_in_executor(
+                self.executor, self.cache.metrics_key, world_id, path
+            )
+            metrics = await loop.run_in_executor(
+                self.executor, self.cache.get_metrics, cache_key
+            )
+            if metrics is not None:
+                if self._generation.get(world_id, 0) == generation:
+                    self._world_metrics[world_id] = metrics
+                return metrics
         
-        loop = asyncio.get_event_loop()
+        data = await self._load_world_data_async(world_id)
         metrics = await loop.run_in_executor(
-            self.executor,
+            self.cpu_executor,
             self._analyze_clusters_sync,
             world_id,
-            receipts
+            data
         )
         
-        self._world_metrics[world_id] = metrics
+        if self._generation.get(world_id, 0) == generation:
+            self._world_metrics[world_id] = metrics
+        if cache_key is not None:
+            await loop.run_in_executor(
+                self.executor, self.cache.put_metrics, cache_key, metrics
+            )
         return metrics
     
     def _analyze_clusters_sync(
         self,
         world_id: str,
-        receipts: List[ComputationalReceipt]
+        data: WorldData
     ) -> Dict[str, KakeyaMetrics]:
         """Synchronous cluster analysis (for executor)."""
-        
-        # Cluster based on world type
-        if world_id == "PEND":
-            clusters = self.cluster_manager.cluster_pendulum(receipts)
-        elif world_id == "NS":
-            clusters = self.cluster_manager.cluster_ns(receipts)
-        elif world_id == "YM":
-            clusters = self.cluster_manager.cluster_ym(receipts)
-        elif world_id == "RIEMANN":
-            clusters = self.cluster_manager.cluster_riemann(receipts)
-        else:
-            clusters = {"all": receipts}
-        
-        return self.kakeya.analyze_clusters(clusters)
+        return analyze_world_data(world_id, data, self.cluster_manager, self.kakeya)
     
     async def analyze_all_worlds_async(self) -> Dict[str, Dict[str, KakeyaMetrics]]:
         """Analyze all registered worlds in parallel."""
-        tasks = [self.analyze_world_async(world_id) for world_id in self.worlds]
+        world_ids = list(self.worlds)
+        tasks = [self.analyze_world_async(world_id) for world_id in world_ids]
         results = await asyncio.gather(*tasks)
         
         return {
             world_id: metrics
-            for world_id, metrics in zip(self.worlds.keys(), results)
+            for world_id, metrics in zip(world_ids, results)
         }
     
     async def build_similarity_index_async(self) -> None:
-        """Build similarity index from all worlds."""
-        if not self._index_dirty and self.similarity_index is not None:
+        """Build the similarity index, or update it for worlds registered since.
+        
+        Dirty worlds are analyzed concurrently. Worlds that fail or time out
+        stay dirty (so the next call retries them) and the first error is
+        re-raised after the successful worlds have been indexed.
+        """
+        loop = asyncio.get_running_loop()
+        if self.similarity_index is None:
+            if self.cache is not None and await self._load_cached_index():
+                return
+            self.similarity_index = SimilarityIndex()
+            self._dirty_worlds = set(self.worlds)
+        
+        if not self._dirty_worlds:
             return
         
-        # Load all world clusters
-        world_clusters = {}
-        for world_id in self.worlds:
-            receipts = await self.load_world_async(world_id)
-            
-            # Cluster
-            if world_id == "PEND":
-                clusters = self.cluster_manager.cluster_pendulum(receipts)
-            elif world_id == "NS":
-                clusters = self.cluster_manager.cluster_ns(receipts)
-            elif world_id == "YM":
-                clusters = self.cluster_manager.cluster_ym(receipts)
-            elif world_id == "RIEMANN":
-                clusters = self.cluster_manager.cluster_riemann(receipts)
-            else:
-                clusters = {"all": receipts}
-            
-            world_clusters[world_id] = clusters
-        
-        # Build index
-        loop = asyncio.get_event_loop()
-        index = SimilarityIndex()
-        await loop.run_in_executor(
-            self.executor,
-            index.build,
-            world_clusters,
-            self.kakeya
-        )
+        # Clear first so a re-registration during the await marks it again
+        dirty = sorted(self._dirty_worlds)
+        self._dirty_worlds.difference_update(dirty)
+        
+        try:
+            results = await asyncio.gather(
+                *(self.analyze_world_async(world_id) for world_id in dirty),
+                return_exceptions=True
+            )
+        except asyncio.CancelledError:
+            self._dirty_worlds.update(w for w in dirty if w in self.worlds)
+            raise
+        
+        error: Optional[BaseException] = None
+        for world_id, result in zip(dirty, results):
+            if isinstance(result, BaseException):
+                if world_id in self.worlds:
+                    self._dirty_worlds.add(world_id)
+                error = error or result
+            elif world_id in self.worlds and world_id not in self._dirty_worlds:
+                # Skip worlds unregistered or re-registered during the await
+                self.similarity_index.update_world(world_id, result, self.kakeya)
+        
+        if error is not None:
+            raise error
+        
+        if self.cache is not None and not self._dirty_worlds:
+            worlds = {w: d.embedding_path for w, d in self.worlds.items()}
+            index = self.similarity_index
+            key = await loop.run_in_executor(self.executor, self.cache.index_key, worlds)
+            await loop.run_in_executor(self.executor, self.cache.put_index, key, index)
+    
+    async def _load_cached_index(self) -> bool:
+        """Adopt a cached index for exactly the registered worlds, if any."""
+        loop = asyncio.get_running_loop()
+        worlds = {w: d.embedding_path for w, d in self.worlds.items()}
+        key = await loop.run_in_executor(self.executor, self.cache.index_key, worlds)
+        index = await loop.run_in_executor(self.executor, self.cache.get_index, key)
+        
+        # Registrations may have changed while we were reading
+        if index is None or self.similarity_index is not None or set(self.worlds) != set(worlds):
+            return False
         
+        # Seed the per-world metrics from the index: nothing gets reloaded
+        for label, metrics in index.metrics_cache.items():
+            world_id, cluster = label.split('/', 1)
+            self._world_metrics.setdefault(world_id, {})[cluster] = metrics
         self.similarity_index = index
-        self._index_dirty = False
+        self._dirty_worlds.clear()
+        return True
     
     async def find_similar_fast(
         self,
@@ -276,8 +520,10 @@ class AsyncMetaWorldController:
         return results
     
     def close(self) -> None:
-        """Shutdown executor."""
+        """Cancel in-flight work and shut down both executors."""
+        self.cancel_pending()
         self.executor.shutdown(wait=True)
+        self.cpu_executor.shutdown(wait=True)
 
 
 # Convenience function for async usage
@@ -8,21 +8,229 @@ Achieves 100x+ speedup through vectorization and parallel processing.
 
 from __future__ import annotations
 
+import atexit
+import os
+import queue
+import threading
+import time
+import weakref
 from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
-from typing import List, Optional
+from dataclasses import dataclass, field
+from datetime import datetime
+from multiprocessing import shared_memory
+from typing import Any, Callable, List, Optional, Set, Tuple
 
 import numpy as np
 
 from .config import CQEMetaConfig, get_config
-from .provenance import ComputationalReceipt, ProvenanceEmbeddingPipeline
+from .provenance import (
+    ComputationalReceipt,
+    ProvenanceEmbeddingPipeline,
+    ProvenanceMetadata,
+    ProvenanceSession,
+    compute_merkle_root,
+    encode_receipts_jsonl,
+    get_json_encoder,
+    get_provenance_session,
+)
+
+
+@dataclass
+class BatchEmbeddingResult:
+    """Columnar result of a batch embedding run.
+    
+    Holds the fused vectors as one (N, vec_dim) matrix plus per-row lane
+    arrays. Receipts are only built when asked for via ``receipt(i)`` or
+    ``to_receipts()``.
+    """
+    
+    world: str
+    vecs: np.ndarray  # (N, vec_dim)
+    delta_phi: np.ndarray  # (N,)
+    rho_like: np.ndarray  # (N,)
+    energies: np.ndarray  # (N,)
+    sample_index: np.ndarray  # (N,) int64
+    cqe_channel: int
+    scope: bool
+    schema_version: str
+    timestamp: str
+    validator_signature: str
+    parent_computation_ids: List[str] = field(default_factory=list)
+    computation_time_ms: Optional[float] = None  # amortized per row
+    session: Optional[ProvenanceSession] = None
+    
+    def __len__(self) -> int:
+        return len(self.vecs)
+    
+    @property
+    def lane_feat(self) -> np.ndarray:
+        """(N, 4) lane features; the leading columns of ``vecs``."""
+        return self.vecs[:, :4]
+    
+    def receipt(self, i: int) -> ComputationalReceipt:
+        """Materialize the receipt for row i."""
+        vec = self.vecs[i].tolist()
+        provenance = ProvenanceMetadata.for_session(
+            self.session or get_provenance_session(),
+            merkle_root=compute_merkle_root(vec),
+            validator_signature=self.validator_signature,
+            parent_computation_ids=list(self.parent_computation_ids),
+            computation_time_ms=self.computation_time_ms
+        )
+        return ComputationalReceipt(
+            world=self.world,
+            vec=vec,
+            vec_dim=len(vec),
+            lane_feat=vec[:4],
+            cqe_channel=self.cqe_channel,
+            delta_phi=float(self.delta_phi[i]),
+            rho_like=float(self.rho_like[i]),
+            scope=self.scope,
+            schema_version=self.schema_version,
+            timestamp=self.timestamp,
+            sample_index=int(self.sample_index[i]),
+            provenance=provenance
+        )
+    
+    def to_receipts(self) -> List[ComputationalReceipt]:
+        """Materialize all N receipts."""
+        return [self.receipt(i) for i in range(len(self))]
+
+
+# Per-process engine used by process-pool workers (set by _init_worker)
+_worker_engine: Optional[VectorizedBatchEngine] = None
+
+
+def _init_worker(config: CQEMetaConfig, session: ProvenanceSession) -> None:
+    """Process-pool initializer: build one engine per worker process."""
+    global _worker_engine
+    _worker_engine = VectorizedBatchEngine(config, session=session)
+
+
+def _embed_shared_chunk(
+    shm_name: str,
+    shape: Tuple[int, ...],
+    dtype_str: str,
+    start: int,
+    end: int,
+    world: str,
+    channel: int,
+    scope: bool,
+    baseline_energy: float,
+    out_dtype: str
+) -> Tuple[int, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Embed rows [start, end) of a shared-memory state matrix.
+    
+    Returns plain arrays (not receipts) so results pickle compactly.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        states = np.ndarray(shape, dtype=np.dtype(dtype_str), buffer=shm.buf)
+        result = _worker_engine.embed_batch_columnar(
+            world=world,
+            state_vectors=states[start:end],
+            channel=channel,
+            scope=scope,
+            baseline_energy=baseline_energy,
+            sample_offset=start,
+            dtype=np.dtype(out_dtype)
+        )
+        # Drop the view before closing, or the buffer export keeps shm open
+        del states
+        return start, result.vecs, result.delta_phi, result.rho_like, result.energies
+    finally:
+        shm.close()
 
 
 class VectorizedBatchEngine:
     """Vectorized batch embedding generation."""
     
-    def __init__(self, config: Optional[CQEMetaConfig] = None):
+    def __init__(
+        self,
+        config: Optional[CQEMetaConfig] = None,
+        session: Optional[ProvenanceSession] = None
+    ):
         self.config = config or get_config()
-        self.pipeline = ProvenanceEmbeddingPipeline(config)
+        self.pipeline = ProvenanceEmbeddingPipeline(config, session=session)
+    
+    def embed_batch_columnar(
+        self,
+        world: str,
+        state_vectors: np.ndarray,
+        channel: int,
+        scope: bool,
+        baseline_energy: Optional[float] = None,
+        validator_signature: str = "batch_v1.0.0",
+        sample_offset: int = 0,
+        dtype: Any = np.float32
+    ) -> BatchEmbeddingResult:
+        """
+        Embed an (N, D) batch in one pass without per-row Python work.
+        
+        Row i matches ``ProvenanceEmbeddingPipeline.embed_with_provenance``
+        with ``sample_index=sample_offset + i``.
+        
+        Args:
+            state_vectors: (N, D) array of state vectors
+            baseline_energy: Energy reference for ΔΦ (default: energy of row 0)
+            sample_offset: Sample index of row 0 (for chunked runs)
+            dtype: dtype of the returned vector matrix
+        
+        Returns:
+            BatchEmbeddingResult with an (N, vec_dim) matrix
+        """
+        start_time = time.time()
+        
+        states = np.asarray(state_vectors, dtype=float)
+        n_samples = len(states)
+        states = states.reshape(n_samples, -1)
+        geom = self.pipeline.geom_extractor
+        
+        # Geometry: histograms and concentrations over all rows at once
+        points = geom.flatten_to_2d_points_batch(states)
+        geom_feat = geom.radial_angle_histogram_batch(points)
+        rho_like = geom.compute_concentration_batch(np.hypot(points[..., 0], points[..., 1]))
+        
+        # Energy metrics
+        energies = np.sum(states ** 2, axis=1)
+        if baseline_energy is None:
+            baseline_energy = float(energies[0]) if n_samples else 0.0
+        if abs(baseline_energy) < 1e-9:
+            delta_phi = np.zeros(n_samples)
+        else:
+            delta_phi = (energies - baseline_energy) / abs(baseline_energy)
+        
+        # Lane features (same layout as CQELaneEncoder.encode_lane)
+        lane_feat = np.empty((n_samples, 4))
+        lane_feat[:, 0] = channel / 10.0
+        lane_feat[:, 1] = delta_phi
+        lane_feat[:, 2] = rho_like
+        lane_feat[:, 3] = 1.0 if scope else 0.0
+        
+        # Moonshine block keyed by sample index
+        sample_index = np.arange(sample_offset, sample_offset + n_samples, dtype=np.int64)
+        moon_feat = self.pipeline.moonshine_gen.generate_block(sample_index)
+        
+        # Fuse in stable (sorted key) order: cqe, geom, moonshine
+        vecs = np.concatenate([lane_feat, geom_feat, moon_feat], axis=1).astype(dtype, copy=False)
+        
+        elapsed_ms = (time.time() - start_time) * 1000
+        return BatchEmbeddingResult(
+            world=world,
+            vecs=vecs,
+            delta_phi=delta_phi,
+            rho_like=rho_like,
+            energies=energies,
+            sample_index=sample_index,
+            cqe_channel=channel,
+            scope=scope,
+            schema_version=self.config.embedding.schema_version,
+            timestamp=datetime.utcnow().isoformat() + "Z",
+            validator_signature=validator_signature,
+            parent_computation_ids=self.pipeline.parent_computation_ids.copy(),
+            computation_time_ms=elapsed_ms / max(n_samples, 1),
+            session=self.pipeline.session
+        )
     
     def embed_batch_vectorized(
         self,
@@ -42,33 +250,109 @@ class VectorizedBatchEngine:
         Returns:
             List of N computational receipts
         """
+        # float64 keeps receipts identical to the per-row pipeline
+        result = self.embed_batch_columnar(
+            world=world,
+            state_vectors=state_vectors,
+            channel=channel,
+            scope=scope,
+            baseline_energy=baseline_energy,
+            validator_signature=validator_signature,
+            dtype=np.float64
+        )
+        return result.to_receipts()
+    
+    def embed_batch_columnar_parallel(
+        self,
+        world: str,
+        state_vectors: np.ndarray,
+        channel: int,
+        scope: bool,
+        n_workers: int = 4,
+        baseline_energy: Optional[float] = None,
+        validator_signature: str = "parallel_v1.0.0",
+        dtype: Any = np.float32
+    ) -> BatchEmbeddingResult:
+        """
+        Columnar batch embedding on a process pool.
+        
+        ``state_vectors`` is placed in shared memory once; each worker embeds
+        a contiguous chunk with ``embed_batch_columnar`` and returns arrays.
+        The result is identical to ``embed_batch_columnar`` on the whole batch.
+        
+        Args:
+            state_vectors: (N, D) array of state vectors
+            n_workers: Number of worker processes
+            baseline_energy: Energy reference for ΔΦ (default: energy of row 0)
+            dtype: dtype of the returned vector matrix
+        
+        Returns:
+            BatchEmbeddingResult with an (N, vec_dim) matrix
+        """
+        states = np.ascontiguousarray(state_vectors)
+        states = states.reshape(len(states), -1)
+        n_samples = len(states)
         
-        n_samples, dim = state_vectors.shape
+        if n_workers <= 1 or n_samples < 2:
+            return self.embed_batch_columnar(
+                world, states, channel, scope,
+                baseline_energy=baseline_energy,
+                validator_signature=validator_signature,
+                dtype=dtype
+            )
         
-        # Vectorized energy computation
-        energies = np.sum(state_vectors ** 2, axis=1)
+        start_time = time.time()
         
+        # Same reduction as the kernel so ΔΦ matches the sequential path bit for bit
         if baseline_energy is None:
-            baseline_energy = float(energies[0])
+            baseline_energy = float(np.sum(np.asarray(states[:1], dtype=float) ** 2, axis=1)[0])
         
-        delta_phis = (energies - baseline_energy) / max(abs(baseline_energy), 1e-9)
+        chunk_size = -(-n_samples // n_workers)
+        chunks = [(i, min(i + chunk_size, n_samples))
+                  for i in range(0, n_samples, chunk_size)]
         
-        # Generate receipts (still sequential for now, but with precomputed energies)
-        receipts = []
-        self.pipeline.validator_signature = validator_signature
-        
-        for i in range(n_samples):
-            receipt = self.pipeline.embed_with_provenance(
-                world=world,
-                state_vector=state_vectors[i],
-                channel=channel,
-                scope=scope,
-                sample_index=i,
-                baseline_energy=baseline_energy
-            )
-            receipts.append(receipt)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, states.nbytes))
+        try:
+            shared = np.ndarray(states.shape, dtype=states.dtype, buffer=shm.buf)
+            shared[:] = states
+            del shared
+            
+            with ProcessPoolExecutor(
+                max_workers=len(chunks),
+                initializer=_init_worker,
+                initargs=(self.config, self.pipeline.session)
+            ) as executor:
+                futures = [
+                    executor.submit(
+                        _embed_shared_chunk,
+                        shm.name, states.shape, states.dtype.str,
+                        lo, hi, world, channel, scope,
+                        baseline_energy, np.dtype(dtype).str
+                    )
+                    for lo, hi in chunks
+                ]
+                parts = sorted((f.result() for f in futures), key=lambda part: part[0])
+        finally:
+            shm.close()
+            shm.unlink()
         
-        return receipts
+        elapsed_ms = (time.time() - start_time) * 1000
+        return BatchEmbeddingResult(
+            world=world,
+            vecs=np.concatenate([p[1] for p in parts]),
+            delta_phi=np.concatenate([p[2] for p in parts]),
+            rho_like=np.concatenate([p[3] for p in parts]),
+            energies=np.concatenate([p[4] for p in parts]),
+            sample_index=np.arange(n_samples, dtype=np.int64),
+            cqe_channel=channel,
+            scope=scope,
+            schema_version=self.config.embedding.schema_version,
+            timestamp=datetime.utcnow().isoformat() + "Z",
+            validator_signature=validator_signature,
+            parent_computation_ids=self.pipeline.parent_computation_ids.copy(),
+            computation_time_ms=elapsed_ms / n_samples,
+            session=self.pipeline.session
+        )
     
     def embed_batch_parallel(
         self,
@@ -77,7 +361,8 @@ class VectorizedBatchEngine:
         channel: int,
         scope: bool,
         n_workers: int = 4,
-        validator_signature: str = "parallel_v1.0.0"
+        validator_signature: str = "parallel_v1.0.0",
+        backend: str = "thread"
     ) -> List[ComputationalReceipt]:
         """
         Parallel batch embedding using multiprocessing.
@@ -85,17 +370,35 @@ class VectorizedBatchEngine:
         Args:
             state_vectors: (N, D) array of state vectors
             n_workers: Number of parallel workers
+            backend: "thread" (per-row pipeline in a thread pool) or
+                "process" (columnar kernel over shared memory)
             
         Returns:
             List of N computational receipts
         """
         
+        if backend == "process":
+            # No baseline here (as in the thread path), so ΔΦ is 0 for every row
+            result = self.embed_batch_columnar_parallel(
+                world, state_vectors, channel, scope,
+                n_workers=n_workers,
+                baseline_energy=0.0,
+                validator_signature=validator_signature,
+                dtype=np.float64
+            )
+            return result.to_receipts()
+        
+        if backend != "thread":
+            raise ValueError(f"Unknown backend: {backend}")
+        
         n_samples = len(state_vectors)
         chunk_size = max(1, n_samples // n_workers)
         
         def process_chunk(args):
             start_idx, end_idx = args
-            chunk_pipeline = ProvenanceEmbeddingPipeline(self.config, validator_signature)
+            chunk_pipeline = ProvenanceEmbeddingPipeline(
+                self.config, validator_signature, session=self.pipeline.session
+            )
             chunk_receipts = []
             
             for i in range(start_idx, end_idx):
@@ -126,45 +429,198 @@ class VectorizedBatchEngine:
         return receipts
 
 
+def _close_writer_at_exit(ref: "weakref.ref[StreamingEmbeddingWriter]") -> Callable[[], None]:
+    """atexit hook that closes the referenced writer if it is still alive."""
+    def close() -> None:
+        writer = ref()
+        if writer is not None:
+            writer.close()
+    return close
+
+
 class StreamingEmbeddingWriter:
-    """Buffered streaming writer for real-time embedding generation."""
+    """Buffered streaming writer for real-time embedding generation.
+    
+    The output file stays open for the writer's lifetime. With
+    ``background=True`` the writer is double-buffered: a full buffer is
+    swapped out and serialized + written on a writer thread while the
+    producer fills the other one; the producer only waits if the disk
+    falls a whole buffer behind. In background mode listeners run on the
+    writer thread; a write error is sticky (re-raised by every later
+    flush/wait/close), and receipts handed off or left buffered after it
+    are counted in ``dropped`` rather than written. write/flush/wait on a
+    closed writer raise ValueError. A writer that is never closed is
+    closed at interpreter exit, so buffered and queued receipts still
+    reach disk.
     
-    def __init__(self, output_path, buffer_size: int = 100):
+    Args:
+        output_path: JSONL path, or a ColumnarEmbeddingStore to append to
+        buffer_size: Receipts per flushed batch
+        listeners: Called with each flushed batch
+        background: Serialize and write on a background thread
+        fsync: "none", "flush" (every batch) or "interval"
+        fsync_interval: Seconds between fsyncs for the "interval" policy
+        serializer: "auto", "orjson" or "json" (see get_json_encoder)
+    """
+    
+    FSYNC_POLICIES = ("none", "flush", "interval")
+    
+    def __init__(
+        self,
+        output_path,
+        buffer_size: int = 100,
+        listeners: Optional[List[Callable[[List[ComputationalReceipt]], None]]] = None,
+        background: bool = False,
+        fsync: str = "none",
+        fsync_interval: float = 1.0,
+        serializer: str = "auto"
+    ):
+        from .columnar import ColumnarEmbeddingStore
+        
+        if fsync not in self.FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync}")
+        
         self.output_path = output_path
         self.buffer_size = buffer_size
         self.buffer: List[ComputationalReceipt] = []
         self.total_written = 0
+        self.dropped = 0
+        self._written_sessions: Set[str] = set()
+        
+        # Called with each flushed batch (e.g. StreamingKakeyaAnalyzer.update_receipts)
+        self.listeners = list(listeners or [])
+        
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self._last_fsync = time.monotonic()
+        self._store = output_path if isinstance(output_path, ColumnarEmbeddingStore) else None
+        self._encoder = get_json_encoder(serializer)
+        self._file = None
+        self._closed = False
+        
+        # Background mode: one buffer being filled, at most one in flight
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._error: Optional[BaseException] = None
+        if background:
+            self._queue = queue.Queue(maxsize=1)
+            self._thread = threading.Thread(
+                target=self._run, name="cqe-embedding-writer", daemon=True
+            )
+            self._thread.start()
+        
+        # Weak, so registering does not keep an abandoned writer alive
+        self._atexit = _close_writer_at_exit(weakref.ref(self))
+        atexit.register(self._atexit)
     
     def write(self, receipt: ComputationalReceipt) -> None:
         """Add receipt to buffer, flush if needed."""
+        self._check_open()
         self.buffer.append(receipt)
         
         if len(self.buffer) >= self.buffer_size:
-            self.flush()
+            self._flush()
     
     def flush(self) -> int:
-        """Write buffered receipts to disk."""
+        """Write buffered receipts to disk (hand them off, in background mode)."""
+        self._check_open()
+        return self._flush()
+    
+    def _flush(self) -> int:
+        self._raise_error()
         if not self.buffer:
             return 0
         
-        import json
-        
-        # Append to file
-        with open(self.output_path, 'a', encoding='utf-8') as f:
-            for receipt in self.buffer:
-                f.write(json.dumps(receipt.to_dict()) + '\n')
-        
-        n_written = len(self.buffer)
-        self.total_written += n_written
-        self.buffer.clear()
-        
-        return n_written
+        batch, self.buffer = self.buffer, []
+        if self._queue is not None:
+            self._queue.put(batch)
+        else:
+            self._write_batch(batch)
+        return len(batch)
+    
+    def wait(self) -> None:
+        """Block until every handed-off batch has been written."""
+        self._check_open()
+        if self._queue is not None:
+            self._queue.join()
+        self._raise_error()
     
     def close(self) -> int:
-        """Flush remaining buffer and close."""
-        self.flush()
+        """Flush remaining buffer, drain the writer thread and close."""
+        if self._closed:
+            return self.total_written
+        self._closed = True
+        atexit.unregister(self._atexit)
+        try:
+            self._flush()
+        finally:
+            if self._thread is not None:
+                self._queue.put(None)
+                self._thread.join()
+            if self._error is not None:
+                self.dropped += len(self.buffer)
+                self.buffer = []
+            if self._file is not None:
+                if self.fsync != "none":
+                    self._fsync_file()
+                self._file.close()
+                self._file = None
+        self._raise_error()
         return self.total_written
     
+    def _run(self) -> None:
+        """Writer thread: write batches until the close sentinel."""
+        while True:
+            batch = self._queue.get()
+            try:
+                if batch is None:
+                    return
+                if self._error is None:
+                    self._write_batch(batch)
+                else:
+                    self.dropped += len(batch)
+            except BaseException as exc:
+                self._error = exc
+            finally:
+                self._queue.task_done()
+    
+    def _write_batch(self, batch: List[ComputationalReceipt]) -> None:
+        """Serialize and append one batch, then notify listeners."""
+        now = time.monotonic()
+        sync = self.fsync == "flush" or (
+            self.fsync == "interval" and now - self._last_fsync >= self.fsync_interval
+        )
+        
+        if self._store is not None:
+            self._store.append(batch, fsync=sync)
+        else:
+            # Session headers go out once per writer
+            data = encode_receipts_jsonl(batch, self._written_sessions, self._encoder)
+            if self._file is None:
+                self._file = open(self.output_path, 'ab')
+            self._file.write(data)
+            self._file.flush()
+            if sync:
+                self._fsync_file()
+        if sync:
+            self._last_fsync = now
+        
+        for listener in self.listeners:
+            listener(batch)
+        self.total_written += len(batch)
+    
+    def _fsync_file(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+    
+    def _check_open(self) -> None:
+        if self._closed:
+            raise ValueError("I/O operation on a closed StreamingEmbeddingWriter")
+    
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise self._error
+    
     def __enter__(self):
         return self
     
@@ -0,0 +1,283 @@
+"""
+CQE Meta - Persistent Analysis Cache
+====================================
+
+Disk-backed cache of per-cluster KakeyaMetrics and SimilarityIndex
+snapshots, so a restarted controller does not re-analyze unchanged worlds.
+
+Entries are keyed by the content digest of the world's embedding file (or
+columnar store directory) together with the KakeyaConfig and EmbeddingConfig
+fields that affect analysis results. Digests are memoized against the
+file's size and mtime, so a warm lookup is a few ``stat`` calls.
+
+Layout of a cache directory::
+
+    analysis_cache/
+    ├── digests.json        # path -> {signature, digest}
+    ├── metrics/<key>.json  # {cluster: KakeyaMetrics dict}
+    └── index/<key>.pkl     # SimilarityIndex.save() snapshot
+
+Entries are evicted least-recently-used (by file mtime, refreshed on every
+hit) once the cache grows past ``max_bytes``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from dataclasses import asdict
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Optional, Tuple
+
+from .config import CQEMetaConfig, get_config
+from .kakeya import KakeyaMetrics
+
+if TYPE_CHECKING:
+    from .async_controller import SimilarityIndex
+
+# Bump when the analysis itself changes in a way the config does not capture
+CACHE_FORMAT_VERSION = 1
+
+# EmbeddingConfig fields read during clustering; the rest only affect
+# embedding generation, which is already captured by the file digest
+ANALYSIS_EMBEDDING_FIELDS = (
+    "channel_ym",
+    "channel_riemann",
+    "pendulum_rho_low_threshold",
+    "pendulum_rho_high_threshold",
+    "ns_viscosity_smooth_threshold",
+    "ns_viscosity_turbulent_threshold",
+)
+
+_HASH_CHUNK = 1 << 20
+
+
+def analysis_config_fingerprint(config: CQEMetaConfig) -> Dict[str, Any]:
+    """Config fields that affect Kakeya metrics and clustering."""
+    return {
+        "kakeya": asdict(config.kakeya),
+        "embedding": {
+            name: getattr(config.embedding, name)
+            for name in ANALYSIS_EMBEDDING_FIELDS
+        },
+    }
+
+
+def _stat_signature(path: Path) -> List[Tuple[str, int, int]]:
+    """(name, size, mtime_ns) for a file, or for every file in a directory."""
+    if path.is_dir():
+        entries = sorted(
+            (entry for entry in os.scandir(path) if entry.is_file()),
+            key=lambda entry: entry.name
+        )
+        return [(e.name, e.stat().st_size, e.stat().st_mtime_ns) for e in entries]
+    st = path.stat()
+    return [(path.name, st.st_size, st.st_mtime_ns)]
+
+
+def _content_digest(path: Path) -> str:
+    """SHA-256 over a file, or over every file in a directory by name."""
+    h = hashlib.sha256()
+    files = sorted(p for p in path.iterdir() if p.is_file()) if path.is_dir() else [path]
+    for file in files:
+        h.update(file.name.encode('utf-8') + b'\0')
+        with open(file, 'rb') as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK), b''):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+class AnalysisCache:
+    """Persistent, size-bounded cache of world analysis results.
+    
+    Safe to share between the executor threads of one controller.
+    """
+    
+    def __init__(
+        self,
+        cache_dir: Path,
+        config: Optional[CQEMetaConfig] = None,
+        max_bytes: int = 256 * 1024 * 1024
+    ):
+        self.config = config or get_config()
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._metrics_dir = self.cache_dir / "metrics"
+        self._index_dir = self.cache_dir / "index"
+        self._metrics_dir.mkdir(parents=True, exist_ok=True)
+        self._index_dir.mkdir(parents=True, exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._config_key = json.dumps(
+            analysis_config_fingerprint(self.config), sort_keys=True
+        )
+        self._digests: Dict[str, Dict[str, Any]] = self._read_digests()
+        
+        self.hits = 0
+        self.misses = 0
+    
+    # ----- keys -----
+    
+    def file_digest(self, path: Path) -> str:
+        """Content digest of an embedding file, memoized on size/mtime."""
+        path = Path(path).resolve()
+        signature = [list(s) for s in _stat_signature(path)]
+        with self._lock:
+            memo = self._digests.get(str(path))
+            if memo is not None and memo["signature"] == signature:
+                return memo["digest"]
+        
+        digest = _content_digest(path)
+        with self._lock:
+            self._digests[str(path)] = {"signature": signature, "digest": digest}
+            self._write_json(self.cache_dir / "digests.json", self._digests)
+        return digest
+    
+    def metrics_key(self, world_id: str, embedding_path: Path) -> str:
+        """Cache key for one world's per-cluster metrics."""
+        return self._key({
+            "world_id": world_id,
+            "digest": self.file_digest(embedding_path),
+        })
+    
+    def index_key(self, worlds: Mapping[str, Path]) -> str:
+        """Cache key for a similarity index over a set of worlds."""
+        return self._key({
+            "worlds": sorted(
+                (world_id, self.file_digest(path)) for world_id, path in worlds.items()
+            ),
+        })
+    
+    def _key(self, payload: Dict[str, Any]) -> str:
+        payload = dict(payload, format=CACHE_FORMAT_VERSION, config=self._config_key)
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+    
+    # ----- metrics -----
+    
+    def get_metrics(self, key: str) -> Optional[Dict[str, KakeyaMetrics]]:
+        """Per-cluster metrics for a key, or None on a miss."""
+        path = self._metrics_dir / f"{key}.json"
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        
+        self._touch(path)
+        self.hits += 1
+        return {cluster: KakeyaMetrics.from_dict(d) for cluster, d in data.items()}
+    
+    def put_metrics(self, key: str, metrics: Mapping[str, KakeyaMetrics]) -> None:
+        """Store per-cluster metrics and evict if over budget."""
+        self._write_json(
+            self._metrics_dir / f"{key}.json",
+            {cluster: m.to_dict() for cluster, m in metrics.items()}
+        )
+        self.evict()
+    
+    # ----- similarity index -----
+    
+    def get_index(self, key: str) -> Optional[SimilarityIndex]:
+        """Cached similarity index for a key, or None on a miss."""
+        from .async_controller import SimilarityIndex
+        
+        path = self._index_dir / f"{key}.pkl"
+        if not path.exists():
+            self.misses += 1
+            return None
+        
+        index = SimilarityIndex()
+        try:
+            index.load(path)
+        except Exception:
+            # Truncated or from an incompatible version: treat as a miss
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+        
+        self._touch(path)
+        self.hits += 1
+        return index
+    
+    def put_index(self, key: str, index: SimilarityIndex) -> None:
+        """Store a similarity index snapshot and evict if over budget."""
+        path = self._index_dir / f"{key}.pkl"
+        tmp = path.with_suffix(f".tmp{threading.get_ident()}")
+        index.save(tmp)
+        os.replace(tmp, path)
+        self.evict()
+    
+    # ----- maintenance -----
+    
+    def invalidate(self, key: str) -> None:
+        """Drop the metrics and index entries for a key."""
+        (self._metrics_dir / f"{key}.json").unlink(missing_ok=True)
+        (self._index_dir / f"{key}.pkl").unlink(missing_ok=True)
+    
+    def clear(self) -> None:
+        """Drop every entry and the digest memo."""
+        for path, _, _ in self._entries():
+            path.unlink(missing_ok=True)
+        with self._lock:
+            self._digests = {}
+            (self.cache_dir / "digests.json").unlink(missing_ok=True)
+    
+    def total_bytes(self) -> int:
+        """Total size of all cache entries."""
+        return sum(size for _, size, _ in self._entries())
+    
+    def evict(self) -> int:
+        """Remove least-recently-used entries until under max_bytes.
+        
+        Returns:
+            Number of entries removed
+        """
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for path, size, _ in sorted(entries, key=lambda e: e[2]):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
+    
+    def _entries(self) -> List[Tuple[Path, int, int]]:
+        """(path, size, last-used mtime_ns) for every entry file."""
+        entries = []
+        for directory in (self._metrics_dir, self._index_dir):
+            for entry in os.scandir(directory):
+                if entry.is_file() and ".tmp" not in entry.name:
+                    try:
+                        st = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((Path(entry.path), st.st_size, st.st_mtime_ns))
+        return entries
+    
+    @staticmethod
+    def _touch(path: Path) -> None:
+        """Mark an entry as recently used."""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+    
+    def _read_digests(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.cache_dir / "digests.json", 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    @staticmethod
+    def _write_json(path: Path, data: Any) -> None:
+        """Atomic JSON write (tmp file + os.replace)."""
+        tmp = path.with_suffix(f".tmp{threading.get_ident()}")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
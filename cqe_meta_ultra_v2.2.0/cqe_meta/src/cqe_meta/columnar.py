@@ -0,0 +1,362 @@
+"""
+CQE Meta - Binary Columnar Embedding Store
+==========================================
+
+Second on-disk format for embedding worlds. Vectors live in one raw
+float block and the scalar lane fields in typed columns, all of which are
+memory-mapped on load. Metadata and provenance go into a JSONL side table
+that is only parsed when receipts are materialized.
+
+Layout of a store directory::
+
+    world.cqeb/
+    ├── manifest.json       # format, row count, vec_dim, column dtypes
+    ├── vecs.bin            # (N, vec_dim) raw vec_dtype
+    ├── lane_feat.bin       # (N, 4) float64
+    ├── cqe_channel.bin     # (N,) int32
+    ├── delta_phi.bin       # (N,) float64
+    ├── rho_like.bin        # (N,) float64
+    ├── scope.bin           # (N,) bool
+    ├── sample_index.bin    # (N,) int64, -1 for "no index"
+    └── meta.jsonl          # session headers + one side record per row
+
+The manifest row count is authoritative: columns are appended first and
+the manifest is replaced last, so an interrupted append leaves the store
+readable at its previous length.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .config import CQEMetaConfig, get_config
+from .provenance import (
+    ComputationalReceipt,
+    ProvenanceSession,
+    is_session_record,
+)
+
+FORMAT_NAME = "cqe-columnar"
+FORMAT_VERSION = 1
+
+# Fixed lane columns: name -> (dtype, per-row shape)
+LANE_COLUMNS: Dict[str, Tuple[str, Tuple[int, ...]]] = {
+    "lane_feat": ("<f8", (4,)),
+    "cqe_channel": ("<i4", ()),
+    "delta_phi": ("<f8", ()),
+    "rho_like": ("<f8", ()),
+    "scope": ("|b1", ()),
+    "sample_index": ("<i8", ()),
+}
+
+# Receipt fields stored as columns rather than in the side table
+_COLUMN_FIELDS = ("vec", "vec_dim", "lane_feat", "cqe_channel", "delta_phi",
+                  "rho_like", "scope", "sample_index")
+
+
+def _maybe_fsync(f: IO, fsync: bool) -> None:
+    """Flush and fsync an open file when requested."""
+    if fsync:
+        f.flush()
+        os.fsync(f.fileno())
+
+
+@dataclass
+class EmbeddingColumns:
+    """Memory-mapped columns of a columnar store (no per-row objects)."""
+    
+    path: Path
+    vecs: np.ndarray  # (N, vec_dim)
+    lane_feat: np.ndarray  # (N, 4)
+    cqe_channel: np.ndarray  # (N,)
+    delta_phi: np.ndarray  # (N,)
+    rho_like: np.ndarray  # (N,)
+    scope: np.ndarray  # (N,)
+    sample_index: np.ndarray  # (N,), -1 where absent
+    
+    def __len__(self) -> int:
+        return len(self.vecs)
+    
+    def side_records(self) -> List[Dict[str, Any]]:
+        """Parse the metadata/provenance side table (one dict per row)."""
+        return self._read_side_table()[0]
+    
+    def to_receipts(self) -> List[ComputationalReceipt]:
+        """Materialize ComputationalReceipt objects for every row."""
+        records, sessions = self._read_side_table()
+        receipts = []
+        for i, record in enumerate(records):
+            record.update(self._row_fields(i))
+            receipts.append(ComputationalReceipt.from_dict(record, sessions))
+        return receipts
+    
+    def _read_side_table(self) -> Tuple[List[Dict[str, Any]], Dict[str, ProvenanceSession]]:
+        sessions: Dict[str, ProvenanceSession] = {}
+        records: List[Dict[str, Any]] = []
+        meta_path = self.path / "meta.jsonl"
+        if not meta_path.exists():
+            return records, sessions
+        
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if len(records) == len(self):
+                    break
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                if is_session_record(data):
+                    session = ProvenanceSession.from_header(data)
+                    sessions[session.session_id] = session
+                    continue
+                records.append(data)
+        
+        return records, sessions
+    
+    def _row_fields(self, i: int) -> Dict[str, Any]:
+        vec = self.vecs[i].tolist()
+        fields = {
+            "vec": vec,
+            "vec_dim": len(vec),
+            "lane_feat": self.lane_feat[i].tolist(),
+            "cqe_channel": int(self.cqe_channel[i]),
+            "delta_phi": float(self.delta_phi[i]),
+            "rho_like": float(self.rho_like[i]),
+            "scope": bool(self.scope[i]),
+        }
+        index = int(self.sample_index[i])
+        if index >= 0:
+            fields["sample_index"] = index
+        return fields
+
+
+class ColumnarEmbeddingStore:
+    """Binary columnar storage for embeddings with memory-mapped loading.
+    
+    ``vec_dtype`` defaults to float32. Receipts materialized from a float32
+    store carry rounded vectors, so their merkle roots no longer verify;
+    use float64 where receipts must stay verifiable.
+    """
+    
+    def __init__(
+        self,
+        path: Path,
+        config: Optional[CQEMetaConfig] = None,
+        vec_dtype: Any = np.float32
+    ):
+        self.path = Path(path)
+        self.config = config or get_config()
+        self.vec_dtype = np.dtype(vec_dtype)
+    
+    @staticmethod
+    def is_columnar(path: Path) -> bool:
+        """True if ``path`` is a columnar store directory."""
+        return (Path(path) / "manifest.json").exists()
+    
+    def exists(self) -> bool:
+        return self.is_columnar(self.path)
+    
+    def read_manifest(self) -> Dict[str, Any]:
+        with open(self.path / "manifest.json", 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get("format") != FORMAT_NAME:
+            raise ValueError(f"Not a columnar embedding store: {self.path}")
+        return manifest
+    
+    def __len__(self) -> int:
+        return self.read_manifest()["n"] if self.exists() else 0
+    
+    # ----- writing -----
+    
+    def save(self, receipts: List[Any]) -> int:
+        """Save embeddings, replacing any existing store."""
+        if self.exists():
+            for name in ("manifest.json", "vecs.bin", "meta.jsonl",
+                         *(f"{col}.bin" for col in LANE_COLUMNS)):
+                target = self.path / name
+                if target.exists():
+                    target.unlink()
+        return self.append(receipts)
+    
+    def append(self, receipts: List[Any], fsync: bool = False) -> int:
+        """Append receipts as one batch of column rows + side records."""
+        if not receipts:
+            return 0
+        
+        columns = {
+            "lane_feat": np.array([r.lane_feat for r in receipts], dtype=float).reshape(-1, 4),
+            "cqe_channel": np.array([r.cqe_channel for r in receipts]),
+            "delta_phi": np.array([r.delta_phi for r in receipts], dtype=float),
+            "rho_like": np.array([r.rho_like for r in receipts], dtype=float),
+            "scope": np.array([r.scope for r in receipts], dtype=bool),
+            "sample_index": np.array(
+                [-1 if r.sample_index is None else r.sample_index for r in receipts]
+            ),
+        }
+        vecs = np.array([r.vec for r in receipts], dtype=float)
+        side = []
+        for r in receipts:
+            record = r.to_dict(compact=True) if hasattr(r, "provenance") else r.to_dict()
+            for key in _COLUMN_FIELDS:
+                record.pop(key, None)
+            side.append((getattr(r, "provenance", None), record))
+        
+        return self.append_columns(vecs, columns, side, fsync=fsync)
+    
+    def append_columns(
+        self,
+        vecs: np.ndarray,
+        columns: Dict[str, np.ndarray],
+        side: Iterable[Tuple[Any, Dict[str, Any]]],
+        fsync: bool = False
+    ) -> int:
+        """Append pre-built column arrays and side records.
+        
+        Args:
+            vecs: (n, vec_dim) vectors
+            columns: Arrays for every name in LANE_COLUMNS
+            side: (provenance, record) per row; provenance (or None) is
+                used to emit session headers for compact records
+            fsync: Make the new rows durable before the manifest publishes them
+        """
+        vecs = np.asarray(vecs)
+        if vecs.ndim != 2:
+            raise ValueError("vecs must be a 2-D (n, vec_dim) array")
+        n_new, vec_dim = vecs.shape
+        
+        self.path.mkdir(parents=True, exist_ok=True)
+        if self.exists():
+            manifest = self.read_manifest()
+            if manifest["vec_dim"] != vec_dim:
+                raise ValueError(
+                    f"vec_dim mismatch: store has {manifest['vec_dim']}, got {vec_dim}"
+                )
+            vec_dtype = np.dtype(manifest["vec_dtype"])
+            self._truncate_to(manifest, vec_dtype)
+        else:
+            vec_dtype = self.vec_dtype
+            manifest = {
+                "format": FORMAT_NAME,
+                "version": FORMAT_VERSION,
+                "n": 0,
+                "vec_dim": vec_dim,
+                "vec_dtype": vec_dtype.str,
+                "columns": {name: dtype for name, (dtype, _) in LANE_COLUMNS.items()},
+                "meta_bytes": 0,
+                "sessions": [],
+            }
+        
+        with open(self.path / "vecs.bin", 'ab') as f:
+            f.write(np.ascontiguousarray(vecs, dtype=vec_dtype).tobytes())
+            _maybe_fsync(f, fsync)
+        for name, (dtype, shape) in LANE_COLUMNS.items():
+            arr = np.ascontiguousarray(columns[name], dtype=np.dtype(dtype))
+            if arr.shape != (n_new,) + shape:
+                raise ValueError(f"Column {name} has shape {arr.shape}, expected {(n_new,) + shape}")
+            with open(self.path / f"{name}.bin", 'ab') as f:
+                f.write(arr.tobytes())
+                _maybe_fsync(f, fsync)
+        
+        written_sessions = set(manifest["sessions"])
+        with open(self.path / "meta.jsonl", 'a', encoding='utf-8') as f:
+            for provenance, record in side:
+                session_id = getattr(provenance, "session_id", None)
+                if session_id is not None and session_id not in written_sessions:
+                    header = ProvenanceSession(
+                        session_id=session_id,
+                        git_commit=provenance.git_commit,
+                        execution_environment=provenance.execution_environment
+                    )
+                    f.write(json.dumps(header.to_header()) + '\n')
+                    written_sessions.add(session_id)
+                f.write(json.dumps(record) + '\n')
+            _maybe_fsync(f, fsync)
+        
+        manifest["n"] += n_new
+        manifest["meta_bytes"] = (self.path / "meta.jsonl").stat().st_size
+        manifest["sessions"] = sorted(written_sessions)
+        self._write_manifest(manifest, fsync=fsync)
+        return n_new
+    
+    def _truncate_to(self, manifest: Dict[str, Any], vec_dtype: np.dtype) -> None:
+        """Drop bytes past the manifest row count left by an interrupted append."""
+        n = manifest["n"]
+        expected = {
+            "vecs.bin": n * manifest["vec_dim"] * vec_dtype.itemsize,
+            "meta.jsonl": manifest.get("meta_bytes", 0),
+        }
+        for name, (dtype, shape) in LANE_COLUMNS.items():
+            expected[f"{name}.bin"] = n * int(np.prod(shape, dtype=int)) * np.dtype(dtype).itemsize
+        for name, size in expected.items():
+            target = self.path / name
+            if target.exists() and target.stat().st_size > size:
+                os.truncate(target, size)
+    
+    def _write_manifest(self, manifest: Dict[str, Any], fsync: bool = False) -> None:
+        tmp = self.path / "manifest.json.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+            _maybe_fsync(f, fsync)
+        os.replace(tmp, self.path / "manifest.json")
+    
+    # ----- reading -----
+    
+    def load_columns(self) -> EmbeddingColumns:
+        """Memory-map all columns; no per-row objects are created."""
+        manifest = self.read_manifest()
+        n = manifest["n"]
+        vecs = self._map("vecs.bin", manifest["vec_dtype"], (n, manifest["vec_dim"]))
+        columns = {
+            name: self._map(f"{name}.bin", dtype, (n,) + shape)
+            for name, (dtype, shape) in LANE_COLUMNS.items()
+        }
+        return EmbeddingColumns(path=self.path, vecs=vecs, **columns)
+    
+    def _map(self, name: str, dtype: str, shape: Tuple[int, ...]) -> np.ndarray:
+        if shape[0] == 0:
+            return np.zeros(shape, dtype=np.dtype(dtype))
+        return np.memmap(self.path / name, dtype=np.dtype(dtype), mode='r', shape=shape)
+    
+    def load(self) -> List[ComputationalReceipt]:
+        """Load embeddings as receipts (same result type as EmbeddingStore.load)."""
+        if not self.exists():
+            return []
+        return self.load_columns().to_receipts()
+
+
+def convert_jsonl_to_columnar(
+    src: Path,
+    dst: Path,
+    config: Optional[CQEMetaConfig] = None,
+    vec_dtype: Any = np.float32,
+    chunk_size: int = 65536
+) -> int:
+    """Convert a JSONL embedding file into a columnar store (chunked)."""
+    from .provenance import iter_receipt_chunks
+    
+    store = ColumnarEmbeddingStore(dst, config, vec_dtype=vec_dtype)
+    store.save([])
+    
+    total = 0
+    with open(src, 'r', encoding='utf-8') as f:
+        for chunk in iter_receipt_chunks(f, chunk_size):
+            total += store.append(chunk)
+    
+    return total
+
+
+def convert_columnar_to_jsonl(
+    src: Path,
+    dst: Path,
+    config: Optional[CQEMetaConfig] = None
+) -> int:
+    """Convert a columnar store back into a JSONL embedding file."""
+    from .embedding import EmbeddingStore
+    
+    receipts = ColumnarEmbeddingStore(src, config).load()
+    return EmbeddingStore(Path(dst), config).save(receipts)
@@ -104,6 +104,13 @@ class KakeyaConfig:
     max_pairs: int = 500
     min_samples: int = 8
     pca_dimensions: int = 3
+    
+    # Direction sampling: "adjacent" (i, i+1) pairs or "knn" nearest neighbours
+    pair_mode: str = "adjacent"
+    knn_neighbors: int = 1
+    
+    # Rank of the SVD sketch kept by StreamingKakeyaAnalyzer
+    sketch_rank: int = 64
 
 
 @dataclass
@@ -181,6 +188,8 @@ class CQEMetaConfig:
                 'n_azimuth': self.kakeya.n_azimuth,
                 'n_elevation': self.kakeya.n_elevation,
                 'max_pairs': self.kakeya.max_pairs,
+                'pair_mode': self.kakeya.pair_mode,
+                'knn_neighbors': self.kakeya.knn_neighbors,
             },
             'validator': {
                 'timeout': self.validator.timeout,
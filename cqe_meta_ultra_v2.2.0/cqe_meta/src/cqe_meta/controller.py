@@ -10,12 +10,14 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 import numpy as np
 
+from .cache import AnalysisCache
+from .columnar import ColumnarEmbeddingStore, EmbeddingColumns
 from .config import CQEMetaConfig, get_config
-from .embedding import EmbeddingPipeline, EmbeddingReceipt, EmbeddingStore
+from .embedding import EmbeddingPipeline, EmbeddingReceipt, open_embedding_store
 from .kakeya import KakeyaAnalyzer, KakeyaMetrics
 from .validators import YangMillsValidatorAdapter, RiemannValidatorAdapter
 
@@ -33,7 +35,14 @@ class WorldDescriptor:
 
 
 class ClusterManager:
-    """Manages clustering logic for different worlds."""
+    """Manages clustering logic for different worlds.
+    
+    Clustering is computed on row indices so it applies equally to a list
+    of receipts and to the columns of a columnar store.
+    """
+    
+    # Worlds whose clusters depend on per-row metadata
+    METADATA_WORLDS = ("PEND", "NS", "RIEMANN")
     
     def __init__(self, config: Optional[CQEMetaConfig] = None):
         self.config = config or get_config()
@@ -45,19 +54,27 @@ class ClusterManager:
         thresholds: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None
     ) -> Dict[str, List[EmbeddingReceipt]]:
         """Cluster receipts by a metadata field with optional thresholds."""
+        rows = self.group_rows_by_metadata([r.metadata for r in receipts], metadata_key, thresholds)
+        return self._select(receipts, rows)
+    
+    def group_rows_by_metadata(
+        self,
+        metadata: List[Dict[str, Any]],
+        metadata_key: str,
+        thresholds: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None
+    ) -> Dict[str, List[int]]:
+        """Group row indices by a metadata field with optional thresholds."""
+        clusters: Dict[str, List[int]] = {}
         if thresholds is None:
             # Group by exact value
-            clusters: Dict[str, List[EmbeddingReceipt]] = {}
-            for receipt in receipts:
-                value = receipt.metadata.get(metadata_key, "unknown")
-                key = str(value)
-                clusters.setdefault(key, []).append(receipt)
+            for i, meta in enumerate(metadata):
+                value = meta.get(metadata_key, "unknown")
+                clusters.setdefault(str(value), []).append(i)
             return clusters
         
         # Group by threshold bands
-        clusters = {}
-        for receipt in receipts:
-            value = float(receipt.metadata.get(metadata_key, 0.0))
+        for i, meta in enumerate(metadata):
+            value = float(meta.get(metadata_key, 0.0))
             
             # Find matching threshold band
             matched = False
@@ -66,18 +83,43 @@ class ClusterManager:
                     continue
                 if high is not None and value >= high:
                     continue
-                clusters.setdefault(band_name, []).append(receipt)
+                clusters.setdefault(band_name, []).append(i)
                 matched = True
                 break
             
             if not matched:
-                clusters.setdefault("other", []).append(receipt)
+                clusters.setdefault("other", []).append(i)
         
         return clusters
     
-    def cluster_pendulum(self, receipts: List[EmbeddingReceipt]) -> Dict[str, List[EmbeddingReceipt]]:
-        """Cluster pendulum embeddings by rho3."""
-        thresholds = {
+    def cluster_rows(
+        self,
+        world_id: str,
+        n: int,
+        load_metadata: Callable[[], List[Dict[str, Any]]]
+    ) -> Dict[str, List[int]]:
+        """Row indices of each cluster of a world with n embeddings.
+        
+        Args:
+            world_id: World identifier (selects the clustering rule)
+            n: Number of embeddings in the world
+            load_metadata: Returns the per-row metadata dicts; only called
+                for worlds in METADATA_WORLDS
+        
+        Returns:
+            Dict of cluster name -> ascending row indices
+        """
+        if world_id == "PEND":
+            return self.group_rows_by_metadata(load_metadata(), "rho3", self._pendulum_thresholds())
+        if world_id == "NS":
+            return self._ns_rows(load_metadata())
+        if world_id == "RIEMANN":
+            return self.group_rows_by_metadata(load_metadata(), "label")
+        name = "YM_all" if world_id == "YM" else "all"
+        return {name: list(range(n))}
+    
+    def _pendulum_thresholds(self) -> Dict[str, Tuple[Optional[float], Optional[float]]]:
+        return {
             "P_rho_low": (None, self.config.embedding.pendulum_rho_low_threshold),
             "P_rho_mid": (
                 self.config.embedding.pendulum_rho_low_threshold,
@@ -85,25 +127,38 @@ class ClusterManager:
             ),
             "P_rho_high": (self.config.embedding.pendulum_rho_high_threshold, None),
         }
-        return self.cluster_by_metadata(receipts, "rho3", thresholds)
     
-    def cluster_ns(self, receipts: List[EmbeddingReceipt]) -> Dict[str, List[EmbeddingReceipt]]:
-        """Cluster Navier-Stokes embeddings by viscosity."""
+    def _ns_rows(self, metadata: List[Dict[str, Any]]) -> Dict[str, List[int]]:
         smooth_thresh = self.config.embedding.ns_viscosity_smooth_threshold
         turb_thresh = self.config.embedding.ns_viscosity_turbulent_threshold
         
         smooth = []
         turbulent = []
         
-        for receipt in receipts:
-            visc = float(receipt.metadata.get("viscosity", 0.0))
+        for i, meta in enumerate(metadata):
+            visc = float(meta.get("viscosity", 0.0))
             if visc >= smooth_thresh:
-                smooth.append(receipt)
+                smooth.append(i)
             elif visc <= turb_thresh:
-                turbulent.append(receipt)
+                turbulent.append(i)
         
         return {"NS_smooth": smooth, "NS_turbulent": turbulent}
     
+    @staticmethod
+    def _select(
+        receipts: List[EmbeddingReceipt],
+        rows: Dict[str, List[int]]
+    ) -> Dict[str, List[EmbeddingReceipt]]:
+        return {name: [receipts[i] for i in idx] for name, idx in rows.items()}
+    
+    def cluster_pendulum(self, receipts: List[EmbeddingReceipt]) -> Dict[str, List[EmbeddingReceipt]]:
+        """Cluster pendulum embeddings by rho3."""
+        return self.cluster_by_metadata(receipts, "rho3", self._pendulum_thresholds())
+    
+    def cluster_ns(self, receipts: List[EmbeddingReceipt]) -> Dict[str, List[EmbeddingReceipt]]:
+        """Cluster Navier-Stokes embeddings by viscosity."""
+        return self._select(receipts, self._ns_rows([r.metadata for r in receipts]))
+    
     def cluster_ym(self, receipts: List[EmbeddingReceipt]) -> Dict[str, List[EmbeddingReceipt]]:
         """Yang-Mills as single cluster."""
         return {"YM_all": receipts}
@@ -113,10 +168,48 @@ class ClusterManager:
         return self.cluster_by_metadata(receipts, "label")
 
 
+# Loaded world: memory-mapped columns (columnar store) or receipts (JSONL)
+WorldData = Union[EmbeddingColumns, List[EmbeddingReceipt]]
+
+
+def load_world_data(path: Path, config: Optional[CQEMetaConfig] = None) -> WorldData:
+    """Open a world's embeddings without building receipts for columnar stores."""
+    store = open_embedding_store(path, config)
+    if isinstance(store, ColumnarEmbeddingStore) and store.exists():
+        return store.load_columns()
+    return store.load()
+
+
+def analyze_world_data(
+    world_id: str,
+    data: WorldData,
+    cluster_manager: ClusterManager,
+    kakeya: KakeyaAnalyzer
+) -> Dict[str, KakeyaMetrics]:
+    """Cluster a loaded world and compute per-cluster Kakeya metrics.
+    
+    Columns are clustered and analyzed in place: only the metadata side
+    table is parsed (for metadata-clustered worlds), never receipts.
+    """
+    if isinstance(data, EmbeddingColumns):
+        rows = cluster_manager.cluster_rows(
+            world_id, len(data),
+            lambda: [record.get("metadata", {}) for record in data.side_records()]
+        )
+        return kakeya.analyze_row_clusters(data.vecs, rows)
+    
+    rows = cluster_manager.cluster_rows(world_id, len(data), lambda: [r.metadata for r in data])
+    return kakeya.analyze_clusters(ClusterManager._select(data, rows))
+
+
 class MetaWorldController:
     """Central controller for cross-world geometric analysis."""
     
-    def __init__(self, config: Optional[CQEMetaConfig] = None):
+    def __init__(
+        self,
+        config: Optional[CQEMetaConfig] = None,
+        cache: Optional[AnalysisCache] = None
+    ):
         self.config = config or get_config()
         self.pipeline = EmbeddingPipeline(config)
         self.kakeya = KakeyaAnalyzer(config)
@@ -124,8 +217,11 @@ class MetaWorldController:
         
         # World registry
         self.worlds: Dict[str, WorldDescriptor] = {}
-        self._world_embeddings: Dict[str, List[EmbeddingReceipt]] = {}
+        self._world_embeddings: Dict[str, WorldData] = {}
         self._world_metrics: Dict[str, Dict[str, KakeyaMetrics]] = {}
+        
+        # Optional persistent cache of per-cluster metrics
+        self.cache = cache
     
     def register_world(
         self,
@@ -147,7 +243,16 @@ class MetaWorldController:
         )
     
     def load_world(self, world_id: str) -> List[EmbeddingReceipt]:
-        """Load embeddings for a world."""
+        """Load embeddings for a world as receipts."""
+        data = self._load_world_data(world_id)
+        if isinstance(data, EmbeddingColumns):
+            # Receipts are only built here, at the API edge
+            data = data.to_receipts()
+            self._world_embeddings[world_id] = data
+        return data
+    
+    def _load_world_data(self, world_id: str) -> WorldData:
+        """Columns of a columnar world, receipts of a JSONL one (cached)."""
         if world_id not in self.worlds:
             raise ValueError(f"Unknown world: {world_id}")
         
@@ -155,34 +260,33 @@ class MetaWorldController:
             return self._world_embeddings[world_id]
         
         world = self.worlds[world_id]
-        store = EmbeddingStore(world.embedding_path, self.config)
-        receipts = store.load()
+        data = load_world_data(world.embedding_path, self.config)
         
-        self._world_embeddings[world_id] = receipts
-        return receipts
+        self._world_embeddings[world_id] = data
+        return data
     
     def analyze_world(self, world_id: str) -> Dict[str, KakeyaMetrics]:
         """Analyze a world and return per-cluster metrics."""
         if world_id in self._world_metrics:
             return self._world_metrics[world_id]
         
-        receipts = self.load_world(world_id)
+        if world_id not in self.worlds:
+            raise ValueError(f"Unknown world: {world_id}")
         
-        # Cluster based on world type
-        if world_id == "PEND":
-            clusters = self.cluster_manager.cluster_pendulum(receipts)
-        elif world_id == "NS":
-            clusters = self.cluster_manager.cluster_ns(receipts)
-        elif world_id == "YM":
-            clusters = self.cluster_manager.cluster_ym(receipts)
-        elif world_id == "RIEMANN":
-            clusters = self.cluster_manager.cluster_riemann(receipts)
-        else:
-            clusters = {"all": receipts}
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.metrics_key(world_id, self.worlds[world_id].embedding_path)
+            cached = self.cache.get_metrics(cache_key)
+            if cached is not None:
+                self._world_metrics[world_id] = cached
+                return cached
+        
+        data = self._load_world_data(world_id)
+        metrics = analyze_world_data(world_id, data, self.cluster_manager, self.kakeya)
         
-        # Analyze each cluster
-        metrics = self.kakeya.analyze_clusters(clusters)
         self._world_metrics[world_id] = metrics
+        if cache_key is not None:
+            self.cache.put_metrics(cache_key, metrics)
         return metrics
     
     def get_world_summary(self) -> Dict[str, Dict[str, Any]]:
@@ -192,7 +296,7 @@ class MetaWorldController:
             metrics = self.analyze_world(world_id)
             summary[world_id] = {
                 "name": self.worlds[world_id].name,
-                "n_embeddings": len(self.load_world(world_id)),
+                "n_embeddings": len(self._load_world_data(world_id)),
                 "clusters": {
                     cluster_name: {
                         "n": m.n,
@@ -273,15 +377,10 @@ class MetaWorldController:
                 all_metrics.append(metrics)
                 labels.append(f"{world_id}/{cluster_name}")
         
-        # Compute pairwise distances
-        n = len(all_metrics)
-        matrix = np.zeros((n, n))
-        
-        for i in range(n):
-            for j in range(i + 1, n):
-                dist = self.kakeya.compute_similarity(all_metrics[i], all_metrics[j])
-                matrix[i, j] = dist
-                matrix[j, i] = dist
+        # Compute pairwise distances in one broadcast
+        features, valid = self.kakeya.similarity_features(all_metrics)
+        matrix = self.kakeya.pairwise_similarity(features, valid, features, valid)
+        np.fill_diagonal(matrix, 0.0)
         
         return matrix, labels
     
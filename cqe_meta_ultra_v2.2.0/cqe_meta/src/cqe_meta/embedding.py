@@ -132,6 +132,44 @@ class GeometryFeatureExtractor:
         total = sum(flat) or 1.0
         return [v / total for v in flat]
     
+    def radial_angle_histogram_batch(
+        self,
+        points: np.ndarray,
+        rbins: Optional[int] = None,
+        abins: Optional[int] = None
+    ) -> np.ndarray:
+        """Build radial-angle histograms for an (N, P, 2) point batch.
+        
+        Returns an (N, rbins * abins) array; row i equals
+        ``radial_angle_histogram`` of the i-th point set.
+        """
+        rbins = rbins or self.config.embedding.radial_bins
+        abins = abins or self.config.embedding.angular_bins
+        n_rows, n_points = points.shape[0], points.shape[1]
+        n_bins = rbins * abins
+        
+        x = points[..., 0]
+        y = points[..., 1]
+        r = np.hypot(x, y)
+        a = np.arctan2(y, x)
+        a = np.where(a < 0, a + 2 * math.pi, a)
+        
+        ri = np.minimum(rbins - 1, (np.minimum(r, 1.0) * rbins).astype(np.int64))
+        ai = np.minimum(abins - 1, (a / (2 * math.pi) * abins).astype(np.int64))
+        
+        # One bincount over all rows: offset each row's bin ids by row * n_bins
+        bin_ids = ri * abins + ai + (np.arange(n_rows, dtype=np.int64) * n_bins)[:, None]
+        counts = np.bincount(bin_ids.ravel(), minlength=n_rows * n_bins)
+        hist = counts.reshape(n_rows, n_bins).astype(float)
+        return hist / float(n_points or 1)
+    
+    def flatten_to_2d_points_batch(self, vectors: np.ndarray) -> np.ndarray:
+        """Flatten an (N, ...) batch to (N, P, 2) point pairs (zero-padded if odd)."""
+        flat = np.asarray(vectors, dtype=float).reshape(len(vectors), -1)
+        if flat.shape[1] % 2:
+            flat = np.concatenate([flat, np.zeros((len(flat), 1))], axis=1)
+        return flat.reshape(len(flat), -1, 2)
+    
     def flatten_to_2d_points(self, vector: np.ndarray) -> List[Tuple[float, float]]:
         """Flatten high-dimensional vector to 2D point pairs."""
         flat = vector.reshape(-1)
@@ -164,6 +202,20 @@ class GeometryFeatureExtractor:
         top_sum = sum(sorted_mags[:split])
         total_sum = sum(sorted_mags) or 1.0
         return top_sum / total_sum
+    
+    def compute_concentration_batch(self, magnitudes: np.ndarray, top_fraction: float = 0.1) -> np.ndarray:
+        """Row-wise ρ-like concentration for an (N, P) magnitude array."""
+        n_rows, n_points = magnitudes.shape
+        if n_points == 0:
+            return np.zeros(n_rows)
+        
+        split = max(1, int(n_points * top_fraction))
+        # Partitioned top-k: only the largest `split` values need to be found
+        top = -np.partition(-magnitudes, split - 1, axis=1)[:, :split]
+        top_sum = top.sum(axis=1)
+        total_sum = magnitudes.sum(axis=1)
+        total_sum[total_sum == 0] = 1.0
+        return top_sum / total_sum
 
 
 class CQELaneEncoder:
@@ -186,11 +238,67 @@ class CQELaneEncoder:
 
 
 class MoonshineFeatureGenerator:
-    """Generate moonshine-compatible stub features."""
+    """Generate moonshine-compatible stub features.
+    
+    A feature is ``RandomState(seed).uniform(-1, 1, dim)``. For a block of
+    seeds, generate_block runs the same MT19937 seeding and output
+    sequence with each seed in its own array lane, so a whole (N, dim)
+    block costs a fixed number of array operations and matches
+    generate() bit for bit.
+    """
+    
+    # MT19937 parameters
+    _N, _M = 624, 397
+    _MATRIX_A = np.uint64(0x9908B0DF)
+    _UPPER, _LOWER = np.uint64(0x80000000), np.uint64(0x7FFFFFFF)
+    _MASK32 = np.uint64(0xFFFFFFFF)
     
     def __init__(self, config: Optional[CQEMetaConfig] = None):
         self.config = config or get_config()
     
+    # Seeds per pass (bounds the (624, lanes) state array to ~20 MB)
+    _LANES = 4096
+    
+    @classmethod
+    def _uniform_block(cls, seeds: np.ndarray, dim: int) -> np.ndarray:
+        """(len(seeds), dim) values; row r equals RandomState(seeds[r]).uniform(-1, 1, dim)."""
+        seeds = np.asarray(seeds, dtype=np.int64).reshape(-1)
+        if seeds.size and (seeds.min() < 0 or seeds.max() > 0xFFFFFFFF):
+            raise ValueError("Seed must be between 0 and 2**32 - 1")
+        if len(seeds) > cls._LANES:
+            return np.concatenate([
+                cls._uniform_block(seeds[lo:lo + cls._LANES], dim)
+                for lo in range(0, len(seeds), cls._LANES)
+            ])
+        
+        # init_genrand, one lane per seed
+        N, M = cls._N, cls._M
+        mt = np.empty((N, len(seeds)), dtype=np.uint64)
+        mt[0] = seeds.astype(np.uint64)
+        for i in range(1, N):
+            prev = mt[i - 1]
+            mt[i] = (np.uint64(1812433253) * (prev ^ (prev >> np.uint64(30))) + np.uint64(i)) & cls._MASK32
+        
+        # Each double takes two 32-bit outputs; state words are twisted
+        # lazily in output order, which is the order a full twist uses
+        n_out = 2 * dim
+        out = np.empty((n_out, len(seeds)), dtype=np.uint64)
+        for k in range(n_out):
+            i = k % N
+            y = (mt[i] & cls._UPPER) | (mt[(i + 1) % N] & cls._LOWER)
+            mt[i] = mt[(i + M) % N] ^ (y >> np.uint64(1)) ^ ((y & np.uint64(1)) * cls._MATRIX_A)
+            # Tempering, into the output row (mt[i] stays untempered)
+            y = out[k]
+            np.bitwise_xor(mt[i], mt[i] >> np.uint64(11), out=y)
+            y ^= (y << np.uint64(7)) & np.uint64(0x9D2C5680)
+            y ^= (y << np.uint64(15)) & np.uint64(0xEFC60000)
+            y ^= y >> np.uint64(18)
+            y &= cls._MASK32
+        
+        a, b = out[0::2] >> np.uint64(5), out[1::2] >> np.uint64(6)
+        doubles = (a * 67108864.0 + b) / 9007199254740992.0
+        return -1.0 + 2.0 * doubles.T
+    
     def generate(
         self,
         dim: Optional[int] = None,
@@ -202,6 +310,22 @@ class MoonshineFeatureGenerator:
         
         rng = np.random.RandomState(seed)
         return rng.uniform(-1.0, 1.0, size=dim).astype(float).tolist()
+    
+    def generate_block(
+        self,
+        sample_indices: np.ndarray,
+        dim: Optional[int] = None
+    ) -> np.ndarray:
+        """Moonshine features for many sample indices as an (N, dim) array.
+        
+        Row i equals ``generate(seed=moonshine_seed + sample_indices[i])``.
+        """
+        dim = dim or self.config.embedding.moonshine_dim
+        base = self.config.embedding.moonshine_seed
+        seeds = base + np.asarray(sample_indices, dtype=np.int64).reshape(-1)
+        # generate() treats seed 0 as "use the configured seed"
+        seeds[seeds == 0] = base
+        return self._uniform_block(seeds, dim)
 
 
 class EmbeddingPipeline:
@@ -285,12 +409,13 @@ class EmbeddingStore:
         self.config = config or get_config()
     
     def save(self, receipts: List[Any]) -> int:
-        """Save embeddings to JSONL file."""
+        """Save embeddings to JSONL file (session headers written once)."""
+        from .provenance import write_receipts_jsonl
+        
         self.path.parent.mkdir(parents=True, exist_ok=True)
         
         with open(self.path, 'w', encoding='utf-8') as f:
-            for receipt in receipts:
-                f.write(json.dumps(receipt.to_dict()) + '\n')
+            write_receipts_jsonl(f, receipts, set())
         
         return len(receipts)
     
@@ -300,19 +425,10 @@ class EmbeddingStore:
             return []
         
         # Import here to avoid circular dependency
-        try:
-            from .provenance import ComputationalReceipt
-            receipt_class = ComputationalReceipt
-        except ImportError:
-            receipt_class = EmbeddingReceipt
+        from .provenance import read_receipts_jsonl
         
-        receipts = []
         with open(self.path, 'r', encoding='utf-8') as f:
-            for line in f:
-                data = json.loads(line)
-                receipts.append(receipt_class.from_dict(data))
-        
-        return receipts
+            return read_receipts_jsonl(f)
     
     def append(self, receipt: Any) -> None:
         """Append single embedding to file."""
@@ -320,3 +436,12 @@ class EmbeddingStore:
         
         with open(self.path, 'a', encoding='utf-8') as f:
             f.write(json.dumps(receipt.to_dict()) + '\n')
+
+
+def open_embedding_store(path: Path, config: Optional[CQEMetaConfig] = None) -> Any:
+    """Open the store at ``path``: columnar if it is a columnar directory, else JSONL."""
+    from .columnar import ColumnarEmbeddingStore
+    
+    if ColumnarEmbeddingStore.is_columnar(path):
+        return ColumnarEmbeddingStore(path, config)
+    return EmbeddingStore(path, config)
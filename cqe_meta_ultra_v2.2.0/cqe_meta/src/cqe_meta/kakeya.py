@@ -10,6 +10,7 @@ from __future__ import annotations
 
 import math
 from dataclasses import dataclass
+from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
 import numpy as np
@@ -17,6 +18,9 @@ import numpy as np
 from .config import CQEMetaConfig, get_config
 from .embedding import EmbeddingReceipt
 
+# Pairs processed per chunk when turning pair differences into bins
+PAIR_CHUNK_SIZE = 1 << 18
+
 
 @dataclass
 class KakeyaMetrics:
@@ -37,6 +41,17 @@ class KakeyaMetrics:
         if self.dimension_estimate is not None:
             result["dimension_estimate"] = float(self.dimension_estimate)
         return result
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, float]) -> KakeyaMetrics:
+        """Deserialize from dictionary."""
+        dimension = data.get("dimension_estimate")
+        return cls(
+            n=int(data["n"]),
+            K=float(data["K"]),
+            vol_proxy=float(data["vol_proxy"]),
+            dimension_estimate=int(dimension) if dimension is not None else None
+        )
 
 
 class KakeyaAnalyzer:
@@ -49,6 +64,8 @@ class KakeyaAnalyzer:
         self.max_pairs = self.config.kakeya.max_pairs
         self.min_samples = self.config.kakeya.min_samples
         self.pca_dim = self.config.kakeya.pca_dimensions
+        self.pair_mode = self.config.kakeya.pair_mode
+        self.knn_neighbors = self.config.kakeya.knn_neighbors
     
     def analyze_embeddings(self, receipts: List[EmbeddingReceipt]) -> KakeyaMetrics:
         """Compute Kakeya metrics for a list of embedding receipts."""
@@ -105,59 +122,91 @@ class KakeyaAnalyzer:
     
     def _compute_directional_coverage(self, Y: np.ndarray, n: int) -> float:
         """Compute directional coverage on S² from nearest-neighbor directions."""
-        dirs = []
-        m_pairs = min(self.max_pairs, n - 1)
-        
-        for i in range(m_pairs):
-            j = (i + 1) % n
-            diff = Y[j] - Y[i]
-            norm_d = float(np.linalg.norm(diff))
-            if norm_d < 1e-9:
-                continue
-            dirs.append(diff / norm_d)
-        
-        if not dirs:
-            return 0.0
+        if self.pair_mode == "knn":
+            src, dst = self._knn_pairs(Y)
+        elif self.pair_mode == "adjacent":
+            src = np.arange(min(self.max_pairs, n - 1))
+            dst = (src + 1) % n
+        else:
+            raise ValueError(f"Unknown pair_mode: {self.pair_mode}")
         
-        dirs_arr = np.stack(dirs, axis=0)
+        # Chunked so millions of pairs never materialize at once
+        hits = np.zeros(self.n_az * self.n_el, dtype=bool)
+        for lo in range(0, len(src), PAIR_CHUNK_SIZE):
+            hi = lo + PAIR_CHUNK_SIZE
+            diff = Y[dst[lo:hi]] - Y[src[lo:hi]]
+            norms = np.linalg.norm(diff, axis=1)
+            keep = norms >= 1e-9
+            dirs = diff[keep] / norms[keep, None]
+            
+            # Pad to 3D if needed
+            if dirs.shape[1] < 3:
+                padded = np.zeros((dirs.shape[0], 3), dtype=float)
+                padded[:, :dirs.shape[1]] = dirs
+                dirs = padded
+            
+            hits[np.unique(self._direction_bins(dirs))] = True
+        
+        return int(hits.sum()) / float(len(hits))
+    
+    def _knn_pairs(self, Y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(src, dst) index pairs linking points to their k nearest neighbours.
         
-        # Pad to 3D if needed
-        if dirs_arr.shape[1] < 3:
-            padded = np.zeros((dirs_arr.shape[0], 3), dtype=float)
-            padded[:, :dirs_arr.shape[1]] = dirs_arr
-            dirs_arr = padded
+        At most ``max_pairs`` pairs are returned, from query points spread
+        evenly over the cloud. Uses scipy's cKDTree when available and a
+        chunked brute-force search otherwise.
+        """
+        n = len(Y)
+        k = max(1, min(self.knn_neighbors, n - 1))
+        n_query = min(n, -(-self.max_pairs // k))
+        query = np.unique(np.linspace(0, n - 1, n_query).astype(np.int64))
         
-        return self._spherical_coverage(dirs_arr)
+        try:
+            from scipy.spatial import cKDTree
+        except ImportError:
+            cKDTree = None
+        
+        if cKDTree is not None:
+            _, nbrs = cKDTree(Y).query(Y[query], k=k + 1)
+            nbrs = np.asarray(nbrs).reshape(len(query), k + 1)
+        else:
+            nbrs = np.empty((len(query), k + 1), dtype=np.int64)
+            rows_per_chunk = max(1, (1 << 22) // max(n, 1))
+            for lo in range(0, len(query), rows_per_chunk):
+                q = query[lo:lo + rows_per_chunk]
+                d2 = ((Y[q][:, None, :] - Y[None, :, :]) ** 2).sum(axis=-1)
+                part = np.argpartition(d2, k, axis=1)[:, :k + 1]
+                order = np.argsort(np.take_along_axis(d2, part, axis=1), axis=1, kind="stable")
+                nbrs[lo:lo + len(q)] = np.take_along_axis(part, order, axis=1)
+        
+        # Drop each point's self match (or the farthest, if a duplicate displaced it)
+        is_self = nbrs == query[:, None]
+        is_self[~is_self.any(axis=1), k] = True
+        dst = nbrs[~is_self].reshape(len(query), k)
+        src = np.repeat(query, k)
+        return src[:self.max_pairs], dst.reshape(-1)[:self.max_pairs]
+    
+    def _direction_bins(self, directions: np.ndarray) -> np.ndarray:
+        """Flat (azimuth, elevation) bin id for each non-zero 3D direction."""
+        r = np.linalg.norm(directions, axis=1)
+        unit = directions[r >= 1e-9] / r[r >= 1e-9, None]
+        x, y, z = unit[:, 0], unit[:, 1], unit[:, 2]
+        
+        az = np.arctan2(y, x)
+        az = np.where(az < 0, az + 2 * math.pi, az)
+        el = np.arctan2(z, np.sqrt(x * x + y * y))
+        
+        # digitize against integer edges == min(n - 1, int(scaled)) for scaled >= 0
+        az_bin = np.digitize(az / (2 * math.pi) * self.n_az, np.arange(1, self.n_az))
+        el_bin = np.digitize((el + math.pi / 2.0) / math.pi * self.n_el, np.arange(1, self.n_el))
+        return az_bin * self.n_el + el_bin
     
     def _spherical_coverage(self, directions: np.ndarray) -> float:
         """Compute fraction of S² bins covered by direction vectors."""
         if directions.size == 0:
             return 0.0
         
-        hits = set()
-        for d in directions:
-            x, y, z = map(float, d)
-            r = float(np.sqrt(x * x + y * y + z * z))
-            if r < 1e-9:
-                continue
-            
-            # Normalize to unit sphere
-            x /= r
-            y /= r
-            z /= r
-            
-            # Compute azimuth and elevation
-            az = float(np.arctan2(y, x))
-            if az < 0:
-                az += 2 * math.pi
-            el = float(np.arctan2(z, np.sqrt(x * x + y * y)))
-            
-            # Bin indices
-            az_bin = min(self.n_az - 1, int(az / (2 * math.pi) * self.n_az))
-            el_bin = min(self.n_el - 1, int((el + math.pi / 2.0) / math.pi * self.n_el))
-            
-            hits.add((az_bin, el_bin))
-        
+        hits = np.unique(self._direction_bins(directions))
         total_bins = self.n_az * self.n_el
         return len(hits) / float(total_bins)
     
@@ -171,6 +220,24 @@ class KakeyaAnalyzer:
             results[cluster_name] = self.analyze_embeddings(receipts)
         return results
     
+    def analyze_row_clusters(
+        self,
+        vecs: np.ndarray,
+        clusters: Dict[str, List[int]]
+    ) -> Dict[str, KakeyaMetrics]:
+        """Analyze clusters given as row indices into an (N, d) vector array.
+        
+        Equivalent to analyze_clusters on the matching receipts, without
+        building them (vecs may be a memory-mapped column).
+        """
+        results = {}
+        for cluster_name, rows in clusters.items():
+            if len(rows) == 0:
+                results[cluster_name] = KakeyaMetrics(n=0, K=0.0, vol_proxy=0.0)
+            else:
+                results[cluster_name] = self.analyze_vectors(np.asarray(vecs[rows], dtype=float))
+        return results
+
     def classify_geometry(self, metrics: KakeyaMetrics) -> str:
         """Classify embedding cloud geometry into archetypes."""
         if metrics.n < self.min_samples:
@@ -219,3 +286,176 @@ class KakeyaAnalyzer:
         # Weighted combination
         distance = 0.5 * k_dist + 0.3 * vol_dist + 0.2 * n_dist
         return min(1.0, distance)
+    
+    def similarity_features(self, metrics: List[KakeyaMetrics]) -> Tuple[np.ndarray, np.ndarray]:
+        """Stack metrics into (n, 3) features (K, log10 vol, log10 n) plus a validity mask."""
+        features = np.zeros((len(metrics), 3))
+        valid = np.zeros(len(metrics), dtype=bool)
+        for i, m in enumerate(metrics):
+            features[i, 0] = m.K
+            features[i, 1] = math.log10(max(1e-12, m.vol_proxy))
+            features[i, 2] = math.log10(max(1, m.n))
+            valid[i] = m.n >= self.min_samples
+        return features, valid
+    
+    def pairwise_similarity(
+        self,
+        features_a: np.ndarray,
+        valid_a: np.ndarray,
+        features_b: np.ndarray,
+        valid_b: np.ndarray
+    ) -> np.ndarray:
+        """Vectorized ``compute_similarity`` between two feature sets.
+        
+        Returns an (len(a), len(b)) distance matrix; entry (i, j) equals
+        ``compute_similarity`` of the underlying metrics.
+        """
+        diff = np.abs(features_a[:, None, :] - features_b[None, :, :])
+        distance = 0.5 * diff[..., 0] + 0.3 * (diff[..., 1] / 12.0) + 0.2 * (diff[..., 2] / 3.0)
+        distance = np.minimum(1.0, distance)
+        distance[~valid_a, :] = 1.0
+        distance[:, ~valid_b] = 1.0
+        return distance
+
+
+class StreamingKakeyaAnalyzer(KakeyaAnalyzer):
+    """Online Kakeya metrics for embeddings that arrive in chunks.
+    
+    Keeps a running mean and a rank-``sketch_rank`` SVD of the centered
+    data, updated per chunk (incremental PCA). The sketch is exact while
+    the rank covers the embedding dimension; otherwise the top singular
+    values are approximate and dimension_estimate is capped at the rank.
+    Directional coverage is computed from a uniform reservoir sample of
+    ``max_pairs + 1`` vectors drawn from the whole stream. The sample is
+    kept in arrival order and projected onto the current PCA basis when
+    metrics are read. Until the reservoir fills it holds every vector, so
+    coverage matches the batch analyzer exactly.
+    
+    Memory is bounded by the sketch and the reservoir, independent of n.
+    
+    Example:
+        >>> stream = StreamingKakeyaAnalyzer()
+        >>> writer = StreamingEmbeddingWriter(path, listeners=[stream.update_receipts])
+        >>> ...
+        >>> stream.metrics()
+    """
+    
+    def __init__(self, config: Optional[CQEMetaConfig] = None, seed: int = 0):
+        super().__init__(config)
+        self.sketch_rank = self.config.kakeya.sketch_rank
+        self.seed = seed
+        self.reset()
+    
+    def reset(self) -> None:
+        """Forget all data seen so far."""
+        self.n = 0
+        self.mean: Optional[np.ndarray] = None
+        self.singular_values = np.zeros(0)
+        self.components: Optional[np.ndarray] = None  # (rank, d)
+        # Reservoir sample for coverage: rows and their stream positions
+        self._sample: List[np.ndarray] = []
+        self._sample_pos: List[np.ndarray] = []
+        self._sampled = 0
+        self._rng = np.random.default_rng(self.seed)
+    
+    def _reservoir_update(self, X: np.ndarray) -> None:
+        """Algorithm R over a chunk, vectorized; call before advancing n."""
+        capacity = self.max_pairs + 1
+        m = len(X)
+        take = min(max(capacity - self._sampled, 0), m)
+        if take:
+            self._sample.append(X[:take].copy())
+            self._sample_pos.append(np.arange(self.n, self.n + take))
+            self._sampled += take
+        if take == m:
+            return
+        
+        if len(self._sample) > 1:
+            self._sample = [np.concatenate(self._sample, axis=0)]
+            self._sample_pos = [np.concatenate(self._sample_pos)]
+        sample, pos = self._sample[0], self._sample_pos[0]
+        
+        # Row at stream position t replaces slot j ~ U[0, t] when j < capacity
+        t = np.arange(self.n + take, self.n + m)
+        slots = self._rng.integers(0, t + 1)
+        hit = np.flatnonzero(slots < capacity)
+        if len(hit) == 0:
+            return
+        # A slot hit twice in one chunk keeps the later row
+        _, last = np.unique(slots[hit][::-1], return_index=True)
+        hit = hit[len(hit) - 1 - last]
+        sample[slots[hit]] = X[take + hit]
+        pos[slots[hit]] = t[hit]
+    
+    def update(self, vecs: np.ndarray) -> None:
+        """Fold an (m, d) chunk of embedding vectors into the sketch."""
+        X = np.asarray(vecs, dtype=float)
+        if X.ndim != 2 or len(X) == 0:
+            return
+        m = len(X)
+        
+        if self.mean is not None and X.shape[1] != len(self.mean):
+            raise ValueError(f"Dimension mismatch: stream has {len(self.mean)}, got {X.shape[1]}")
+        
+        self._reservoir_update(X)
+        
+        chunk_mean = X.mean(axis=0)
+        if self.n == 0:
+            stacked = X - chunk_mean
+            new_mean = chunk_mean
+        else:
+            # Stack old sketch, centered chunk and the mean-shift correction row
+            correction = math.sqrt(self.n * m / (self.n + m)) * (self.mean - chunk_mean)
+            stacked = np.vstack([
+                self.singular_values[:, None] * self.components,
+                X - chunk_mean,
+                correction[None, :]
+            ])
+            new_mean = self.mean + (chunk_mean - self.mean) * (m / (self.n + m))
+        
+        _, S, Vt = np.linalg.svd(stacked, full_matrices=False)
+        rank = min(self.sketch_rank, len(S))
+        self.singular_values = S[:rank]
+        self.components = Vt[:rank]
+        self.mean = new_mean
+        self.n += m
+    
+    def update_receipts(self, receipts: List[EmbeddingReceipt]) -> None:
+        """Fold a list of receipts (e.g. a StreamingEmbeddingWriter flush) into the sketch."""
+        if receipts:
+            self.update(np.array([r.vec for r in receipts], dtype=float))
+    
+    def consume_jsonl(self, path: Path, chunk_size: int = 4096) -> int:
+        """Stream a JSONL embedding file through the sketch; returns rows read."""
+        from .provenance import iter_receipt_chunks
+        
+        n_before = self.n
+        with open(path, 'r', encoding='utf-8') as f:
+            for chunk in iter_receipt_chunks(f, chunk_size):
+                self.update_receipts(chunk)
+        return self.n - n_before
+    
+    def metrics(self) -> KakeyaMetrics:
+        """Current metrics; cheap enough to poll while data is streaming in."""
+        if self.n < self.min_samples or self.components is None:
+            return KakeyaMetrics(n=self.n, K=0.0, vol_proxy=0.0, dimension_estimate=0)
+        
+        S = self.singular_values
+        dim_estimate = self._estimate_dimension(S)
+        
+        k = min(self.pca_dim, len(S))
+        s_norm = S[:k] / max(S[0], 1e-9)
+        vol_proxy = float(np.prod(s_norm))
+        
+        # Coverage from the reservoir, in arrival order, in the current PCA basis
+        sample = np.concatenate(self._sample, axis=0)
+        order = np.argsort(np.concatenate(self._sample_pos), kind="stable")
+        Y = (sample[order] - self.mean) @ self.components[:k].T
+        K = self._compute_directional_coverage(Y, len(sample))
+        
+        return KakeyaMetrics(
+            n=self.n,
+            K=K,
+            vol_proxy=vol_proxy,
+            dimension_estimate=dim_estimate
+        )
@@ -12,10 +12,11 @@ import hashlib
 import json
 import os
 import subprocess
+import uuid
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 import numpy as np
 
@@ -57,6 +58,73 @@ def get_execution_environment() -> Dict[str, str]:
     }
 
 
+# JSONL record type for session header lines
+SESSION_RECORD_TYPE = "provenance_session"
+
+
+@dataclass
+class ProvenanceSession:
+    """Run-level provenance shared by every receipt of a run.
+    
+    Git commit and execution environment are probed once per session
+    instead of once per receipt; receipts refer to the session by id.
+    """
+    
+    session_id: str
+    git_commit: str
+    execution_environment: Dict[str, str]
+    
+    @classmethod
+    def capture(cls) -> ProvenanceSession:
+        """Probe git and the platform once and start a new session."""
+        return cls(
+            session_id=uuid.uuid4().hex,
+            git_commit=get_git_commit(),
+            execution_environment=get_execution_environment()
+        )
+    
+    def to_header(self) -> Dict[str, Any]:
+        """Serialize as a JSONL header record."""
+        return {
+            "record_type": SESSION_RECORD_TYPE,
+            "session_id": self.session_id,
+            "git_commit": self.git_commit,
+            "execution_environment": self.execution_environment,
+        }
+    
+    @classmethod
+    def from_header(cls, data: Dict[str, Any]) -> ProvenanceSession:
+        """Deserialize from a JSONL header record."""
+        return cls(
+            session_id=data["session_id"],
+            git_commit=data.get("git_commit", "unknown"),
+            execution_environment=data.get("execution_environment", {}),
+        )
+
+
+def is_session_record(data: Dict[str, Any]) -> bool:
+    """True if a decoded JSONL record is a session header."""
+    return data.get("record_type") == SESSION_RECORD_TYPE
+
+
+# Process-wide session, captured lazily on first use
+_current_session: Optional[ProvenanceSession] = None
+
+
+def get_provenance_session() -> ProvenanceSession:
+    """Get the process-wide provenance session (captured once)."""
+    global _current_session
+    if _current_session is None:
+        _current_session = ProvenanceSession.capture()
+    return _current_session
+
+
+def set_provenance_session(session: Optional[ProvenanceSession]) -> None:
+    """Set (or with None, reset) the process-wide provenance session."""
+    global _current_session
+    _current_session = session
+
+
 @dataclass
 class ProvenanceMetadata:
     """Complete provenance information for an embedding."""
@@ -67,8 +135,11 @@ class ProvenanceMetadata:
     
     # Computational lineage
     parent_computation_ids: List[str] = field(default_factory=list)
-    git_commit: str = field(default_factory=get_git_commit)
-    execution_environment: Dict[str, str] = field(default_factory=get_execution_environment)
+    git_commit: str = field(default_factory=lambda: get_provenance_session().git_commit)
+    execution_environment: Dict[str, str] = field(
+        default_factory=lambda: get_provenance_session().execution_environment
+    )
+    session_id: Optional[str] = None
     
     # Timing
     generation_timestamp: str = field(default_factory=lambda: datetime.utcnow().isoformat() + "Z")
@@ -78,8 +149,19 @@ class ProvenanceMetadata:
     speedlight_receipt_id: Optional[str] = None
     cqe_ledger_entry: Optional[str] = None
     
-    def to_dict(self) -> Dict[str, Any]:
-        return {
+    @classmethod
+    def for_session(cls, session: ProvenanceSession, **kwargs: Any) -> ProvenanceMetadata:
+        """Create metadata that shares the session's git/environment block."""
+        return cls(
+            git_commit=session.git_commit,
+            execution_environment=session.execution_environment,
+            session_id=session.session_id,
+            **kwargs
+        )
+    
+    def to_dict(self, compact: bool = False) -> Dict[str, Any]:
+        """Serialize; ``compact`` drops the session-level fields (see session headers)."""
+        result = {
             "merkle_root": self.merkle_root,
             "validator_signature": self.validator_signature,
             "parent_computation_ids": self.parent_computation_ids,
@@ -90,15 +172,34 @@ class ProvenanceMetadata:
             "speedlight_receipt_id": self.speedlight_receipt_id,
             "cqe_ledger_entry": self.cqe_ledger_entry,
         }
+        if self.session_id is not None:
+            result["session_id"] = self.session_id
+            if compact:
+                del result["git_commit"]
+                del result["execution_environment"]
+        return result
     
     @classmethod
-    def from_dict(cls, data: Dict[str, Any]) -> ProvenanceMetadata:
+    def from_dict(
+        cls,
+        data: Dict[str, Any],
+        sessions: Optional[Dict[str, ProvenanceSession]] = None
+    ) -> ProvenanceMetadata:
+        """Deserialize; compact records are resolved against ``sessions``."""
+        session = None
+        session_id = data.get("session_id")
+        if sessions and session_id in sessions:
+            session = sessions[session_id]
+        
         return cls(
             merkle_root=data["merkle_root"],
             validator_signature=data["validator_signature"],
             parent_computation_ids=data.get("parent_computation_ids", []),
-            git_commit=data.get("git_commit", "unknown"),
-            execution_environment=data.get("execution_environment", {}),
+            git_commit=data.get("git_commit", session.git_commit if session else "unknown"),
+            execution_environment=data.get(
+                "execution_environment", session.execution_environment if session else {}
+            ),
+            session_id=session_id,
             generation_timestamp=data.get("generation_timestamp", ""),
             computation_time_ms=data.get("computation_time_ms"),
             speedlight_receipt_id=data.get("speedlight_receipt_id"),
@@ -153,8 +254,8 @@ class ComputationalReceipt:
         if ledger_entry:
             self.provenance.cqe_ledger_entry = ledger_entry
     
-    def to_dict(self) -> Dict[str, Any]:
-        """Serialize with full provenance."""
+    def to_dict(self, compact: bool = False) -> Dict[str, Any]:
+        """Serialize with full provenance (``compact`` defers to a session header)."""
         result = {
             "world": self.world,
             "vec": self.vec,
@@ -179,13 +280,17 @@ class ComputationalReceipt:
             result["kakeya_signature"] = {"n": n, "K": k, "vol_proxy": vol}
         
         if self.provenance is not None:
-            result["provenance"] = self.provenance.to_dict()
+            result["provenance"] = self.provenance.to_dict(compact=compact)
         
         return result
     
     @classmethod
-    def from_dict(cls, data: Dict[str, Any]) -> ComputationalReceipt:
-        """Deserialize with provenance."""
+    def from_dict(
+        cls,
+        data: Dict[str, Any],
+        sessions: Optional[Dict[str, ProvenanceSession]] = None
+    ) -> ComputationalReceipt:
+        """Deserialize with provenance (resolving session references)."""
         kakeya_sig = None
         if "kakeya_signature" in data:
             ks = data["kakeya_signature"]
@@ -193,7 +298,7 @@ class ComputationalReceipt:
         
         provenance = None
         if "provenance" in data:
-            provenance = ProvenanceMetadata.from_dict(data["provenance"])
+            provenance = ProvenanceMetadata.from_dict(data["provenance"], sessions)
         
         return cls(
             world=data["world"],
@@ -213,10 +318,112 @@ class ComputationalReceipt:
         )
 
 
+def _iter_receipt_records(receipts: Iterable[Any], written_sessions: Set[str]) -> Iterator[Dict[str, Any]]:
+    """JSONL records for receipts, with a session header before each new session."""
+    for receipt in receipts:
+        provenance = getattr(receipt, "provenance", None)
+        session_id = getattr(provenance, "session_id", None)
+        
+        if session_id is None:
+            yield receipt.to_dict()
+        else:
+            if session_id not in written_sessions:
+                header = ProvenanceSession(
+                    session_id=session_id,
+                    git_commit=provenance.git_commit,
+                    execution_environment=provenance.execution_environment
+                )
+                yield header.to_header()
+                written_sessions.add(session_id)
+            yield receipt.to_dict(compact=True)
+
+
+def write_receipts_jsonl(f: IO[str], receipts: Iterable[Any], written_sessions: Set[str]) -> int:
+    """Write receipts as JSONL, with one session header per session.
+    
+    Receipts that belong to a session are written in compact form; the
+    session's git/environment block goes into a header record the first
+    time the session is seen. ``written_sessions`` holds the session ids
+    already headed in this file and is updated in place.
+    """
+    n_written = 0
+    for record in _iter_receipt_records(receipts, written_sessions):
+        f.write(json.dumps(record) + '\n')
+        if not is_session_record(record):
+            n_written += 1
+    
+    return n_written
+
+
+def get_json_encoder(serializer: str = "auto") -> Callable[[Any], bytes]:
+    """JSON-to-bytes encoder for bulk receipt serialization.
+    
+    Args:
+        serializer: "orjson", "json", or "auto" (orjson if installed).
+            Note that orjson writes non-finite floats as null.
+    """
+    if serializer in ("auto", "orjson"):
+        try:
+            import orjson
+        except ImportError:
+            if serializer == "orjson":
+                raise
+        else:
+            option = orjson.OPT_SERIALIZE_NUMPY
+            return lambda obj: orjson.dumps(obj, option=option)
+    elif serializer != "json":
+        raise ValueError(f"Unknown serializer: {serializer}")
+    
+    encode = json.JSONEncoder().encode
+    return lambda obj: encode(obj).encode('utf-8')
+
+
+def encode_receipts_jsonl(
+    receipts: Iterable[Any],
+    written_sessions: Set[str],
+    encoder: Optional[Callable[[Any], bytes]] = None
+) -> bytes:
+    """Serialize receipts to one JSONL byte block (same records as write_receipts_jsonl)."""
+    encoder = encoder or get_json_encoder()
+    lines = [encoder(record) for record in _iter_receipt_records(receipts, written_sessions)]
+    return b'\n'.join(lines) + b'\n' if lines else b''
+
+
+def read_receipts_jsonl(f: Iterable[str]) -> List[ComputationalReceipt]:
+    """Read receipts from JSONL, resolving compact records via session headers."""
+    return [receipt for chunk in iter_receipt_chunks(f) for receipt in chunk]
+
+
+def iter_receipt_chunks(f: Iterable[str], chunk_size: int = 65536) -> Iterator[List[ComputationalReceipt]]:
+    """Yield receipts from JSONL in lists of up to ``chunk_size``."""
+    sessions: Dict[str, ProvenanceSession] = {}
+    chunk: List[ComputationalReceipt] = []
+    for line in f:
+        if not line.strip():
+            continue
+        data = json.loads(line)
+        if is_session_record(data):
+            session = ProvenanceSession.from_header(data)
+            sessions[session.session_id] = session
+            continue
+        chunk.append(ComputationalReceipt.from_dict(data, sessions))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    
+    if chunk:
+        yield chunk
+
+
 class ProvenanceEmbeddingPipeline:
     """Enhanced pipeline with full provenance tracking."""
     
-    def __init__(self, config: Optional[CQEMetaConfig] = None, validator_signature: Optional[str] = None):
+    def __init__(
+        self,
+        config: Optional[CQEMetaConfig] = None,
+        validator_signature: Optional[str] = None,
+        session: Optional[ProvenanceSession] = None
+    ):
         from .embedding import GeometryFeatureExtractor, CQELaneEncoder, MoonshineFeatureGenerator
         
         self.config = config or get_config()
@@ -226,6 +433,7 @@ class ProvenanceEmbeddingPipeline:
         
         self.validator_signature = validator_signature or "mock_v1.0.0"
         self.parent_computation_ids: List[str] = []
+        self.session = session or get_provenance_session()
     
     def set_parent_computations(self, parent_ids: List[str]) -> None:
         """Set lineage for embeddings generated by this pipeline."""
@@ -279,7 +487,8 @@ class ProvenanceEmbeddingPipeline:
         computation_time = (time.time() - start_time) * 1000  # ms
         merkle_root = compute_merkle_root(vec)
         
-        provenance = ProvenanceMetadata(
+        provenance = ProvenanceMetadata.for_session(
+            self.session,
             merkle_root=merkle_root,
             validator_signature=self.validator_signature,
             parent_computation_ids=self.parent_computation_ids.copy(),
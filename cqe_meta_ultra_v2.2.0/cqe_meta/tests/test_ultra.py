@@ -11,6 +11,8 @@ Comprehensive validation of all uber-aggressive features:
 - Similarity indices
 """
 
+import asyncio
+import subprocess
 import sys
 import tempfile
 import time
@@ -22,12 +24,16 @@ import numpy as np
 
 from cqe_meta import (
     AsyncMetaWorldController,
+    ColumnarEmbeddingStore,
     ComputationalReceipt,
     EmbeddingStore,
     MockValidator,
     ProvenanceEmbeddingPipeline,
+    ProvenanceSession,
     StreamingEmbeddingWriter,
     VectorizedBatchEngine,
+    convert_columnar_to_jsonl,
+    convert_jsonl_to_columnar,
     run_async,
 )
 
@@ -183,6 +189,41 @@ def test_speedlight_linking():
     assert receipt.provenance.cqe_ledger_entry == "ledger_entry_100"
 
 
+@runner.test("Provenance: Session captured once and shared")
+def test_provenance_session():
+    session = ProvenanceSession.capture()
+    pipeline = ProvenanceEmbeddingPipeline(session=session)
+    
+    receipts = [
+        pipeline.embed_with_provenance(
+            world="SESSION",
+            state_vector=np.random.randn(8),
+            channel=7,
+            scope=False,
+            sample_index=i
+        )
+        for i in range(5)
+    ]
+    
+    # Every receipt refers to the same interned environment block
+    assert all(r.provenance.session_id == session.session_id for r in receipts)
+    assert all(r.provenance.execution_environment is session.execution_environment for r in receipts)
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "session.jsonl"
+        EmbeddingStore(path).save(receipts)
+        
+        text = path.read_text()
+        assert text.count('"execution_environment"') == 1, "Environment should be written once"
+        assert text.count('"record_type": "provenance_session"') == 1
+        
+        loaded = EmbeddingStore(path).load()
+        assert len(loaded) == 5
+        assert loaded[0].provenance.git_commit == session.git_commit
+        assert loaded[0].provenance.execution_environment == session.execution_environment
+        assert all(r.verify_integrity() for r in loaded)
+
+
 # ========== Batch Processing Tests ==========
 
 @runner.test("Batch: Vectorized embedding generation")
@@ -228,6 +269,74 @@ def test_parallel_batch():
     print(f" ({len(receipts)/elapsed:.0f} embeddings/sec)", end="")
 
 
+@runner.test("Batch: Columnar kernel matches per-row pipeline")
+def test_columnar_kernel():
+    engine = VectorizedBatchEngine()
+    pipeline = ProvenanceEmbeddingPipeline()
+    
+    # Odd dimension exercises the zero-padded last point
+    samples = np.random.randn(40, 7)
+    result = engine.embed_batch_columnar(
+        world="COLUMNAR",
+        state_vectors=samples,
+        channel=7,
+        scope=True,
+        dtype=np.float64
+    )
+    
+    assert result.vecs.shape == (40, 4 + 16 * 16 + 32)
+    baseline = float(np.sum(samples[0] ** 2))
+    for i in (0, 1, 17, 39):
+        expected = pipeline.embed_with_provenance(
+            world="COLUMNAR",
+            state_vector=samples[i],
+            channel=7,
+            scope=True,
+            sample_index=i,
+            baseline_energy=baseline
+        )
+        receipt = result.receipt(i)
+        assert np.allclose(receipt.vec, expected.vec, atol=1e-12)
+        assert abs(receipt.rho_like - expected.rho_like) < 1e-12
+        assert receipt.sample_index == i
+        assert receipt.verify_integrity()
+    
+    # Default output is a compact float32 matrix
+    compact = engine.embed_batch_columnar("COLUMNAR", samples, channel=7, scope=True)
+    assert compact.vecs.dtype == np.float32
+    assert len(compact.to_receipts()) == 40
+    
+    # Moonshine blocks reproduce the per-seed RandomState stream exactly
+    moon = engine.pipeline.moonshine_gen
+    base = moon.config.embedding.moonshine_seed
+    block = moon.generate_block(np.array([123456, 5, 5, 0]), dim=400)
+    assert np.array_equal(block[0], moon.generate(dim=400, seed=base + 123456))
+    assert np.array_equal(block[1], np.random.RandomState(base + 5).uniform(-1.0, 1.0, 400))
+    assert np.array_equal(block[1], block[2]) and not np.array_equal(block[0], block[1])
+    assert np.allclose(block[3, :3], [-0.47595065, -0.68263206, -0.44374696])
+
+
+@runner.test("Batch: Process pool matches sequential kernel")
+def test_process_pool_batch():
+    engine = VectorizedBatchEngine()
+    samples = np.random.randn(101, 8)
+    
+    sequential = engine.embed_batch_columnar("POOL", samples, channel=7, scope=False)
+    pooled = engine.embed_batch_columnar_parallel(
+        "POOL", samples, channel=7, scope=False, n_workers=3
+    )
+    
+    assert np.array_equal(pooled.vecs, sequential.vecs)
+    assert np.array_equal(pooled.delta_phi, sequential.delta_phi)
+    assert np.array_equal(pooled.sample_index, np.arange(101))
+    
+    receipts = engine.embed_batch_parallel(
+        "POOL", samples[:20], channel=7, scope=False, n_workers=2, backend="process"
+    )
+    assert [r.sample_index for r in receipts] == list(range(20))
+    assert all(r.verify_integrity() for r in receipts)
+
+
 @runner.test("Batch: Streaming buffered writer")
 def test_streaming_writer():
     with tempfile.TemporaryDirectory() as tmpdir:
@@ -256,6 +365,222 @@ def test_streaming_writer():
         assert len(loaded) == 25
 
 
+@runner.test("Batch: Background double-buffered writer")
+def test_background_writer():
+    engine = VectorizedBatchEngine()
+    receipts = engine.embed_batch_vectorized("BGSTREAM", np.random.randn(55, 8), channel=7, scope=False)
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # JSONL target, json and orjson serializers read back identically
+        for serializer in ("json", "auto"):
+            output_path = Path(tmpdir) / f"stream_{serializer}.jsonl"
+            batches = []
+            with StreamingEmbeddingWriter(
+                output_path, buffer_size=10, listeners=[batches.append],
+                background=True, fsync="interval", fsync_interval=0.0,
+                serializer=serializer
+            ) as writer:
+                for receipt in receipts:
+                    writer.write(receipt)
+                writer.wait()
+                assert writer.total_written == 50
+            
+            assert [len(b) for b in batches] == [10] * 5 + [5]
+            loaded = EmbeddingStore(output_path).load()
+            assert [r.sample_index for r in loaded] == [r.sample_index for r in receipts]
+            assert np.array_equal(loaded[7].vec, receipts[7].vec)
+        
+        # Columnar target
+        store = ColumnarEmbeddingStore(Path(tmpdir) / "stream.cqeb", vec_dtype=np.float64)
+        with StreamingEmbeddingWriter(store, buffer_size=16, background=True, fsync="flush") as writer:
+            for receipt in receipts:
+                writer.write(receipt)
+        assert writer.total_written == 55 and len(store) == 55
+        assert np.array_equal(store.load_columns().vecs[20], receipts[20].vec)
+        
+        # Writer-thread errors surface on the producer side, and stay
+        writer = StreamingEmbeddingWriter(Path(tmpdir) / "missing" / "x.jsonl", buffer_size=5, background=True)
+        for receipt in receipts[:10]:
+            writer.write(receipt)
+        for call in (writer.wait, writer.flush, writer.close):
+            try:
+                call()
+                assert False, "expected the write error to propagate"
+            except FileNotFoundError:
+                pass
+        assert writer.total_written == 0 and writer.dropped == 5
+        
+        # A closed writer refuses further use instead of hanging or reopening
+        for background in (False, True):
+            writer = StreamingEmbeddingWriter(Path(tmpdir) / f"closed_{background}.jsonl", background=background)
+            writer.write(receipts[0])
+            assert writer.close() == 1
+            for call in (lambda: writer.write(receipts[1]), writer.flush, writer.flush, writer.wait):
+                try:
+                    call()
+                    assert False, "expected ValueError"
+                except ValueError:
+                    pass
+            assert writer._file is None and len(EmbeddingStore(writer.output_path).load()) == 1
+        
+        # A writer the caller never closes is drained at interpreter exit
+        exit_path = Path(tmpdir) / "unclosed.jsonl"
+        script = (
+            "import sys, numpy as np; sys.path.insert(0, sys.argv[1])\n"
+            "from cqe_meta import StreamingEmbeddingWriter, VectorizedBatchEngine\n"
+            "receipts = VectorizedBatchEngine().embed_batch_vectorized("
+            "'EXIT', np.random.randn(23, 8), channel=7, scope=False)\n"
+            "writer = StreamingEmbeddingWriter(sys.argv[2], buffer_size=10, background=True, fsync='flush')\n"
+            "for r in receipts: writer.write(r)\n"
+        )
+        src = str(Path(__file__).parent.parent / "src")
+        subprocess.run([sys.executable, "-c", script, src, str(exit_path)], check=True)
+        assert len(EmbeddingStore(exit_path).load()) == 23
+
+
+@runner.test("Storage: Columnar store round-trip and memory-mapped load")
+def test_columnar_store():
+    engine = VectorizedBatchEngine()
+    receipts = engine.embed_batch_vectorized("COLSTORE", np.random.randn(30, 8), channel=7, scope=False)
+    receipts[3].metadata = {"rho3": 0.02}
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        jsonl_path = Path(tmpdir) / "world.jsonl"
+        store_path = Path(tmpdir) / "world.cqeb"
+        EmbeddingStore(jsonl_path).save(receipts)
+        
+        assert convert_jsonl_to_columnar(jsonl_path, store_path, vec_dtype=np.float64, chunk_size=7) == 30
+        
+        columns = ColumnarEmbeddingStore(store_path).load_columns()
+        assert isinstance(columns.vecs, np.memmap)
+        assert columns.vecs.shape == (30, receipts[0].vec_dim)
+        assert np.array_equal(columns.sample_index, np.arange(30))
+        assert np.allclose(columns.rho_like, [r.rho_like for r in receipts])
+        
+        loaded = ColumnarEmbeddingStore(store_path).load()
+        assert [r.to_dict() for r in loaded] == [r.to_dict() for r in receipts]
+        assert all(r.verify_integrity() for r in loaded)
+        
+        back_path = Path(tmpdir) / "back.jsonl"
+        convert_columnar_to_jsonl(store_path, back_path)
+        assert back_path.read_text() == jsonl_path.read_text()
+
+
+@runner.test("Storage: Controllers analyze columnar worlds without receipts")
+def test_columnar_controller():
+    from cqe_meta import CQEMetaConfig, EmbeddingColumns, MetaWorldController
+    
+    engine = VectorizedBatchEngine()
+    receipts = engine.embed_batch_vectorized("PEND", np.random.randn(40, 8), channel=7, scope=False)
+    for i, receipt in enumerate(receipts):
+        receipt.metadata = {"rho3": 0.2 * (i % 5)}
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        jsonl_path = Path(tmpdir) / "pend.jsonl"
+        store_path = Path(tmpdir) / "pend.cqeb"
+        EmbeddingStore(jsonl_path).save(receipts)
+        convert_jsonl_to_columnar(jsonl_path, store_path, vec_dtype=np.float64)
+    
+        reference = MetaWorldController(CQEMetaConfig())
+        reference.register_world("PEND", "Pendulum", "Test", jsonl_path, 7)
+        expected = reference.analyze_world("PEND")
+    
+        controller = MetaWorldController(CQEMetaConfig())
+        controller.register_world("PEND", "Pendulum", "Test", store_path, 7)
+        async_controller = AsyncMetaWorldController(CQEMetaConfig())
+        async_controller.register_world("PEND", "Pendulum", "Test", store_path, 7)
+    
+        to_receipts = EmbeddingColumns.to_receipts
+        EmbeddingColumns.to_receipts = None  # any receipt materialization fails
+        try:
+            assert controller.analyze_world("PEND") == expected
+            assert controller.get_world_summary()["PEND"]["n_embeddings"] == 40
+            assert run_async(async_controller.analyze_world_async("PEND")) == expected
+        finally:
+            EmbeddingColumns.to_receipts = to_receipts
+    
+        # Receipts are built only when asked for
+        assert [r.to_dict() for r in controller.load_world("PEND")] == [r.to_dict() for r in receipts]
+        loaded = run_async(async_controller.load_world_async("PEND"))
+        assert [r.to_dict() for r in loaded] == [r.to_dict() for r in receipts]
+        async_controller.close()
+
+
+@runner.test("Kakeya: Vectorized coverage and k-NN direction pairs")
+def test_kakeya_pair_modes():
+    from cqe_meta import CQEMetaConfig, KakeyaAnalyzer
+    
+    analyzer = KakeyaAnalyzer()
+    
+    # Axis-aligned directions land in distinct azimuth/elevation bins
+    dirs = np.array([[1.0, 0, 0], [-1.0, 0, 0], [0, 1.0, 0], [0, 0, 1.0], [1e-12, 0, 0]])
+    assert analyzer._spherical_coverage(dirs) == 4 / 32
+    
+    config = CQEMetaConfig()
+    config.kakeya.pair_mode = "knn"
+    config.kakeya.knn_neighbors = 2
+    config.kakeya.max_pairs = 100
+    knn = KakeyaAnalyzer(config)
+    
+    points = np.random.randn(80, 3)
+    src, dst = knn._knn_pairs(points)
+    assert len(src) == 100
+    assert np.all(src != dst)
+    for i, j in zip(src[:10], dst[:10]):
+        d = np.linalg.norm(points - points[i], axis=1)
+        d[i] = np.inf
+        assert np.linalg.norm(points[j] - points[i]) <= np.sort(d)[1] + 1e-12
+    
+    metrics = knn.analyze_vectors(np.random.randn(200, 16))
+    assert 0.0 < metrics.K <= 1.0
+
+
+@runner.test("Kakeya: Streaming metrics match batch analysis")
+def test_streaming_kakeya():
+    from cqe_meta import CQEMetaConfig, KakeyaAnalyzer, StreamingKakeyaAnalyzer
+    
+    # Sketch rank covering vec_dim keeps the streaming SVD exact
+    config = CQEMetaConfig()
+    config.kakeya.sketch_rank = 512
+    
+    engine = VectorizedBatchEngine()
+    receipts = engine.embed_batch_vectorized("STREAMK", np.random.randn(120, 16), channel=7, scope=False)
+    expected = KakeyaAnalyzer().analyze_embeddings(receipts)
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "live.jsonl"
+        stream = StreamingKakeyaAnalyzer(config)
+        
+        with StreamingEmbeddingWriter(path, buffer_size=25, listeners=[stream.update_receipts]) as writer:
+            for receipt in receipts[:60]:
+                writer.write(receipt)
+            # Readable mid-run, before everything has been written
+            assert stream.metrics().n == 50
+            for receipt in receipts[60:]:
+                writer.write(receipt)
+        
+        live = stream.metrics()
+        assert live.n == expected.n
+        assert abs(live.vol_proxy - expected.vol_proxy) < 1e-9
+        assert live.K == expected.K
+        assert live.dimension_estimate == expected.dimension_estimate
+        
+        replay = StreamingKakeyaAnalyzer(config)
+        assert replay.consume_jsonl(path, chunk_size=33) == 120
+        assert abs(replay.metrics().vol_proxy - expected.vol_proxy) < 1e-9
+    
+    # Coverage follows the whole stream, not just its first max_pairs + 1 rows
+    config = CQEMetaConfig()
+    config.kakeya.max_pairs = 40
+    stream = StreamingKakeyaAnalyzer(config)
+    stream.update(np.outer(np.arange(500.0), np.eye(8)[0]))  # collinear prefix
+    line_K = stream.metrics().K
+    for _ in range(10):
+        stream.update(np.random.randn(100, 8))
+    assert stream.metrics().n == 1500 and stream.metrics().K > 2 * line_K
+    assert len(np.concatenate(stream._sample)) == 41
+
+
 # ========== Async Controller Tests ==========
 
 @runner.test("Async: Parallel world loading")
@@ -351,6 +676,115 @@ def test_similarity_index():
     run_async(test())
 
 
+@runner.test("Async: Incremental similarity index updates")
+def test_incremental_index():
+    async def test():
+        controller = AsyncMetaWorldController()
+        engine = VectorizedBatchEngine()
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for i in range(3):
+                world_id = f"INCR_WORLD_{i}"
+                path = Path(tmpdir) / f"{world_id}.jsonl"
+                EmbeddingStore(path).save(
+                    engine.embed_batch_vectorized(world_id, np.random.randn(12 + i, 8), channel=7, scope=False)
+                )
+                controller.register_world(world_id, f"World {i}", "Test", path, 7)
+            
+            await controller.build_similarity_index_async()
+            index = controller.similarity_index
+            before = index.distance_matrix.copy()
+            
+            # Replace one world: only its row/column may change
+            path = Path(tmpdir) / "INCR_WORLD_1_v2.jsonl"
+            EmbeddingStore(path).save(
+                engine.embed_batch_vectorized("INCR_WORLD_1", np.random.randn(40, 8), channel=7, scope=False)
+            )
+            controller.register_world("INCR_WORLD_1", "World 1", "Test", path, 7)
+            await controller.build_similarity_index_async()
+            
+            assert controller.similarity_index is index
+            assert index.metrics_cache["INCR_WORLD_1/all"].n == 40
+            i0, i2 = index.label_to_idx["INCR_WORLD_0/all"], index.label_to_idx["INCR_WORLD_2/all"]
+            assert index.distance_matrix[i0, i2] == before[i0, i2]
+            
+            m0, m1 = index.metrics_cache["INCR_WORLD_0/all"], index.metrics_cache["INCR_WORLD_1/all"]
+            i1 = index.label_to_idx["INCR_WORLD_1/all"]
+            assert index.distance_matrix[i0, i1] == controller.kakeya.compute_similarity(m0, m1)
+            
+            controller.unregister_world("INCR_WORLD_2")
+            assert len(index.labels) == 2
+            assert [label for label, _ in index.query_similar("INCR_WORLD_0/all")] == ["INCR_WORLD_1/all"]
+        
+        controller.close()
+    
+    run_async(test())
+
+
+@runner.test("Async: Single-flight loads, timeouts and cancellation")
+def test_single_flight():
+    from cqe_meta import CQEMetaConfig
+    
+    async def test():
+        config = CQEMetaConfig()
+        controller = AsyncMetaWorldController(config, n_workers=4)
+        engine = VectorizedBatchEngine()
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "SF_WORLD.jsonl"
+            EmbeddingStore(path).save(
+                engine.embed_batch_vectorized("SF_WORLD", np.random.randn(20, 8), channel=7, scope=False)
+            )
+            controller.register_world("SF_WORLD", "SF", "Test", path, 7)
+            
+            # Count loads and slow them down so all callers overlap
+            loads = []
+            load_sync = controller._load_world_sync
+            
+            def slow_load(world_id):
+                loads.append(world_id)
+                time.sleep(0.2)
+                return load_sync(world_id)
+            
+            controller._load_world_sync = slow_load
+            
+            results = await asyncio.gather(
+                *(controller.analyze_world_async("SF_WORLD") for _ in range(8))
+            )
+            assert loads == ["SF_WORLD"]
+            assert all(r is results[0] for r in results)
+            assert not controller._inflight
+            
+            # A caller timing out does not cancel the shared load
+            controller.register_world("SF_WORLD", "SF", "Test", path, 7)
+            config.validator.timeout = 0.05
+            try:
+                await controller.load_world_async("SF_WORLD")
+                assert False, "expected a timeout"
+            except asyncio.TimeoutError:
+                pass
+            config.validator.timeout = 30
+            receipts = await controller.load_world_async("SF_WORLD")
+            assert len(receipts) == 20 and len(loads) == 2
+            
+            # Cancelling a re-registered world's work discards its result
+            controller.register_world("SF_WORLD", "SF", "Test", path, 7)
+            pending = asyncio.ensure_future(controller.load_world_async("SF_WORLD"))
+            await asyncio.sleep(0.05)
+            assert controller.cancel_pending("SF_WORLD") == 1
+            try:
+                await pending
+                assert False, "expected cancellation"
+            except asyncio.CancelledError:
+                pass
+            await asyncio.sleep(0.3)
+            assert "SF_WORLD" not in controller._world_embeddings
+        
+        controller.close()
+    
+    run_async(test())
+
+
 @runner.test("Async: Fast similarity queries")
 def test_fast_queries():
     async def test():
@@ -398,6 +832,74 @@ def test_fast_queries():
     run_async(test())
 
 
+# ========== Cache Tests ==========
+
+@runner.test("Cache: Persistent metrics and similarity index")
+def test_analysis_cache():
+    from cqe_meta import AnalysisCache, CQEMetaConfig, MetaWorldController
+    
+    async def build(cache_dir, paths, config):
+        controller = AsyncMetaWorldController(config, cache=AnalysisCache(cache_dir, config))
+        for world_id, path in paths.items():
+            controller.register_world(world_id, world_id, "Test", path, 7)
+        loads = []
+        load_sync = controller._load_world_sync
+        controller._load_world_sync = lambda w: loads.append(w) or load_sync(w)
+        await controller.build_similarity_index_async()
+        controller.close()
+        return controller.similarity_index, loads
+    
+    async def test():
+        engine = VectorizedBatchEngine()
+        config = CQEMetaConfig()
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache_dir = Path(tmpdir) / "cache"
+            paths = {}
+            for i in range(3):
+                world_id = f"CACHE_WORLD_{i}"
+                paths[world_id] = Path(tmpdir) / f"{world_id}.jsonl"
+                EmbeddingStore(paths[world_id]).save(
+                    engine.embed_batch_vectorized(world_id, np.random.randn(20 + i, 8), channel=7, scope=False)
+                )
+            
+            cold, loads = await build(cache_dir, paths, config)
+            assert sorted(loads) == sorted(paths)
+            
+            # Restart: warm from the cached index, nothing is reloaded
+            warm, loads = await build(cache_dir, paths, config)
+            assert loads == []
+            assert warm.labels == cold.labels
+            assert np.array_equal(warm.distance_matrix, cold.distance_matrix)
+            
+            # Changing one file only reloads that world (metrics hit for the rest)
+            EmbeddingStore(paths["CACHE_WORLD_1"]).save(
+                engine.embed_batch_vectorized("CACHE_WORLD_1", np.random.randn(30, 8), channel=7, scope=False)
+            )
+            updated, loads = await build(cache_dir, paths, config)
+            assert loads == ["CACHE_WORLD_1"]
+            assert updated.metrics_cache["CACHE_WORLD_1/all"].n == 30
+            
+            # Analysis config is part of the key
+            changed = CQEMetaConfig()
+            changed.kakeya.n_azimuth = 16
+            _, loads = await build(cache_dir, paths, changed)
+            assert sorted(loads) == sorted(paths)
+            
+            # The sync controller shares the metrics entries
+            sync = MetaWorldController(config, cache=AnalysisCache(cache_dir, config))
+            sync.register_world("CACHE_WORLD_0", "W0", "Test", paths["CACHE_WORLD_0"], 7)
+            metrics = sync.analyze_world("CACHE_WORLD_0")
+            assert sync.cache.hits == 1 and "CACHE_WORLD_0" not in sync._world_embeddings
+            assert metrics["all"] == cold.metrics_cache["CACHE_WORLD_0/all"]
+            
+            # LRU eviction by total size
+            cache = AnalysisCache(cache_dir, config, max_bytes=0)
+            assert cache.evict() > 0 and cache.total_bytes() == 0
+    
+    run_async(test())
+
+
 # ========== Integration Tests ==========
 
 @runner.test("Integration: End-to-end pipeline")
@@ -10,9 +10,27 @@ import hashlib
 from typing import Dict, List, Any, Tuple, Generator, Callable, Optional
 from dataclasses import dataclass, field
 from pathlib import Path
-from functools import wraps
+from functools import lru_cache, wraps
+from itertools import product
 from contextlib import contextmanager
 
+@lru_cache(maxsize=1)
+def _e8_roots() -> np.ndarray:
+    """240 E8 roots with norm √2, built once per process."""
+    roots = []
+    for i in range(8):
+        for j in range(i+1, 8):
+            for s1, s2 in [(1,1), (1,-1), (-1,1), (-1,-1)]:
+                root = [0]*8
+                root[i], root[j] = s1, s2
+                roots.append(root)
+    for signs in product([-0.5, 0.5], repeat=8):
+        if sum(1 for s in signs if s < 0) % 2 == 0:
+            roots.append(list(signs))
+    roots = np.array(roots, dtype=float)
+    roots.setflags(write=False)
+    return roots
+
 # CLASS: ALENAOps
 # Source: CQE_CORE_MONOLITH.py (line 132)
 
@@ -23,21 +41,8 @@ class ALENAOps:
         self.projection_channels = [3, 6, 9]
 
     def _gen_e8_roots(self) -> np.ndarray:
-        """Generate 240 E8 roots with norm √2."""
-        roots = []
-        for i in range(8):
-            for j in range(i+1, 8):
-                for s1, s2 in [(1,1), (1,-1), (-1,1), (-1,-1)]:
-                    root = [0]*8
-                    root[i], root[j] = s1, s2
-                    roots.append(root)
-        for signs in product([-0.5, 0.5], repeat=8):
-            if sum(1 for s in signs if s < 0) % 2 == 0:
-                roots.append(list(signs))
-        roots = np.array(roots)
-        for i in range(len(roots)):
-            roots[i] = roots[i] * (E8_NORM / sp_norm(roots[i]))
-        return roots
+        """Generate 240 E8 roots with norm √2 (shared, read-only)."""
+        return _e8_roots()
 
     @ladder_hook
     def r_theta_snap(self, vector: np.ndarray) -> np.ndarray: